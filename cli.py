@@ -1,13 +1,12 @@
 #!/usr/bin/env python3
 from __future__ import annotations
-import argparse
-from src.research_agent.agent import collect, score_and_save
+import argparse, os
 
 def parse_args():
     p = argparse.ArgumentParser(
         description="Search multiple scholarly sources (arXiv, PubMed, HAL, DBLP, Crossref, OpenAlex) and export per-paper JSON files."
     )
-    p.add_argument("topic", help="Research topic / query seed (in quotes)")
+    p.add_argument("topic", nargs="?", help="Research topic / query seed (in quotes)")
     p.add_argument("--years", default=None, help="YYYY or YYYY-YYYY (inclusive)")
     p.add_argument("--per-source", type=int, default=50, help="Max results per source")
     p.add_argument("--outdir", default="results", help="Output directory")
@@ -16,8 +15,40 @@ def parse_args():
     p.add_argument("--ollama-model", default=None, help="Enable LLM re-ranking (e.g., 'llama3.1:8b')")
     p.add_argument("--min-score", type=float, default=0.0, help="Filter papers below this relevance score [0..1]")
     p.add_argument("--max-papers", type=int, default=None, help="Cap the number of saved papers after filtering")
+    p.add_argument("--llm-batch", type=int, default=1,
+                   help="Abstracts packed into one LLM prompt (default: 1 = one prompt per abstract)")
+    p.add_argument("--llm-context", type=int, default=4096,
+                   help="Token budget (num_ctx) for a batched LLM prompt")
+    p.add_argument("--abstract-tokens", type=int, default=None,
+                   help="Truncate abstracts to about this many tokens in batched prompts")
+    p.add_argument("--llm-band", default=None,
+                   help="Cascade: only send items whose keyword score is in LO-HI (e.g. 0.2-0.8) to the LLM")
+    p.add_argument("--llm-top-k", type=int, default=None,
+                   help="Cascade: also send the K best items by keyword score to the LLM")
+    p.add_argument("--llm-budget", type=int, default=None, help="Cap the number of LLM calls per run")
 
-    # Source toggles
+    # Source selection
+    p.add_argument("--sources", default=None,
+                   help="Comma-separated source names to query (replaces the defaults; see --list-sources)")
+    p.add_argument("--list-sources", action="store_true", help="List available sources and exit")
+    p.add_argument("--adaptive", action="store_true",
+                   help="Spend a global record budget page by page on the most productive sources")
+    p.add_argument("--budget", type=int, default=None,
+                   help="Total records to fetch with --adaptive (default: per-source x sources)")
+    p.add_argument("--page-size", type=int, default=25, help="Records per request with --adaptive")
+    p.add_argument("--min-new-ratio", type=float, default=0.2,
+                   help="With --adaptive, stop paging a source when fewer new unique records per page")
+    p.add_argument("--reset-breakers", action="store_true",
+                   help="Close every source's circuit breaker before querying")
+    p.add_argument("--no-idmap", action="store_true",
+                   help="Dedup on record fields only, without the persistent cross-source id map")
+    p.add_argument("--events", action="store_true",
+                   help="Stream progress events as JSON lines on stdout (log lines go to stderr)")
+    p.add_argument("--quota", default=None, metavar="SOURCE=N[,...]",
+                   help="Request budget per provider window for paid sources, e.g. scopus=5000,ieee=100 "
+                        "(default: the provider quota, or $RESEARCH_AGENT_QUOTAS)")
+    p.add_argument("--quota-status", action="store_true",
+                   help="Show paid-source usage in the current windows and exit")
     p.add_argument("--no-openalex", action="store_true", help="Disable OpenAlex")
     p.add_argument("--no-arxiv", action="store_true", help="Disable arXiv")
     p.add_argument("--crossref", action="store_true", help="Enable Crossref")
@@ -28,6 +59,60 @@ def parse_args():
     p.add_argument("--use-core", action="store_true", help="Enable CORE (experimental)")
     p.add_argument("--use-scopus", action="store_true", help="Enable Scopus (requires API key)")
     p.add_argument("--use-ieee", action="store_true", help="Enable IEEE Xplore (requires API key)")
+    p.add_argument("--use-local", action="store_true",
+                   help="Enable the offline index built with --ingest (no network)")
+    p.add_argument("--local-index", default=None, metavar="PATH",
+                   help="Offline index file (default: $RESEARCH_AGENT_LOCAL_INDEX or the cache dir)")
+    p.add_argument("--ingest", nargs="+", default=None, metavar="DUMP",
+                   help="Stream OpenAlex snapshot / arXiv OAI-PMH dumps (files or dirs) into the offline index and exit")
+    p.add_argument("--merge", nargs="+", default=None, metavar="DIR",
+                   help="Merge results trees (or directories of them) into one deduplicated library and exit")
+    p.add_argument("--merge-out", default=None, metavar="PATH",
+                   help="Merged library directory (default: <outdir>/_library)")
+    p.add_argument("--merge-workers", type=int, default=None,
+                   help="Processes for --merge (default: CPU count)")
+    p.add_argument("--merge-shards", type=int, default=64,
+                   help="Dedup buckets for --merge; raise for very large merges to bound memory per bucket")
+    p.add_argument("--ingest-format", choices=["openalex", "arxiv-oai", "arxiv-json"], default=None,
+                   help="Dump format for --ingest (default: detected per file)")
+
+    # Citation snowballing
+    p.add_argument("--snowball", type=int, default=0, metavar="HOPS",
+                   help="Expand the best seed papers along the OpenAlex citation graph for HOPS hops")
+    p.add_argument("--snowball-seeds", type=int, default=20, help="Seed papers for --snowball (best by keyword score)")
+    p.add_argument("--snowball-budget", type=int, default=200, help="Max new papers per snowball hop")
+    p.add_argument("--snowball-direction", choices=["both", "references", "citations"], default="both",
+                   help="Follow references, citations or both")
+
+    # Topic monitoring
+    p.add_argument("--watch", action="store_true",
+                   help="Delta fetch: only ask sources for records added since the last --watch run")
+    p.add_argument("--watch-state", default=None,
+                   help="Watch state file (default: <outdir>/<topic>/watch.json)")
+
+    # Run cache
+    p.add_argument("--run-cache", action="store_true",
+                   help="Reuse this topic/years/sources run: fetch only past the cached depth, score only new records")
+    p.add_argument("--run-cache-ttl", type=float, default=7.0, metavar="DAYS",
+                   help="Refetch a cached run from scratch once it is older than this (default: 7)")
+    p.add_argument("--refresh", action="store_true", help="With --run-cache, ignore and replace the cached run")
+
+    # Novelty
+    p.add_argument("--only-new", action="store_true",
+                   help="Drop papers saved by earlier --only-new runs (right after dedup) and remember this run's")
+    p.add_argument("--seen-scope", choices=["topic", "workspace"], default="topic",
+                   help="Share the seen-set per topic (default) or across the whole output directory")
+    p.add_argument("--seen-file", default=None, help="Explicit seen-set file (overrides --seen-scope)")
+
+    # PDFs
+    p.add_argument("--pdfs", type=int, default=0, metavar="N",
+                   help="Download PDFs of the N best-ranked papers (default: 0 = off)")
+    p.add_argument("--pdf-dir", default=None,
+                   help="Content-addressed PDF store shared by all topics (default: <outdir>/_pdfs)")
+    p.add_argument("--pdf-workers", type=int, default=8, help="Concurrent PDF downloads")
+    p.add_argument("--pdf-per-host", type=int, default=2, help="Concurrent PDF downloads per host")
+    p.add_argument("--pdf-budget-mb", type=int, default=None,
+                   help="Evict least recently used PDFs once the store exceeds this size")
 
     # Output format flags
     p.add_argument(
@@ -40,42 +125,261 @@ def parse_args():
         action="store_true",
         help="Disable CSL-JSON export (default: enabled)",
     )
+    p.add_argument(
+        "--storage",
+        choices=["files", "pack"],
+        default="files",
+        help="Paper store: one JSON file per paper (default) or a single packed file with an id index",
+    )
+    p.add_argument(
+        "--compact-json",
+        action="store_true",
+        help="Write per-paper JSON and the CSL export without indentation",
+    )
+    p.add_argument(
+        "--compress",
+        choices=["gzip", "zstd"],
+        default=None,
+        help="Compress per-paper JSON and index.jsonl (.gz / .zst; zstd needs 'zstandard')",
+    )
+    p.add_argument(
+        "--no-colindex",
+        action="store_true",
+        help="Disable the memory-mappable columnar index (index.col, default: enabled)",
+    )
 
     # Misc
     p.add_argument("--verbose", action="store_true", help="Verbose logging")
     p.add_argument("--incremental", action="store_true", help="Incrementally save as results come in")
+    p.add_argument("--queue", default=None, metavar="PATH",
+                   help="Durable SQLite job queue: with a topic, submit the search there instead of running it")
+    p.add_argument("--worker", action="store_true", help="Run queued tasks from --queue until it is drained")
+    p.add_argument("--worker-forever", action="store_true", help="With --worker, keep polling for new jobs")
+    p.add_argument("--lease", type=float, default=300.0, help="Worker task lease in seconds (renewed while running)")
+    p.add_argument("--queue-status", action="store_true", help="Print the jobs in --queue and exit")
+    p.add_argument("--serve", action="store_true",
+                   help="Run as a long-lived JSON-RPC daemon on stdio (see src/research_agent/server.py)")
+
+    args = p.parse_args()
+    if args.llm_band:
+        try:
+            lo, hi = (float(x) for x in args.llm_band.split("-"))
+        except ValueError:
+            p.error("--llm-band expects LO-HI, e.g. 0.2-0.8")
+        args.llm_band = (lo, hi)
+    if (args.worker or args.queue_status) and not args.queue:
+        p.error("--worker and --queue-status need --queue PATH")
+    if not args.topic and not (args.list_sources or args.serve or args.worker or args.queue_status
+                               or args.quota_status or args.ingest
+                               or args.merge):
+        p.error("the following arguments are required: topic")
+    return args
+
+def _source_toggles(args) -> dict:
+    """Only flags the user actually passed adjust the selection."""
+    toggles = {}
+    for name in ("openalex", "arxiv", "pubmed", "hal", "dblp"):
+        if getattr(args, f"no_{name}"):
+            toggles[f"use_{name}"] = False
+    for name in ("doaj", "core", "scopus", "ieee", "local"):
+        if getattr(args, f"use_{name}"):
+            toggles[f"use_{name}"] = True
+    if args.crossref:
+        toggles["use_crossref"] = True
+    return toggles
+
+def _list_sources() -> int:
+    from src.research_agent.sources.registry import all_sources
+    for s in all_sources():
+        caps = [f"years={s.year_filter}"]
+        if s.paging: caps.append("paging")
+        if s.abstracts: caps.append("abstracts")
+        if s.since: caps.append("since")
+        if s.paid: caps.append("paid")
+        if s.api_key_env: caps.append(f"key={s.api_key_env}")
+        print(f"{s.name:<10} {'on ' if s.default else 'off'}  {s.label:<12} {', '.join(caps)}")
+    return 0
+
+def _quota_status(mgr) -> int:
+    import time
+    rows = mgr.usage()
+    if not rows:
+        print("No paid-source requests recorded.")
+    for u in rows:
+        budget = "unlimited" if u["budget"] is None else u["budget"]
+        resets = time.strftime("%Y-%m-%d %H:%M", time.localtime(u["resets"]))
+        print(f"{u['source']:<10} key {u['key']}  {u['used']}/{budget} requests, resets {resets}")
+    return 0
+
+def _advance_watch(watch, status: dict, mark) -> None:
+    """Persist watch marks once the run's output is safely written."""
+    if watch is None:
+        return
+    from src.research_agent.sources.registry import get_source
+    watch.advance({n: ok for n, ok in status.items() if get_source(n).since}, mark)
+    watch.save()
 
-    return p.parse_args()
+def _queue_main(args) -> int:
+    from src.research_agent import jobqueue
+    if args.queue_status:
+        for job in jobqueue.status(args.queue):
+            tasks = ", ".join(f"{k}={v}" for k, v in sorted(job["tasks"].items()))
+            print(f"{job['id']:>5} {job['state']:<10} {job['topic']}  [{tasks}]  {job['outbase'] or ''}")
+        return 0
+    if args.worker:
+        worker = jobqueue.Worker(args.queue, lease=args.lease, verbose=args.verbose)
+        try:
+            n = worker.run(forever=args.worker_forever)
+        finally:
+            worker.close()
+        print(f"[ok] Worker ran {n} task(s).")
+        return 0
+    job_id = jobqueue.submit(
+        args.queue, args.topic, years=args.years, per_source=args.per_source,
+        sources=[s.strip() for s in args.sources.split(",") if s.strip()] if args.sources else None,
+        toggles=_source_toggles(args), outdir=args.outdir,
+        ollama_model=args.ollama_model, min_score=args.min_score, max_papers=args.max_papers,
+        llm_batch=args.llm_batch, llm_context=args.llm_context, abstract_tokens=args.abstract_tokens,
+        llm_band=args.llm_band, llm_top_k=args.llm_top_k, llm_budget=args.llm_budget,
+        save_bibtex=not args.no_bibtex, save_csl=not args.no_csl,
+        save_colindex=not args.no_colindex, storage=args.storage,
+        compact_json=args.compact_json, compression=args.compress,
+    )
+    print(f"[ok] Queued job {job_id} in {args.queue}")
+    return 0
 
 def main():
     args = parse_args()
+    if args.list_sources:
+        return _list_sources()
+    if args.local_index:
+        os.environ["RESEARCH_AGENT_LOCAL_INDEX"] = args.local_index
+    if args.no_idmap:
+        os.environ["RESEARCH_AGENT_IDMAP"] = "off"
+    if args.merge:
+        from src.research_agent.merge import merge
+        n = merge(args.merge, args.merge_out or os.path.join(args.outdir, "_library"),
+                  workers=args.merge_workers, shards=args.merge_shards, storage=args.storage,
+                  save_bibtex=not args.no_bibtex, save_csl=not args.no_csl,
+                  save_colindex=not args.no_colindex, compact_json=args.compact_json,
+                  compression=args.compress, verbose=args.verbose)
+        print(f"[info] Merged {n} unique papers.", flush=True)
+        return 0
+    if args.ingest:
+        from src.research_agent.sources.local_source import ingest, index_path
+        n = ingest(args.ingest, fmt=args.ingest_format, verbose=args.verbose)
+        print(f"[info] Indexed {n} records into {index_path()}", flush=True)
+        return 0
+    if args.quota or args.quota_status:
+        from src.research_agent import quota
+        mgr = quota.configure(quota.parse_budgets(args.quota)) if args.quota else quota.manager()
+        if args.quota_status:
+            return _quota_status(mgr)
+    if args.serve:
+        from src.research_agent.server import Daemon, serve_stdio
+        return serve_stdio(Daemon(verbose=args.verbose))
+    if args.queue:
+        return _queue_main(args)
+
+    # Imported here so `--help` does not pay for the library import.
+    from src.research_agent.agent import collect, score_and_save
+
+    on_event = None
+    if args.events:
+        import sys, time
+        from src.research_agent.events import emit, jsonl_writer
+        started = time.monotonic()
+        on_event = jsonl_writer(sys.stdout)
+        sys.stdout = sys.stderr  # keep [info] lines out of the event stream
+
+    if args.reset_breakers:
+        from src.research_agent.resilience import health
+        health().reset()
 
     if args.verbose:
         print("[info] Collecting…")
 
-    items = collect(
-        topic=args.topic,
-        years=args.years,
-        per_source=args.per_source,
-        use_openalex=not args.no_openalex,
-        use_arxiv=not args.no_arxiv,
-        use_crossref=args.crossref,
-        use_pubmed=not args.no_pubmed,
-        use_hal=not args.no_hal,
-        use_dblp=not args.no_dblp,
-        use_doaj=args.use_doaj,      # off unless passed
-        use_core=args.use_core,      # off unless passed
-        use_scopus=args.use_scopus,
-        use_ieee=args.use_ieee,
-        verbose=args.verbose,
-    )
+    watch = None
+    status = {}
+    if args.watch:
+        from src.research_agent.watch import WatchState, default_watch_path, today
+        watch = WatchState(args.watch_state or default_watch_path(args.outdir, args.topic))
+        run_mark = today()
+        if args.verbose:
+            marks = watch.since()
+            print(f"[info] Watch marks: {marks or 'none (first run fetches the top --per-source records per source)'}")
+
+    sources = [s.strip() for s in args.sources.split(",") if s.strip()] if args.sources else None
+    runs = None
+    if args.run_cache and (args.adaptive or args.watch):
+        import sys
+        print("[warn] --run-cache ignored with --adaptive / --watch", file=sys.stderr)
+    elif args.run_cache:
+        from src.research_agent.runcache import RunCache, scorer_id
+        runs = RunCache(ttl_days=args.run_cache_ttl)
+
+    if runs is not None:
+        items = runs.collect(
+            args.topic, args.years, args.per_source,
+            sources=sources,
+            scorer=scorer_id(args.ollama_model, args.llm_band, args.llm_top_k, args.llm_budget,
+                             args.llm_batch, args.llm_context, args.abstract_tokens),
+            refresh=args.refresh,
+            status=status,
+            on_event=on_event,
+            verbose=args.verbose,
+            **_source_toggles(args),
+        )
+    else:
+        items = collect(
+            topic=args.topic,
+            years=args.years,
+            per_source=args.per_source,
+            sources=sources,
+            adaptive=args.adaptive,
+            budget=args.budget,
+            page_size=args.page_size,
+            min_new_ratio=args.min_new_ratio,
+            since=watch.since() if watch else None,
+            status=status,
+            on_event=on_event,
+            verbose=args.verbose,
+            **_source_toggles(args),
+        )
+    if args.snowball > 0 and items:
+        from src.research_agent.agent import _parse_years
+        from src.research_agent.snowball import WorkCache, expand
+        y1, y2 = _parse_years(args.years)
+        with WorkCache() as cache:
+            items = expand(args.topic, items, seeds=args.snowball_seeds, hops=args.snowball,
+                           per_hop=args.snowball_budget, direction=args.snowball_direction,
+                           year_from=y1, year_to=y2, cache=cache, verbose=args.verbose)
+
+    seen = None
+    if args.only_new:
+        from src.research_agent.seen import SeenSet, default_seen_path, filter_new
+        seen = SeenSet(args.seen_file or default_seen_path(args.outdir, args.topic, args.seen_scope))
+        before = len(items)
+        items = filter_new(items, seen)
+        if args.verbose:
+            print(f"[info] {before - len(items)} already-seen item(s) dropped.")
+
     if not items:
-        print("[info] No results found.")
+        if runs is not None:
+            runs.close()
+        print("[info] No results found." if seen is None else "[info] No new results.")
+        if on_event:
+            emit(on_event, "run_finished", outbase=None, scored=0, saved=0,
+                 elapsed=round(time.monotonic() - started, 3))
+        _advance_watch(watch, status, run_mark if watch else None)
         return 0
 
     if args.verbose:
         print(f"[info] Collected {len(items)} unique items. Scoring and saving…")
 
+    # --only-new remembers what was reviewed: the saved papers, not those cut by
+    # --min-score / --max-papers
+    saved_items = [] if seen is not None else None
     outbase, saved = score_and_save(
         topic=args.topic,
         items=items,
@@ -83,11 +387,40 @@ def main():
         ollama_model=args.ollama_model,
         min_score=args.min_score,
         max_papers=args.max_papers,
+        llm_batch=args.llm_batch,
+        llm_context=args.llm_context,
+        abstract_tokens=args.abstract_tokens,
+        llm_band=args.llm_band,
+        llm_top_k=args.llm_top_k,
+        llm_budget=args.llm_budget,
         save_bibtex=not args.no_bibtex,
         save_csl=not args.no_csl,
+        save_colindex=not args.no_colindex,
         incremental=args.incremental,
         verbose=args.verbose,
+        release=True,
+        storage=args.storage,
+        compact_json=args.compact_json,
+        compression=args.compress,
+        on_event=on_event,
+        keep_scores=runs is not None,
+        saved=saved_items,
     )
+    if runs is not None:
+        runs.save_scores(items)
+        runs.close()
+
+    if args.pdfs > 0:
+        from src.research_agent.pdfs import fetch_pdfs
+        fetch_pdfs(outbase, args.pdf_dir or os.path.join(args.outdir, "_pdfs"), args.pdfs,
+                   workers=args.pdf_workers, per_host=args.pdf_per_host,
+                   budget_bytes=args.pdf_budget_mb * 2**20 if args.pdf_budget_mb else None,
+                   verbose=args.verbose)
+
+    if seen is not None:
+        from src.research_agent.seen import remember
+        remember(saved_items, seen)
+    _advance_watch(watch, status, run_mark if watch else None)
 
     print(f"[ok] Saved {saved} item(s) -> {outbase}")
     return 0
@@ -1,33 +1,16 @@
 from __future__ import annotations
-import os, json, sys
-from typing import List, Dict, Tuple
-from .utils import slugify, safe_hash, ensure_dir, write_json, simple_content_score, OllamaClient
-
-# Sources
-from .sources.openalex_source import search_openalex
-from .sources.arxiv_source import search_arxiv
-from .sources.crossref_source import search_crossref
-from .sources.pubmed_source import search_pubmed
-from .sources.hal_source import search_hal
-from .sources.dblp_source import search_dblp
-# optional/experimental
-try:
-    from .sources.doaj_source import search_doaj
-except Exception:
-    search_doaj = None  # type: ignore
-try:
-    from .sources.core_source import search_core
-except Exception:
-    search_core = None  # type: ignore
-# paid
-try:
-    from .sources.scopus_source import search_scopus
-except Exception:
-    search_scopus = None  # type: ignore
-try:
-    from .sources.ieee_source import search_ieee
-except Exception:
-    search_ieee = None  # type: ignore
+import itertools, os, json, sys, time
+from typing import Iterable, List, Dict, Mapping, Tuple
+from .utils import slugify, safe_hash, ensure_dir, OllamaClient
+from .scoring import score_items
+from .colindex import write_columnar_index
+from .events import Callback, emit
+from .idmap import idmap
+from .paperstore import DirStore, open_store
+from .serialize import dumps, open_out
+from .ranking import ExternalSorter, TopK, rank_key
+from .sources.registry import resolve_sources
+from . import quota
 
 def _normalize_authors(auth_list):
     names = []
@@ -56,13 +39,27 @@ def _dedup_key(item: Dict) -> str:
     title = (item.get("title") or "").lower()
     return "title:" + title[:160]
 
-def collect(topic: str, years: str | None, per_source: int,
-            *, use_openalex: bool = True, use_arxiv: bool = True, use_crossref: bool = False,
-            use_pubmed: bool = True, use_hal: bool = True, use_dblp: bool = True,
-            use_doaj: bool = False, use_core: bool = False,
-            use_scopus: bool = False, use_ieee: bool = False,
-            verbose: bool = False) -> List[Dict]:
-    # parse years
+def _paper_name(item: Dict) -> str:
+    anchor = item.get("doi") or item.get("arxiv_id") or item.get("openalex_id") or item.get("pubmed_id") or item.get("hal_docid") or item.get("title","")
+    return safe_hash(str(anchor))
+
+def _index_row(item: Dict, name: str) -> Dict:
+    return {
+        "id": name,
+        "title": item.get("title",""),
+        "year": item.get("year"),
+        "doi": item.get("doi"),
+        "arxiv_id": item.get("arxiv_id"),
+        "openalex_id": item.get("openalex_id"),
+        "pubmed_id": item.get("pubmed_id"),
+        "hal_docid": item.get("hal_docid"),
+        "score": item.get("score",0.0),
+        "source": item.get("source",""),
+        "url_page": item.get("url_page",""),
+        "url_pdf": item.get("url_pdf",""),
+    }
+
+def _parse_years(years: str | None) -> Tuple[int | None, int | None]:
     y1 = y2 = None
     if years:
         parts = years.split("-")
@@ -71,112 +68,227 @@ def collect(topic: str, years: str | None, per_source: int,
             y2 = int(parts[1]) if parts[1] else None
         else:
             y1 = y2 = int(years)
+    return y1, y2
 
-    results: List[Dict] = []
-
-    if use_openalex:
-        try:
-            if verbose: print("[info] Querying OpenAlex…", flush=True)
-            results += search_openalex(topic, per_source, y1, y2)
-        except Exception as e:
-            print(f"[warn] OpenAlex error: {e}", file=sys.stderr)
-
-    if use_arxiv:
-        try:
-            if verbose: print("[info] Querying arXiv…", flush=True)
-            before = len(results)
-            results += search_arxiv(topic, per_source, y1, y2)
-            if verbose: print(f"[info] arXiv returned {len(results)-before} items.", flush=True)
-        except Exception as e:
-            print(f"[warn] arXiv error: {e}", file=sys.stderr)
-
-    if use_pubmed:
-        try:
-            if verbose: print("[info] Querying PubMed…", flush=True)
-            before = len(results)
-            results += search_pubmed(topic, per_source, y1, y2)
-            if verbose: print(f"[info] PubMed returned {len(results)-before} items.", flush=True)
-        except Exception as e:
-            print(f"[warn] PubMed error: {e}", file=sys.stderr)
-
-    if use_hal:
-        try:
-            if verbose: print("[info] Querying HAL…", flush=True)
-            before = len(results)
-            results += search_hal(topic, per_source, y1, y2)
-            if verbose: print(f"[info] HAL returned {len(results)-before} items.", flush=True)
-        except Exception as e:
-            print(f"[warn] HAL error: {e}", file=sys.stderr)
+def collect(topic: str, years: str | None, per_source: int,
+            *, sources: Iterable[str] | None = None,
+            adaptive: bool = False, budget: int | None = None,
+            page_size: int = 25, min_new_ratio: float = 0.2,
+            since: Mapping[str, str] | None = None,
+            status: Dict[str, bool] | None = None,
+            on_event: Callback | None = None,
+            verbose: bool = False, **toggles: bool) -> List[Dict]:
+    """
+    Query the selected sources, normalize authors and deduplicate.
+    `sources` lists registry names (default: the registry defaults); the historical
+    `use_<name>=True/False` keywords still add or remove single sources.
+    With `adaptive`, a global `budget` of records (default per_source x sources) is
+    spent page by page on the most productive sources (see planner.adaptive_fetch).
+    `since` maps source names to "YYYY-MM-DD" marks for delta fetches (sources with
+    the `since` capability only); `status`, if given, receives name -> success (for a
+    delta fetch: the whole delta listing was read, see watch.py).
+    `on_event` receives progress events (see events.py).
+    """
+    bad = [k for k in toggles if not k.startswith("use_")]
+    if bad:
+        raise TypeError(f"collect() got unexpected keyword argument(s): {', '.join(bad)}")
+    y1, y2 = _parse_years(years)
+    specs = resolve_sources(sources, toggles)
 
-    if use_dblp:
-        try:
-            if verbose: print("[info] Querying DBLP…", flush=True)
-            before = len(results)
-            results += search_dblp(topic, per_source, y1, y2)
-            if verbose: print(f"[info] DBLP returned {len(results)-before} items.", flush=True)
-        except Exception as e:
-            print(f"[warn] DBLP error: {e}", file=sys.stderr)
+    if adaptive:
+        from .planner import adaptive_fetch
+        results = adaptive_fetch(topic, specs, y1, y2, budget or per_source * len(specs),
+                                 page_size=page_size, min_new_ratio=min_new_ratio,
+                                 since=since, status=status, on_event=on_event, verbose=verbose)
+    else:
+        results = _fetch_all(topic, specs, per_source, y1, y2, verbose, since=since, status=status,
+                             on_event=on_event)
 
-    if use_doaj and search_doaj:
-        try:
-            if verbose: print("[info] Querying DOAJ…", flush=True)
-            before = len(results)
-            results += search_doaj(topic, per_source, y1, y2)
-            if verbose: print(f"[info] DOAJ returned {len(results)-before} items.", flush=True)
-        except Exception as e:
-            print(f"[warn] DOAJ error: {e}", file=sys.stderr)
-
-    if use_core and search_core:
-        try:
-            if verbose: print("[info] Querying CORE…", flush=True)
-            before = len(results)
-            results += search_core(topic, per_source, y1, y2)
-            if verbose: print(f"[info] CORE returned {len(results)-before} items.", flush=True)
-        except Exception as e:
-            print(f"[warn] CORE error: {e}", file=sys.stderr)
+    unique = _normalize_and_dedup(results, on_event)
+    if verbose: print(f"[info] Unique after dedup: {len(unique)}", flush=True)
+    return unique
 
-    if use_scopus and search_scopus:
-        try:
-            if verbose: print("[info] Querying Scopus…", flush=True)
-            before = len(results)
-            results += search_scopus(topic, per_source, y1, y2)
-            if verbose: print(f"[info] Scopus returned {len(results)-before} items.", flush=True)
-        except Exception as e:
-            print(f"[warn] Scopus error: {e}", file=sys.stderr)
+def _since_kwargs(spec, since: Mapping[str, str] | None) -> Dict[str, str]:
+    mark = (since or {}).get(spec.name)
+    return {"since": mark} if (mark and spec.since) else {}
 
-    if use_ieee and search_ieee:
+def _fetch_all(topic: str, specs, per_source: int, y1: int | None, y2: int | None,
+               verbose: bool, since: Mapping[str, str] | None = None,
+               status: Dict[str, bool] | None = None,
+               on_event: Callback | None = None) -> List[Dict]:
+    results: List[Dict] = []
+    status = {} if status is None else status
+    for spec in specs:
+        status[spec.name] = False
+        if spec.missing_key():
+            print(f"[warn] {spec.label} skipped: {spec.api_key_env} not set", file=sys.stderr)
+            emit(on_event, "source_finished", source=spec.name, ok=False, count=0, latency=0.0,
+                 error=f"{spec.api_key_env} not set")
+            continue
         try:
-            if verbose: print("[info] Querying IEEE Xplore…", flush=True)
-            before = len(results)
-            results += search_ieee(topic, per_source, y1, y2)
-            if verbose: print(f"[info] IEEE returned {len(results)-before} items.", flush=True)
+            search = spec.load()
         except Exception as e:
-            print(f"[warn] IEEE Xplore error: {e}", file=sys.stderr)
-
-    if use_crossref:
+            print(f"[warn] {spec.label} unavailable: {e}", file=sys.stderr)
+            emit(on_event, "source_finished", source=spec.name, ok=False, count=0, latency=0.0, error=str(e))
+            continue
+        if spec.paid:
+            # paid sources run last; stop paging once they only repeat the free ones
+            covered = {_dedup_key(r) for r in results}
+            search = quota.guard(spec, search, covered=lambda r: _dedup_key(r) in covered)
+        emit(on_event, "source_started", source=spec.name, label=spec.label)
+        t0 = time.monotonic()
         try:
-            if verbose: print("[info] Querying Crossref…", flush=True)
+            if verbose: print(f"[info] Querying {spec.label}…", flush=True)
             before = len(results)
-            results += search_crossref(topic, per_source, y1, y2)
-            if verbose: print(f"[info] Crossref returned {len(results)-before} items.", flush=True)
+            extra = _since_kwargs(spec, since)
+            results += search(topic, per_source, y1, y2, **extra)
+            # a delta listing cut at per_source is incomplete: moving the watch mark past
+            # it would skip the records left unread for good
+            status[spec.name] = not extra or len(results) - before < per_source
+            if not status[spec.name]:
+                print(f"[warn] {spec.label}: delta listing reached --per-source {per_source}; "
+                      "watch mark kept (raise --per-source to catch up)", file=sys.stderr)
+            if verbose: print(f"[info] {spec.label} returned {len(results)-before} items.", flush=True)
+            emit(on_event, "source_finished", source=spec.name, ok=True, count=len(results) - before,
+                 latency=round(time.monotonic() - t0, 3))
         except Exception as e:
-            print(f"[warn] Crossref error: {e}", file=sys.stderr)
+            print(f"[warn] {spec.label} error: {e}", file=sys.stderr)
+            emit(on_event, "source_finished", source=spec.name, ok=False, count=0,
+                 latency=round(time.monotonic() - t0, 3), error=str(e))
+    return results
 
+def _normalize_and_dedup(results: List[Dict], on_event: Callback | None = None) -> List[Dict]:
     # normalize authors
     for r in results:
         r["authors"] = _normalize_authors(r.get("authors"))
 
-    # deduplicate
+    # deduplicate, by identifier cluster when the id map is on (see idmap.py)
+    ids = idmap()
+    keys = ids.dedup_keys(results) if ids is not None else [None] * len(results)
     seen, unique = set(), []
-    for r in results:
-        key = _dedup_key(r)
+    for r, key in zip(results, keys):
+        key = key or _dedup_key(r)
         if key in seen: 
+            emit(on_event, "item_deduped", key=key, source=r.get("source", ""), title=r.get("title", ""))
             continue
         seen.add(key); unique.append(r)
-
-    if verbose: print(f"[info] Unique after dedup: {len(unique)}", flush=True)
     return unique
 
+def _prepare_output(topic: str, outdir: str, incremental: bool, storage: str = "files",
+                    compact_json: bool = False,
+                    compression: str | None = None) -> Tuple[str, DirStore, str]:
+    base = os.path.join(outdir, slugify(topic))
+    ensure_dir(base)
+    store = open_store(base, storage, compact_json, compression)
+    draft_index = os.path.join(base, "index_draft.jsonl")
+    if incremental:
+        with open(draft_index, "w", encoding="utf-8") as _:
+            pass
+    return base, store, draft_index
+
+def _save_draft(store: DirStore, draft_index: str, it: Dict) -> None:
+    name = _paper_name(it)
+    store.put(name, it)
+    with open(draft_index, "a", encoding="utf-8") as idx:
+        idx.write(json.dumps(_index_row(it, name), ensure_ascii=False) + "\n")
+
+_RELEASE_KEYS = ("source_payload", "abstract")
+
+def _release(it: Dict) -> None:
+    """Drop the bulky fields of an item that is fully written."""
+    for k in _RELEASE_KEYS:
+        it.pop(k, None)
+
+class _Finalizer:
+    """
+    Streams scored items into the exports and ranks them for the index files without
+    keeping them all: a top-K heap with max_papers, otherwise papers are written at once
+    and only their index rows are kept (spilled to sorted runs past `spill_rows`).
+    With `release`, source_payload/abstract are dropped from items once written.
+    `compact_json` / `compression` apply to index.jsonl (and compact to the CSL export).
+    `saved`, if given, receives every item that makes it into the index.
+    """
+    def __init__(self, base: str, store: DirStore, min_score: float, max_papers: int | None,
+                 save_bibtex: bool, save_csl: bool, release: bool = False,
+                 spill_rows: int = 50_000, compact_json: bool = False,
+                 compression: str | None = None, on_event: Callback | None = None,
+                 saved: List[Dict] | None = None):
+        from .exporters import ExportStream
+        self.base, self.store = base, store
+        self.on_event, self.saved = on_event, saved
+        self.min_score, self.release = min_score, release
+        self.compression = compression
+        self.exports = ExportStream(os.path.join(base, "export.bib") if save_bibtex else None,
+                                    os.path.join(base, "export.csl.json") if save_csl else None,
+                                    compact=compact_json)
+        self.top = TopK(max_papers) if max_papers is not None else None
+        self.sorter = None if self.top else ExternalSorter(spill_rows, tmpdir=base)
+        self.seq = 0
+
+    def add(self, it: Dict, written: bool = False) -> None:
+        """`written`: the paper JSON is already on disk (incremental draft)."""
+        self.exports.write(it)
+        key = rank_key(it, self.seq)
+        self.seq += 1
+        if it["score"] < self.min_score:
+            done = it
+        elif self.top is not None:
+            done = self.top.push(key, it)
+        else:
+            name = _paper_name(it)
+            if not written:
+                self.store.put(name, it)
+            row = _index_row(it, name)
+            emit(self.on_event, "item_saved", **row)
+            if self.saved is not None:
+                self.saved.append(it)
+            self.sorter.add(key, row)
+            done = it
+        if done is not None and self.release:
+            _release(done)
+
+    def _ranked_rows(self) -> Iterable[Dict]:
+        if self.sorter is not None:
+            yield from self.sorter
+            return
+        for it in self.top.ranked():
+            name = _paper_name(it)
+            self.store.put(name, it)
+            if self.release:
+                _release(it)
+            row = _index_row(it, name)
+            emit(self.on_event, "item_saved", **row)
+            if self.saved is not None:
+                self.saved.append(it)
+            yield row
+
+    def finish(self, save_colindex: bool) -> int:
+        """Close the exports and write index.jsonl (+ index.col); returns the saved count."""
+        self.exports.close()
+        with open_out(os.path.join(self.base, "index.jsonl"), self.compression) as idx:
+            def rows():
+                for row in self._ranked_rows():
+                    idx.write(dumps(row, compact=True) + b"\n")
+                    yield row
+            if save_colindex:
+                return write_columnar_index(os.path.join(self.base, "index.col"), rows())
+            return sum(1 for _ in rows())
+
+def _finalize(base: str, store: DirStore, scored: Iterable[Dict], min_score: float,
+              max_papers: int | None, save_bibtex: bool, save_csl: bool,
+              save_colindex: bool, compact_json: bool = False,
+              compression: str | None = None, on_event: Callback | None = None,
+              written: Iterable[bool] | None = None) -> int:
+    """
+    Rank, write per-paper JSON + index files + exports; returns the saved count.
+    `written` flags, per scored item, papers already drafted to the store.
+    """
+    fin = _Finalizer(base, store, min_score, max_papers, save_bibtex, save_csl,
+                     compact_json=compact_json, compression=compression, on_event=on_event)
+    for it, w in zip(scored, written if written is not None else itertools.repeat(False)):
+        fin.add(it, written=w)
+    return fin.finish(save_colindex)
+
 def score_and_save(
                 topic: str,
                 items: List[Dict],
@@ -188,92 +300,82 @@ def score_and_save(
                 save_csl: bool = True,
                 incremental: bool = False,
                 verbose: bool = False,
+                save_colindex: bool = True,
+                llm: OllamaClient | None = None,
+                llm_batch: int = 1,
+                llm_context: int = 4096,
+                abstract_tokens: int | None = None,
+                llm_band: Tuple[float, float] | None = None,
+                llm_top_k: int | None = None,
+                llm_budget: int | None = None,
+                release: bool = False,
+                storage: str = "files",
+                compact_json: bool = False,
+                compression: str | None = None,
+                on_event: Callback | None = None,
+                keep_scores: bool = False,
+                saved: List[Dict] | None = None,
             ) -> tuple[str, int]:
+    """
+    Score items, write per-paper JSON, index files and exports under outdir/<topic-slug>.
+    Pass a ready `llm` client to reuse it across calls (otherwise one is built
+    from `ollama_model`). llm_batch > 1 packs that many abstracts per LLM prompt
+    within llm_context tokens. llm_band (lo, hi) / llm_top_k / llm_budget enable cascade
+    scoring: only uncertain or top-ranked items reach the LLM, under a call budget
+    (see scoring.score_items).
+    Ranking keeps a bounded number of items in memory (see _Finalizer); `release` also
+    drops source_payload/abstract from the caller's items once they are written.
+    `storage` selects the paper store: "files" (papers/<id>.json) or "pack" (see paperstore).
+    `compact_json` drops indentation and `compression` ("gzip"/"zstd") compresses the
+    per-paper files and index.jsonl (see serialize).
+    `on_event` receives item_scored / item_saved / run_finished events (see events.py).
+    With `keep_scores`, items that already carry a "score" (e.g. from the run cache, see
+    runcache.py) are not scored again. `saved`, if given, receives the items written to
+    the index (those that passed min_score / max_papers).
+    Returns (output directory, number of saved papers).
+    """
+    t0 = time.monotonic()
+    base, store, draft_index = _prepare_output(topic, outdir, incremental, storage,
+                                               compact_json, compression)
 
-    from .exporters import write_bibtex, write_csl_json
-
-    topic_slug = slugify(topic)
-    base = os.path.join(outdir, topic_slug)
-    papers_dir = os.path.join(base, "papers")
-    ensure_dir(papers_dir)
-
-    draft_index = os.path.join(base, "index_draft.jsonl")
-    final_index = os.path.join(base, "index.jsonl")
-    if incremental:
-        with open(draft_index, "w", encoding="utf-8") as _:
-            pass
-
-    llm = OllamaClient(model=ollama_model) if ollama_model else None
+    if llm is None and ollama_model:
+        llm = OllamaClient(model=ollama_model)
     if verbose:
         print(f"[info] Ollama {'enabled' if llm else 'disabled'}", flush=True)
 
-    scored = []
+    fin = _Finalizer(base, store, min_score, max_papers, save_bibtex, save_csl, release,
+                     compact_json=compact_json, compression=compression, on_event=on_event,
+                     saved=saved)
     saved = 0
-    for i, it in enumerate(items, 1):
-        abstract = it.get("abstract") or ""
-        title = it.get("title") or ""
-        s_base = simple_content_score(topic, abstract or title)
-        s_llm = llm.classify_relevance(topic, abstract) if (llm and abstract) else 0.0
-        it["score"] = max(s_base, s_llm)
-        scored.append(it)
-
+    calls_before = llm.calls if llm else 0
+    done = [keep_scores and "score" in it for it in items]
+    fresh = score_items(topic, [it for it, d in zip(items, done) if not d], llm,
+                        batch_size=llm_batch, context_tokens=llm_context,
+                        abstract_tokens=abstract_tokens, band=llm_band,
+                        top_k=llm_top_k, budget=llm_budget)
+    scored = (it if d else next(fresh) for it, d in zip(items, done))
+    for i, it in enumerate(scored, 1):
         if verbose and (i % 5 == 0 or i == len(items)):
             print(f"[info] Scored {i}/{len(items)}…", flush=True)
+        emit(on_event, "item_scored", n=i, total=len(items), id=_paper_name(it),
+             title=it.get("title", ""), source=it.get("source", ""), score=it["score"])
 
-        if incremental and it["score"] >= min_score:
-            anchor = it.get("doi") or it.get("arxiv_id") or it.get("openalex_id") or it.get("pubmed_id") or it.get("hal_docid") or it.get("title","")
-            name = safe_hash(str(anchor))
-            write_json(os.path.join(papers_dir, f"{name}.json"), it)
-            with open(draft_index, "a", encoding="utf-8") as idx:
-                idx.write(json.dumps({
-                    "id": name,
-                    "title": it.get("title",""),
-                    "year": it.get("year"),
-                    "doi": it.get("doi"),
-                    "arxiv_id": it.get("arxiv_id"),
-                    "openalex_id": it.get("openalex_id"),
-                    "pubmed_id": it.get("pubmed_id"),
-                    "hal_docid": it.get("hal_docid"),
-                    "score": it.get("score",0.0),
-                    "source": it.get("source",""),
-                    "url_page": it.get("url_page",""),
-                    "url_pdf": it.get("url_pdf",""),
-                }, ensure_ascii=False) + "\n")
+        drafted = incremental and it["score"] >= min_score
+        if drafted:
+            _save_draft(store, draft_index, it)
             saved += 1
             if verbose and (saved % 5 == 0):
                 print(f"[info] Incrementally saved {saved} items…", flush=True)
+        fin.add(it, written=drafted)
 
-    # final pass & index
-    filtered = [it for it in scored if it["score"] >= min_score]
-    filtered.sort(key=lambda x: (x.get("score",0), x.get("year") or 0), reverse=True)
-    if max_papers is not None:
-        filtered = filtered[:max_papers]
-
-    with open(final_index, "w", encoding="utf-8") as idx:
-        for it in filtered:
-            anchor = it.get("doi") or it.get("arxiv_id") or it.get("openalex_id") or it.get("pubmed_id") or it.get("hal_docid") or it.get("title","")
-            name = safe_hash(str(anchor))
-            write_json(os.path.join(papers_dir, f"{name}.json"), it)
-            idx.write(json.dumps({
-                "id": name,
-                "title": it.get("title",""),
-                "year": it.get("year"),
-                "doi": it.get("doi"),
-                "arxiv_id": it.get("arxiv_id"),
-                "openalex_id": it.get("openalex_id"),
-                "pubmed_id": it.get("pubmed_id"),
-                "hal_docid": it.get("hal_docid"),
-                "score": it.get("score",0.0),
-                "source": it.get("source",""),
-                "url_page": it.get("url_page",""),
-                "url_pdf": it.get("url_pdf",""),
-            }, ensure_ascii=False) + "\n")
+    if verbose and llm:
+        print(f"[info] LLM calls: {llm.calls - calls_before}", flush=True)
 
-    # Export formats
-    from .exporters import write_bibtex, write_csl_json
-    if save_bibtex:
-        write_bibtex(os.path.join(base, "export.bib"), scored)
-    if save_csl:
-        write_csl_json(os.path.join(base, "export.csl.json"), scored)
-
-    return base, len(filtered)
+    # final pass & index
+    if verbose and fin.sorter is not None and fin.sorter.spilled:
+        print(f"[info] Ranking spilled {fin.sorter.spilled} sorted run(s) to disk.", flush=True)
+    with store:
+        n = fin.finish(save_colindex)
+    emit(on_event, "run_finished", outbase=base, scored=len(items), saved=n,
+         elapsed=round(time.monotonic() - t0, 3))
+    return base, n
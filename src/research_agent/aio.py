@@ -0,0 +1,221 @@
+# Asyncio counterparts of collect() / score_and_save() for embedding in async services.
+# Sources still use blocking `requests` under the hood, so each source call runs in a
+# worker thread for the duration of its HTTP request; Ollama calls use
+# ollama.AsyncClient natively when the package is installed. Everything honours
+# task cancellation and optional timeouts.
+from __future__ import annotations
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import asyncio, sys, time
+
+from .agent import _dedup_key, _finalize, _normalize_and_dedup, _paper_name, _parse_years, _prepare_output, _save_draft
+from .events import Callback, emit
+from .scoring import base_score, plan_batches, select_for_llm
+from .sources.registry import resolve_sources
+from .utils import CallBudget, OllamaClient, truncate_to_tokens
+from . import quota
+
+async def _run_source(spec, topic: str, per_source: int, y1, y2,
+                      timeout: float | None, verbose: bool,
+                      on_event: Callback | None = None,
+                      covered: Optional[set] = None) -> List[Dict]:
+    if spec.missing_key():
+        print(f"[warn] {spec.label} skipped: {spec.api_key_env} not set", file=sys.stderr)
+        emit(on_event, "source_finished", source=spec.name, ok=False, count=0, latency=0.0,
+             error=f"{spec.api_key_env} not set")
+        return []
+    t0 = time.monotonic()
+    try:
+        search = await asyncio.to_thread(spec.load)
+        if spec.paid:
+            search = quota.guard(spec, search, covered=lambda r: _dedup_key(r) in (covered or ()))
+        if verbose: print(f"[info] Querying {spec.label}…", flush=True)
+        emit(on_event, "source_started", source=spec.name, label=spec.label)
+        t0 = time.monotonic()
+        out = await asyncio.wait_for(asyncio.to_thread(search, topic, per_source, y1, y2), timeout)
+        if verbose:
+            print(f"[info] {spec.label} returned {len(out)} items in {time.monotonic()-t0:.1f}s.", flush=True)
+        emit(on_event, "source_finished", source=spec.name, ok=True, count=len(out),
+             latency=round(time.monotonic() - t0, 3))
+        return out
+    except asyncio.TimeoutError:
+        print(f"[warn] {spec.label} timed out after {timeout}s", file=sys.stderr)
+        error = f"timed out after {timeout}s"
+    except Exception as e:
+        print(f"[warn] {spec.label} error: {e}", file=sys.stderr)
+        error = str(e)
+    emit(on_event, "source_finished", source=spec.name, ok=False, count=0,
+         latency=round(time.monotonic() - t0, 3), error=error)
+    return []
+
+async def acollect(topic: str, years: str | None, per_source: int,
+                   *, sources: Iterable[str] | None = None,
+                   source_timeout: float | None = None,
+                   on_event: Callback | None = None,
+                   verbose: bool = False, **toggles: bool) -> List[Dict]:
+    """
+    Async collect(): all selected sources are queried concurrently; a source that
+    exceeds `source_timeout` seconds is dropped with a warning. Paid sources follow, one
+    by one, through the quota manager. Results are merged in registry order, so dedup
+    picks the same winners as collect(). Each request runs in a worker thread: a timed-out
+    source is no longer awaited, but its thread (and HTTP request) runs on to completion.
+    """
+    bad = [k for k in toggles if not k.startswith("use_")]
+    if bad:
+        raise TypeError(f"acollect() got unexpected keyword argument(s): {', '.join(bad)}")
+    y1, y2 = _parse_years(years)
+    specs = resolve_sources(sources, toggles)
+    batches = await asyncio.gather(*[
+        _run_source(spec, topic, per_source, y1, y2, source_timeout, verbose, on_event)
+        for spec in specs if not spec.paid
+    ])
+    results: List[Dict] = [r for batch in batches for r in batch]
+    # paid sources run last, through the quota manager; they stop paging once they only
+    # repeat the free ones (see quota.py)
+    covered = {_dedup_key(r) for r in results}
+    for spec in specs:
+        if spec.paid:
+            batch = await _run_source(spec, topic, per_source, y1, y2, source_timeout, verbose,
+                                      on_event, covered)
+            covered.update(_dedup_key(r) for r in batch)
+            results += batch
+    unique = _normalize_and_dedup(results, on_event)
+    if verbose: print(f"[info] Unique after dedup: {len(unique)}", flush=True)
+    return unique
+
+async def ascore_iter(topic: str, items: List[Dict], ollama_model: str | None = None,
+                      *, concurrency: int = 4, item_timeout: float | None = None,
+                      llm: Optional[OllamaClient] = None, llm_batch: int = 1,
+                      llm_context: int = 4096,
+                      abstract_tokens: int | None = None,
+                      llm_band: Tuple[float, float] | None = None,
+                      llm_top_k: int | None = None,
+                      llm_budget: int | None = None) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Score items concurrently (at most `concurrency` LLM requests in flight) and yield
+    (position, item) pairs in completion order. An LLM request exceeding `item_timeout`
+    keeps the deterministic scores. llm_batch > 1 packs abstracts into shared prompts
+    and llm_band / llm_top_k / llm_budget select cascade mode, as in score_and_save.
+    Closing the iterator cancels outstanding work. Without the ollama package, requests
+    run in worker threads that a timeout or cancellation cannot stop: their HTTP calls
+    finish in the background (the result is discarded).
+    """
+    if llm is None and ollama_model:
+        llm = OllamaClient(model=ollama_model)
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    only = None
+    if llm is not None and (llm_band is not None or llm_top_k is not None or llm_budget is not None):
+        max_items = llm_budget * max(1, llm_batch) if llm_budget is not None else None
+        only = set(select_for_llm(topic, items, llm_band, llm_top_k, max_items))
+    if llm is None:
+        groups: List[List[int]] = []
+    elif llm_batch > 1:
+        groups = plan_batches(topic, items, llm_batch, llm_context, abstract_tokens, only)
+    else:
+        groups = [[i] for i, it in enumerate(items)
+                  if it.get("abstract") and (only is None or i in only)]
+    in_group = {i for g in groups for i in g}
+    calls = CallBudget(max(0, llm_budget)) if llm_budget is not None else None
+
+    def finish(pos: int, s_llm: float) -> Tuple[int, Dict]:
+        it = items[pos]
+        it["score"] = max(base_score(topic, it), s_llm)
+        return pos, it
+
+    async def run(group: List[int]) -> List[Tuple[int, Dict]]:
+        texts = [items[i]["abstract"] for i in group]
+        if llm_batch > 1:
+            texts = [truncate_to_tokens(t, abstract_tokens) for t in texts]
+        async with sem:
+            try:
+                if len(group) == 1:
+                    vals = [await asyncio.wait_for(llm.aclassify_relevance(topic, texts[0], calls), item_timeout)]
+                else:
+                    vals = await asyncio.wait_for(llm.aclassify_batch(topic, texts, llm_context, calls), item_timeout)
+            except asyncio.TimeoutError:
+                vals = [0.0] * len(group)
+        return [finish(i, v) for i, v in zip(group, vals)]
+
+    for pos in range(len(items)):
+        if pos not in in_group:
+            yield finish(pos, 0.0)
+
+    tasks = [asyncio.ensure_future(run(g)) for g in groups]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            for pair in await fut:
+                yield pair
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def ascore_and_save(
+                topic: str,
+                items: List[Dict],
+                outdir: str,
+                ollama_model: str | None,
+                min_score: float = 0.0,
+                max_papers: int | None = None,
+                save_bibtex: bool = True,
+                save_csl: bool = True,
+                incremental: bool = False,
+                verbose: bool = False,
+                save_colindex: bool = True,
+                *,
+                concurrency: int = 4,
+                item_timeout: float | None = None,
+                timeout: float | None = None,
+                llm: Optional[OllamaClient] = None,
+                llm_batch: int = 1,
+                llm_context: int = 4096,
+                abstract_tokens: int | None = None,
+                llm_band: Tuple[float, float] | None = None,
+                llm_top_k: int | None = None,
+                llm_budget: int | None = None,
+                storage: str = "files",
+                compact_json: bool = False,
+                compression: str | None = None,
+                on_event: Callback | None = None,
+            ) -> tuple[str, int]:
+    """
+    Async score_and_save(): same outputs, with file writes off the event loop.
+    `timeout` bounds the whole call (asyncio.TimeoutError); see ascore_iter for the rest.
+    As there, LLM requests and file writes already running in worker threads are not
+    interrupted by a timeout: they finish in the background.
+    item_saved events of `on_event` are emitted from a worker thread.
+    """
+    async def run() -> tuple[str, int]:
+        t0 = time.monotonic()
+        base, store, draft_index = await asyncio.to_thread(
+            _prepare_output, topic, outdir, incremental, storage, compact_json, compression)
+        scored: List[Optional[Dict]] = [None] * len(items)
+        drafted = [False] * len(items)
+        done = saved = 0
+        async for pos, it in ascore_iter(topic, items, ollama_model,
+                                         concurrency=concurrency, item_timeout=item_timeout,
+                                         llm=llm, llm_batch=llm_batch, llm_context=llm_context,
+                                         abstract_tokens=abstract_tokens, llm_band=llm_band,
+                                         llm_top_k=llm_top_k, llm_budget=llm_budget):
+            scored[pos] = it
+            done += 1
+            if verbose and (done % 5 == 0 or done == len(items)):
+                print(f"[info] Scored {done}/{len(items)}…", flush=True)
+            emit(on_event, "item_scored", n=done, total=len(items), id=_paper_name(it),
+                 title=it.get("title", ""), source=it.get("source", ""), score=it["score"])
+            if incremental and it["score"] >= min_score:
+                await asyncio.to_thread(_save_draft, store, draft_index, it)
+                drafted[pos] = True
+                saved += 1
+        # keep input order so ranking ties and exports match score_and_save()
+        with store:
+            n = await asyncio.to_thread(_finalize, base, store, [it for it in scored if it],
+                                        min_score, max_papers, save_bibtex, save_csl, save_colindex,
+                                        compact_json, compression, on_event,
+                                        [d for it, d in zip(scored, drafted) if it])
+        emit(on_event, "run_finished", outbase=base, scored=len(items), saved=n,
+             elapsed=round(time.monotonic() - t0, 3))
+        return base, n
+
+    return await asyncio.wait_for(run(), timeout)
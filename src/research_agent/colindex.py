@@ -0,0 +1,193 @@
+# Columnar companion to index.jsonl: fixed-width score/year/source arrays plus
+# offset tables into the id/title strings, laid out so the file can be mmap'ed
+# and filtered without any JSON parsing (Python here, or the VS Code front-end).
+#
+# Layout (little-endian, every section 8-byte aligned):
+#   header   "<8sII" magic, version, count  + 9 x u64 section offsets:
+#            sources, scores, years, codes, id_offsets, ids, title_offsets, titles, end
+#   sources  UTF-8 source names joined by "\n" (code i -> i-th name)
+#   scores   float32[count]
+#   years    int16[count]   (0 = unknown)
+#   codes    uint8[count]   (index into sources)
+#   id_offsets / title_offsets  uint64[count + 1] into the ids / titles blobs
+#   ids / titles  UTF-8 blobs
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Sequence
+import array, mmap, struct, sys
+
+MAGIC = b"RAIDXCOL"
+VERSION = 1
+_HEADER = struct.Struct("<8sII9Q")
+
+def _pad(n: int) -> int:
+    return (-n) % 8
+
+def _le(arr: array.array) -> bytes:
+    if sys.byteorder != "little":
+        arr = array.array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+def write_columnar_index(path: str, rows: Iterable[Dict]) -> int:
+    """
+    Write the columnar index for index rows (dicts with id/title/year/score/source).
+    Returns the number of rows written.
+    """
+    sources: List[str] = []
+    codes_of: Dict[str, int] = {}
+    scores, years, codes = array.array("f"), array.array("h"), array.array("B")
+    id_offs, title_offs = array.array("Q", [0]), array.array("Q", [0])
+    ids, titles = bytearray(), bytearray()
+    for r in rows:
+        src = str(r.get("source") or "")
+        if src not in codes_of:
+            if len(sources) >= 255:
+                raise ValueError("columnar index supports at most 255 distinct sources")
+            codes_of[src] = len(sources)
+            sources.append(src)
+        scores.append(float(r.get("score") or 0.0))
+        y = r.get("year")
+        years.append(int(y) if isinstance(y, int) and -32768 <= y <= 32767 else 0)
+        codes.append(codes_of[src])
+        ids += str(r.get("id") or "").encode("utf-8")
+        titles += str(r.get("title") or "").encode("utf-8")
+        id_offs.append(len(ids))
+        title_offs.append(len(titles))
+
+    sections = [
+        "\n".join(sources).encode("utf-8"),
+        _le(scores), _le(years), _le(codes),
+        _le(id_offs), bytes(ids), _le(title_offs), bytes(titles),
+    ]
+    offsets, pos = [], _HEADER.size + _pad(_HEADER.size)
+    for sec in sections:
+        offsets.append(pos)
+        pos += len(sec) + _pad(len(sec))
+    offsets.append(pos)
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(scores), *offsets))
+        f.write(b"\0" * _pad(_HEADER.size))
+        for sec in sections:
+            f.write(sec)
+            f.write(b"\0" * _pad(len(sec)))
+    return len(scores)
+
+class ColumnarIndex:
+    """
+    Read-only, memory-mapped view of an `index.col` file.
+    Column accessors return memoryviews (zero-copy on little-endian hosts).
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file cannot be mapped
+            self._f.close()
+            raise ValueError(f"{path}: not a columnar index")
+        if len(self._mm) < _HEADER.size:  # truncated: no room for the header
+            self.close()
+            raise ValueError(f"{path}: not a columnar index")
+        buf = memoryview(self._mm)
+        magic, version, count, *offs = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION:
+            buf.release()
+            self.close()
+            raise ValueError(f"{path}: not a columnar index (version {VERSION})")
+        self._buf = buf
+        self._count = count
+        src_o, sc_o, yr_o, cd_o, ido_o, ids_o, tio_o, tis_o, end_o = offs
+        self.sources: List[str] = (
+            bytes(buf[src_o:sc_o]).rstrip(b"\0").decode("utf-8").split("\n") if count else []
+        )
+        self.scores = self._column(sc_o, "f", count)
+        self.years = self._column(yr_o, "h", count)
+        self.codes = self._column(cd_o, "B", count)
+        self._id_offs = self._column(ido_o, "Q", count + 1)
+        self._title_offs = self._column(tio_o, "Q", count + 1)
+        self._ids = buf[ids_o:tio_o]
+        self._titles = buf[tis_o:end_o]
+
+    def _column(self, start: int, typecode: str, n: int):
+        size = array.array(typecode).itemsize
+        view = self._buf[start:start + n * size]
+        if sys.byteorder == "little":
+            return view.cast(typecode)
+        arr = array.array(typecode, view.tobytes())
+        arr.byteswap()
+        return arr
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self) -> "ColumnarIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for name in ("scores", "years", "codes", "_id_offs", "_title_offs", "_ids", "_titles", "_buf"):
+            view = self.__dict__.pop(name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._f.close()
+
+    def id(self, i: int) -> str:
+        return bytes(self._ids[self._id_offs[i]:self._id_offs[i + 1]]).decode("utf-8")
+
+    def title(self, i: int) -> str:
+        return bytes(self._titles[self._title_offs[i]:self._title_offs[i + 1]]).decode("utf-8")
+
+    def source(self, i: int) -> str:
+        return self.sources[self.codes[i]]
+
+    def year(self, i: int) -> Optional[int]:
+        return self.years[i] or None
+
+    def row(self, i: int) -> Dict:
+        return {"id": self.id(i), "title": self.title(i), "year": self.year(i),
+                "score": self.scores[i], "source": self.source(i)}
+
+    def filter(self, min_score: float | None = None, year_from: int | None = None,
+               year_to: int | None = None, sources: Sequence[str] | None = None) -> List[int]:
+        """Row numbers matching all given constraints (unknown years never match a year bound)."""
+        keep_codes = None
+        if sources is not None:
+            keep_codes = {c for c, s in enumerate(self.sources) if s in set(sources)}
+        scores, years, codes = self.scores, self.years, self.codes
+        if min_score is not None:
+            # scores are stored as float32: compare against the same rounding
+            min_score = struct.unpack("<f", struct.pack("<f", min_score))[0]
+        out: List[int] = []
+        for i in range(self._count):
+            if min_score is not None and scores[i] < min_score:
+                continue
+            y = years[i]
+            if year_from is not None and (not y or y < year_from):
+                continue
+            if year_to is not None and (not y or y > year_to):
+                continue
+            if keep_codes is not None and codes[i] not in keep_codes:
+                continue
+            out.append(i)
+        return out
+
+    def top(self, k: int | None = None, rows: Sequence[int] | None = None,
+            by: str = "score") -> List[int]:
+        """Row numbers sorted by score (ties: year) or by year (ties: score), descending."""
+        rows = range(self._count) if rows is None else rows
+        scores, years = self.scores, self.years
+        if by == "year":
+            key = lambda i: (years[i], scores[i])
+        else:
+            key = lambda i: (scores[i], years[i])
+        ordered = sorted(rows, key=key, reverse=True)
+        return ordered if k is None else ordered[:k]
+
+def open_columnar_index(path: str) -> ColumnarIndex:
+    return ColumnarIndex(path)
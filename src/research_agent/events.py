@@ -0,0 +1,35 @@
+# Machine-readable progress for front-ends: collect() / score_and_save() (and their
+# async twins) accept an `on_event` callback that receives one dict per event, with
+# "event" (see EVENTS) and "t" (epoch seconds) plus event-specific fields:
+#   source_started   source, label, offset (adaptive pages)
+#   source_finished  source, ok, count, latency (seconds), error (when not ok)
+#   item_deduped     key, source, title     (a duplicate dropped in favour of an earlier record)
+#   item_scored      n, total, id, title, source, score
+#   item_saved       index row: id, title, year, doi, ..., score, source, url_page, url_pdf
+#   run_finished     outbase, scored, saved, elapsed (seconds)
+# `jsonl_writer()` turns the stream into JSON lines (cli.py --events).
+from __future__ import annotations
+from typing import Callable, Dict, IO, Optional
+import sys, threading, time
+
+EVENTS = ("source_started", "source_finished", "item_deduped", "item_scored", "item_saved",
+          "run_finished")
+
+Callback = Callable[[Dict], None]
+
+def emit(on_event: Optional[Callback], event: str, **fields) -> None:
+    if on_event is not None:
+        on_event({"event": event, "t": round(time.time(), 3), **fields})
+
+def jsonl_writer(stream: IO[str] | None = None) -> Callback:
+    """Callback writing each event as one JSON line (flushed, safe across threads)."""
+    from .serialize import dumps
+    lock = threading.Lock()
+
+    def write(ev: Dict) -> None:
+        out = stream or sys.stdout
+        line = dumps(ev, compact=True).decode("utf-8") + "\n"
+        with lock:
+            out.write(line)
+            out.flush()
+    return write
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from typing import Dict, List
-import re, json, hashlib
+import re, hashlib
 
 # ---------- Helpers ----------
 def _tex_escape(s: str) -> str:
@@ -62,63 +62,105 @@ def _key_from(item: Dict) -> str:
 
 # ---------- BibTeX ----------
 def to_bibtex_entries(items: List[Dict]) -> str:
+    return "\n".join(_bibtex_entry(it) for it in items)
+
+def _bibtex_entry(it: Dict) -> str:
     lines: List[str] = []
-    for it in items:
-        entry_type = "article"
-        key = _key_from(it)
-        title = _tex_escape(it.get("title", ""))
-        year = it.get("year")
-        doi = it.get("doi") or ""
-        venue = it.get("venue") or ""
-        url = it.get("url_page") or it.get("url_pdf") or ""
-
-        authors = _as_author_strings(it.get("authors"))
-        authors_field = " and ".join(_tex_escape(a) for a in authors)
-
-        lines.append(f"@{entry_type}{{{key},")
-        if title:   lines.append(f"  title = {{{title}}},")
-        if authors_field: lines.append(f"  author = {{{authors_field}}},")
-        if venue:   lines.append(f"  journal = {{{_tex_escape(venue)}}},")
-        if year:    lines.append(f"  year = {{{year}}},")
-        if doi:     lines.append(f"  doi = {{{doi}}},")
-        if url:     lines.append(f"  url = {{{_tex_escape(url)}}},")
-        lines.append("}\n")
+    entry_type = "article"
+    key = _key_from(it)
+    title = _tex_escape(it.get("title", ""))
+    year = it.get("year")
+    doi = it.get("doi") or ""
+    venue = it.get("venue") or ""
+    url = it.get("url_page") or it.get("url_pdf") or ""
+
+    authors = _as_author_strings(it.get("authors"))
+    authors_field = " and ".join(_tex_escape(a) for a in authors)
+
+    lines.append(f"@{entry_type}{{{key},")
+    if title:   lines.append(f"  title = {{{title}}},")
+    if authors_field: lines.append(f"  author = {{{authors_field}}},")
+    if venue:   lines.append(f"  journal = {{{_tex_escape(venue)}}},")
+    if year:    lines.append(f"  year = {{{year}}},")
+    if doi:     lines.append(f"  doi = {{{doi}}},")
+    if url:     lines.append(f"  url = {{{_tex_escape(url)}}},")
+    lines.append("}\n")
     return "\n".join(lines)
 
 # ---------- CSL-JSON ----------
 def to_csl_json_list(items: List[Dict]) -> List[Dict]:
-    out: List[Dict] = []
-    for it in items:
-        author_names = _as_author_strings(it.get("authors"))
-        authors = []
-        for a in author_names:
-            parts = a.split()
-            if len(parts) >= 2:
-                given = " ".join(parts[:-1])
-                family = parts[-1]
-            else:
-                given, family = a, ""
-            authors.append({"given": given, "family": family})
-
-        ent = {
-            "type": "article-journal",
-            "title": it.get("title", ""),
-            "author": authors,
-            "issued": {"date-parts": [[it.get("year")]]} if it.get("year") else None,
-            "DOI": it.get("doi") or None,
-            "URL": it.get("url_page") or it.get("url_pdf") or None,
-            "container-title": it.get("venue") or None,
-            "id": _key_from(it),
-        }
-        # remove Nones
-        ent = {k: v for k, v in ent.items() if v not in (None, "", [])}
-        out.append(ent)
-    return out
+    return [_csl_entry(it) for it in items]
+
+def _csl_entry(it: Dict) -> Dict:
+    author_names = _as_author_strings(it.get("authors"))
+    authors = []
+    for a in author_names:
+        parts = a.split()
+        if len(parts) >= 2:
+            given = " ".join(parts[:-1])
+            family = parts[-1]
+        else:
+            given, family = a, ""
+        authors.append({"given": given, "family": family})
+
+    ent = {
+        "type": "article-journal",
+        "title": it.get("title", ""),
+        "author": authors,
+        "issued": {"date-parts": [[it.get("year")]]} if it.get("year") else None,
+        "DOI": it.get("doi") or None,
+        "URL": it.get("url_page") or it.get("url_pdf") or None,
+        "container-title": it.get("venue") or None,
+        "id": _key_from(it),
+    }
+    # remove Nones
+    return {k: v for k, v in ent.items() if v not in (None, "", [])}
 
 def write_bibtex(path: str, items: List[Dict]) -> None:
     with open(path, "w", encoding="utf-8") as f:
         f.write(to_bibtex_entries(items))
 
-def write_csl_json(path: str, items: List[Dict]) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(to_csl_json_list(items), f, ensure_ascii=False, indent=2)
+def write_csl_json(path: str, items: List[Dict], compact: bool = False) -> None:
+    from .serialize import write_json
+    write_json(path, to_csl_json_list(items), compact)
+
+# ---------- Streaming ----------
+class ExportStream:
+    """
+    Append items to export.bib / export.csl.json one at a time (same content as
+    write_bibtex / write_csl_json over the whole list), so exports need no item list.
+    """
+    def __init__(self, bib_path: str | None = None, csl_path: str | None = None,
+                 compact: bool = False):
+        from .serialize import dumps
+        self._dumps = dumps
+        self.compact = compact
+        self._bib = open(bib_path, "w", encoding="utf-8") if bib_path else None
+        self._csl = open(csl_path, "w", encoding="utf-8") if csl_path else None
+        self.count = 0
+
+    def write(self, it: Dict) -> None:
+        if self._bib:
+            self._bib.write(("\n" if self.count else "") + _bibtex_entry(it))
+        if self._csl:
+            ent = self._dumps(_csl_entry(it), self.compact).decode("utf-8")
+            if self.compact:
+                self._csl.write(("," if self.count else "[") + ent)
+            else:
+                self._csl.write(("," if self.count else "[") + "\n  " + ent.replace("\n", "\n  "))
+        self.count += 1
+
+    def close(self) -> None:
+        if self._bib:
+            self._bib.close()
+            self._bib = None
+        if self._csl:
+            self._csl.write("\n]" if self.count and not self.compact else "]" if self.count else "[]")
+            self._csl.close()
+            self._csl = None
+
+    def __enter__(self) -> "ExportStream":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
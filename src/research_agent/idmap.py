@@ -0,0 +1,179 @@
+# Persistent cross-source identifier map: DOI, arXiv id, PMID, OpenAlex W-id and HAL
+# docid of the same work are linked into one cluster in idmap.sqlite under the cache dir.
+# Links are learned from every record that carries more than one id, including the
+# payloads that list them: OpenAlex `ids` (and arXiv landing pages in `locations`),
+# PubMed `articleids`, arXiv DOIs 10.48550/arXiv.<id>. Dedup then keys records by cluster,
+# so an arXiv-only record meets the Crossref DOI record or the PubMed PMID record of the
+# same paper, within a run or across runs.
+# Set RESEARCH_AGENT_IDMAP=off (cli.py --no-idmap) to dedup on record fields only.
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional
+import os, re, sqlite3, threading
+
+from .utils import cache_dir
+
+ID_FIELDS = ("doi", "arxiv_id", "pubmed_id", "openalex_id", "hal_docid")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ids (key TEXT PRIMARY KEY, cid INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS ids_cid ON ids (cid);
+"""
+
+def normalize(kind: str, value) -> Optional[str]:
+    """Canonical form of one identifier (None when empty/unusable)."""
+    v = str(value or "").strip()
+    if not v:
+        return None
+    if kind == "doi":
+        v = re.sub(r"^(https?://(dx\.)?doi\.org/|doi:)", "", v, flags=re.I).lower()
+        return v if v.startswith("10.") else None
+    if kind == "arxiv_id":
+        v = re.sub(r"^(arxiv:|https?://(export\.)?arxiv\.org/(abs|pdf)/)", "", v, flags=re.I)
+        return re.sub(r"v\d+$", "", v.removesuffix(".pdf")).lower() or None
+    if kind == "pubmed_id":
+        m = re.search(r"(\d+)/?$", v)
+        return m.group(1) if m else None
+    if kind == "openalex_id":
+        return v.rsplit("/", 1)[-1].upper()
+    return v.lower()
+
+def id_keys(rec: Dict) -> List[str]:
+    """Every "<kind>:<id>" key of a record: its own fields plus ids listed in its payload."""
+    found: Dict[str, None] = {}
+
+    def add(kind: str, value) -> None:
+        v = normalize(kind, value)
+        if v:
+            found[f"{kind}:{v}"] = None
+            if kind == "doi" and v.startswith("10.48550/arxiv."):
+                add("arxiv_id", v[len("10.48550/arxiv."):])
+
+    for k in ID_FIELDS:
+        add(k, rec.get(k))
+    p = rec.get("source_payload") or {}
+    if isinstance(p, dict):
+        ids = p.get("ids")
+        if isinstance(ids, dict):  # OpenAlex work
+            add("openalex_id", ids.get("openalex"))
+            add("doi", ids.get("doi"))
+            add("pubmed_id", ids.get("pmid"))
+        for loc in p.get("locations") or []:
+            url = (loc or {}).get("landing_page_url") or ""
+            if "arxiv.org/abs/" in url:
+                add("arxiv_id", url)
+        for aid in p.get("articleids") or []:  # PubMed esummary
+            kind = {"doi": "doi", "pubmed": "pubmed_id"}.get((aid or {}).get("idtype"))
+            if kind:
+                add(kind, aid.get("value"))
+    return list(found)
+
+def _field_value(key: str) -> tuple:
+    kind, _, v = key.partition(":")
+    return kind, ("https://openalex.org/" + v if kind == "openalex_id" else v)
+
+class IdMap:
+    """Clusters of linked identifier keys (a persisted union-find)."""
+    def __init__(self, path: str | None = None, wal: bool = True):
+        self.path = path or cache_dir("idmap.sqlite")
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        # WAL needs shared memory, so a map on a network filesystem keeps the rollback journal
+        self.conn.execute("PRAGMA journal_mode=" + ("WAL" if wal else "DELETE"))
+        self.conn.executescript(SCHEMA)
+
+    def _select(self, sql: str, values: List) -> List[tuple]:
+        """SELECT ... IN ({}) over `values`, in chunks below SQLite's parameter limit."""
+        rows: List[tuple] = []
+        for i in range(0, len(values), 500):
+            chunk = values[i:i + 500]
+            rows += self.conn.execute(sql.format(",".join("?" * len(chunk))), chunk).fetchall()
+        return rows
+
+    def learn(self, groups: Iterable[List[str]]) -> Dict[str, int]:
+        """Link the keys of each group (merging clusters as needed); returns key -> cluster."""
+        groups = [g for g in groups if g]
+        parent: Dict[str, str] = {}
+
+        def find(k: str) -> str:
+            while parent[k] != k:
+                parent[k] = parent[parent[k]]
+                k = parent[k]
+            return k
+
+        for g in groups:
+            for k in g:
+                parent.setdefault(k, k)
+            for k in g[1:]:
+                parent[find(k)] = find(g[0])
+        comps: Dict[str, List[str]] = {}
+        for k in parent:
+            comps.setdefault(find(k), []).append(k)
+
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                known = dict(self._select("SELECT key, cid FROM ids WHERE key IN ({})", list(parent)))
+                next_cid = (self.conn.execute("SELECT MAX(cid) FROM ids").fetchone()[0] or 0) + 1
+                out: Dict[str, int] = {}
+                for keys in comps.values():
+                    cids = sorted({known[k] for k in keys if k in known})
+                    if cids:
+                        cid = cids[0]
+                        for other in cids[1:]:  # the group bridges clusters: merge them
+                            self.conn.execute("UPDATE ids SET cid = ? WHERE cid = ?", (cid, other))
+                    else:
+                        cid, next_cid = next_cid, next_cid + 1
+                    new = [k for k in keys if known.get(k) != cid]
+                    self.conn.executemany("INSERT OR REPLACE INTO ids VALUES (?, ?)", [(k, cid) for k in new])
+                    out.update((k, cid) for k in keys)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return out
+
+    def members(self, cids: Iterable[int]) -> Dict[int, List[str]]:
+        out: Dict[int, List[str]] = {}
+        with self._lock:
+            for key, cid in self._select("SELECT key, cid FROM ids WHERE cid IN ({})", sorted(set(cids))):
+                out.setdefault(cid, []).append(key)
+        return out
+
+    def dedup_keys(self, records: List[Dict], fill: bool = True) -> List[Optional[str]]:
+        """
+        Dedup key per record ("work:<cluster>", None for records without any id), after
+        learning their links. With `fill`, missing id fields are completed
+        from the cluster (so the same work keeps the same DOI-based file name).
+        """
+        per = [id_keys(r) for r in records]
+        cid_of = self.learn(per)
+        if fill:
+            members = self.members(cid_of[ks[0]] for ks in per if ks)
+            for r, ks in zip(records, per):
+                if ks:
+                    for key in sorted(members.get(cid_of[ks[0]], [])):
+                        kind, value = _field_value(key)
+                        if not r.get(kind):
+                            r[kind] = value
+        return [f"work:{cid_of[ks[0]]}" if ks else None for ks in per]
+
+    def close(self) -> None:
+        self.conn.close()
+
+_idmap: Optional[IdMap] = None
+_init_lock = threading.Lock()
+
+def idmap_enabled() -> bool:
+    """False when the map is disabled via RESEARCH_AGENT_IDMAP=off."""
+    return os.getenv("RESEARCH_AGENT_IDMAP", "").lower() not in ("0", "off", "false", "no")
+
+def idmap() -> Optional[IdMap]:
+    """The process-wide map, or None when disabled via RESEARCH_AGENT_IDMAP=off."""
+    global _idmap
+    if not idmap_enabled():
+        return None
+    if _idmap is None:
+        with _init_lock:
+            if _idmap is None:
+                _idmap = IdMap()
+    return _idmap
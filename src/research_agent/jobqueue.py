@@ -0,0 +1,332 @@
+# Durable job queue in one SQLite file: a search job is split into one fetch task per
+# source, then scoring tasks over chunks of the deduplicated items, then a finalize task
+# that writes the usual results directory. Any number of worker processes (on hosts
+# sharing a filesystem with working POSIX locks) claim tasks under a renewable lease;
+# expired leases are re-claimed, failures retried with backoff, and every result write
+# is an upsert keyed by job and paper, so a task that runs twice changes nothing.
+# The queue keeps SQLite's rollback journal: WAL relies on shared memory that only works
+# between processes of one host, so it is opt-in (RESEARCH_AGENT_QUEUE_WAL=1, set for
+# every process) for queues whose workers all run on one machine. NFS
+# and similar filesystems whose locks are unreliable are not supported either way.
+# Dedup keys come from an identifier map beside the queue file (<queue>.idmap), shared by
+# all workers, rather than from each host's own map under the cache dir.
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+import json, os, socket, sqlite3, sys, threading, time, uuid
+
+from .agent import _dedup_key, _Finalizer, _normalize_authors, _parse_years, _prepare_output
+from . import quota
+from .idmap import IdMap, idmap_enabled
+from .scoring import base_score, score_items
+from .sources.registry import get_source, resolve_sources
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY, topic TEXT NOT NULL, params TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'fetching', created REAL NOT NULL, outbase TEXT
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY, job_id INTEGER NOT NULL, kind TEXT NOT NULL,
+    key TEXT NOT NULL UNIQUE, payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL, not_before REAL NOT NULL DEFAULT 0,
+    owner TEXT, lease_until REAL, error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (state, not_before);
+CREATE TABLE IF NOT EXISTS items (
+    job_id INTEGER NOT NULL, key TEXT NOT NULL, rank INTEGER NOT NULL, body TEXT NOT NULL,
+    score REAL, PRIMARY KEY (job_id, key)
+);
+"""
+
+# finalize before score before fetch: finish started jobs before opening new ones
+_KIND_ORDER = "CASE kind WHEN 'finalize' THEN 0 WHEN 'score' THEN 1 ELSE 2 END"
+
+def _wal() -> bool:
+    return os.getenv("RESEARCH_AGENT_QUEUE_WAL", "").lower() in ("1", "on", "true", "yes")
+
+def connect(path: str) -> sqlite3.Connection:
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=" + ("WAL" if _wal() else "DELETE"))
+    conn.executescript(SCHEMA)
+    return conn
+
+@contextmanager
+def _tx(conn: sqlite3.Connection):
+    """Write transaction (taken up front, so concurrent workers queue instead of failing)."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+def _add_task(conn: sqlite3.Connection, job_id: int, kind: str, key: str,
+              payload: Dict, max_attempts: int) -> None:
+    conn.execute("INSERT OR IGNORE INTO tasks (job_id, kind, key, payload, max_attempts) VALUES (?, ?, ?, ?, ?)",
+                 (job_id, kind, key, json.dumps(payload), max_attempts))
+
+def submit(path: str, topic: str, *, years: str | None = None, per_source: int = 50,
+           sources: Iterable[str] | None = None, toggles: Dict[str, bool] | None = None,
+           outdir: str = "results", chunk: int = 50, max_attempts: int = 3,
+           **score_kwargs) -> int:
+    """
+    Queue a search; returns the job id. score_kwargs are score_and_save() options
+    (ollama_model, min_score, max_papers, llm_*, save_*, storage); cascade options
+    apply per scoring task of `chunk` items.
+    """
+    specs = resolve_sources(sources, toggles)
+    # paid sources are fetched once the free ones are done (see Worker._advance)
+    paid = [[s.name, rank] for rank, s in enumerate(specs) if s.paid and not all(x.paid for x in specs)]
+    params = {"years": years, "per_source": per_source, "outdir": outdir, "chunk": chunk,
+              "max_attempts": max_attempts, "paid": paid, "score": score_kwargs}
+    conn = connect(path)
+    try:
+        with _tx(conn):
+            job_id = conn.execute("INSERT INTO jobs (topic, params, created) VALUES (?, ?, ?)",
+                                  (topic, json.dumps(params), time.time())).lastrowid
+            for rank, spec in enumerate(specs):
+                if not spec.paid or all(s.paid for s in specs):
+                    _add_task(conn, job_id, "fetch", f"{job_id}:fetch:{spec.name}",
+                              {"source": spec.name, "rank": rank}, max_attempts)
+    finally:
+        conn.close()
+    return job_id
+
+def status(path: str) -> List[Dict]:
+    """Per job: state and task counts by kind/state."""
+    conn = connect(path)
+    try:
+        out = []
+        for job in conn.execute("SELECT id, topic, state, outbase FROM jobs ORDER BY id"):
+            counts = {f"{r['kind']}:{r['state']}": r["n"] for r in conn.execute(
+                "SELECT kind, state, COUNT(*) AS n FROM tasks WHERE job_id = ? GROUP BY kind, state", (job["id"],))}
+            out.append({**dict(job), "tasks": counts})
+        return out
+    finally:
+        conn.close()
+
+class Worker:
+    """Claims and runs tasks from the queue at `path` until it is drained (or forever)."""
+    def __init__(self, path: str, worker_id: str | None = None, lease: float = 300.0,
+                 retry_delay: float = 5.0, verbose: bool = False):
+        self.path = path
+        self.retry_delay = retry_delay  # doubled per attempt
+        self.id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.lease = lease
+        self.verbose = verbose
+        self.conn = connect(path)
+        self._llms: Dict[str, object] = {}
+        self._ids: Optional[IdMap] = None
+
+    def close(self) -> None:
+        self.conn.close()
+        if self._ids is not None:
+            self._ids.close()
+
+    def _idmap(self) -> Optional[IdMap]:
+        """The queue's identifier map, or None when the map is disabled (see idmap.idmap)."""
+        if self._ids is None and idmap_enabled():
+            self._ids = IdMap(self.path + ".idmap", wal=_wal())
+        return self._ids
+
+    # ---------- claiming ----------
+    def claim(self) -> Optional[sqlite3.Row]:
+        now = time.time()
+        with _tx(self.conn) as c:
+            # leases that ran out on their last attempt are failures, not retries; their
+            # jobs may now be able to move on to the next stage
+            expired = c.execute("SELECT id, job_id FROM tasks WHERE state = 'leased' AND lease_until < ? "
+                                "AND attempts >= max_attempts", (now,)).fetchall()
+            c.executemany("UPDATE tasks SET state = 'failed', error = COALESCE(error, 'lease expired') "
+                          "WHERE id = ?", [(r["id"],) for r in expired])
+            for job_id in sorted({r["job_id"] for r in expired}):
+                self._advance(job_id)
+            row = c.execute(
+                "SELECT * FROM tasks WHERE (state = 'pending' AND not_before <= ?) "
+                f"OR (state = 'leased' AND lease_until < ?) ORDER BY {_KIND_ORDER}, id LIMIT 1",
+                (now, now)).fetchone()
+            if row is not None:
+                c.execute("UPDATE tasks SET state = 'leased', owner = ?, lease_until = ?, "
+                          "attempts = attempts + 1 WHERE id = ?", (self.id, now + self.lease, row["id"]))
+        return row
+
+    def _heartbeat(self, task_id: int, stop: threading.Event) -> None:
+        conn = connect(self.path)
+        try:
+            while not stop.wait(self.lease / 3):
+                conn.execute("UPDATE tasks SET lease_until = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+                             (time.time() + self.lease, task_id, self.id))
+        finally:
+            conn.close()
+
+    def run_one(self) -> bool:
+        """Run one task; returns False when nothing is claimable right now."""
+        task = self.claim()
+        if task is None:
+            return False
+        stop = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(task["id"], stop), daemon=True)
+        beat.start()
+        try:
+            if self.verbose:
+                print(f"[info] Worker {self.id}: {task['key']} (attempt {task['attempts'] + 1})", flush=True)
+            getattr(self, f"_run_{task['kind']}")(task)
+            self._finish(task, None)
+        except Exception as e:
+            print(f"[warn] Task {task['key']} failed: {e}", file=sys.stderr)
+            self._finish(task, e)
+        finally:
+            stop.set()
+            beat.join()
+        return True
+
+    def run(self, forever: bool = False, poll: float = 2.0, max_tasks: int | None = None) -> int:
+        """Work until the queue is drained (or, with `forever`, keep polling). Returns tasks run."""
+        done = 0
+        while max_tasks is None or done < max_tasks:
+            if self.run_one():
+                done += 1
+            elif forever or self._busy():
+                time.sleep(poll)  # others hold leases that may expire or unlock new tasks
+            else:
+                break
+        return done
+
+    def _busy(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM tasks WHERE state IN ('pending', 'leased') LIMIT 1").fetchone() is not None
+
+    # ---------- completion ----------
+    def _finish(self, task: sqlite3.Row, err: Exception | None) -> None:
+        with _tx(self.conn) as c:
+            cur = c.execute("SELECT owner, state FROM tasks WHERE id = ?", (task["id"],)).fetchone()
+            if cur["owner"] != self.id or cur["state"] != "leased":
+                return  # lease lost: another worker owns the task now
+            attempts = task["attempts"] + 1
+            if err is None:
+                c.execute("UPDATE tasks SET state = 'done', error = NULL WHERE id = ?", (task["id"],))
+            elif attempts < task["max_attempts"]:
+                c.execute("UPDATE tasks SET state = 'pending', not_before = ?, error = ? WHERE id = ?",
+                          (time.time() + self.retry_delay * 2 ** attempts, str(err), task["id"]))
+            else:
+                c.execute("UPDATE tasks SET state = 'failed', error = ? WHERE id = ?", (str(err), task["id"]))
+            self._advance(task["job_id"])
+
+    def _advance(self, job_id: int) -> None:
+        """Open the next stage of a job once every task of the current stage is terminal."""
+        c = self.conn
+        job = c.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        open_tasks = c.execute("SELECT COUNT(*) FROM tasks WHERE job_id = ? AND state IN ('pending', 'leased')",
+                               (job_id,)).fetchone()[0]
+        if open_tasks:
+            return
+        params = json.loads(job["params"])
+        paid = params.get("paid") or []
+        if job["state"] == "fetching" and paid and not c.execute(
+                "SELECT 1 FROM tasks WHERE key = ?", (f"{job_id}:fetch:{paid[0][0]}",)).fetchone():
+            for name, rank in paid:
+                _add_task(c, job_id, "fetch", f"{job_id}:fetch:{name}", {"source": name, "rank": rank},
+                          params["max_attempts"])
+        elif job["state"] == "fetching":
+            keys = [r[0] for r in c.execute("SELECT key FROM items WHERE job_id = ? ORDER BY rank, rowid", (job_id,))]
+            chunk = max(1, params["chunk"])
+            for n, i in enumerate(range(0, len(keys), chunk)):
+                _add_task(c, job_id, "score", f"{job_id}:score:{n}", {"keys": keys[i:i + chunk]},
+                          params["max_attempts"])
+            if not keys:
+                _add_task(c, job_id, "finalize", f"{job_id}:finalize", {}, params["max_attempts"])
+            c.execute("UPDATE jobs SET state = ? WHERE id = ?", ("scoring" if keys else "finalizing", job_id))
+        elif job["state"] == "scoring":
+            _add_task(c, job_id, "finalize", f"{job_id}:finalize", {}, params["max_attempts"])
+            c.execute("UPDATE jobs SET state = 'finalizing' WHERE id = ?", (job_id,))
+        elif job["state"] == "finalizing":
+            failed = c.execute("SELECT COUNT(*) FROM tasks WHERE job_id = ? AND kind = 'finalize' AND state = 'failed'",
+                               (job_id,)).fetchone()[0]
+            c.execute("UPDATE jobs SET state = ? WHERE id = ?", ("failed" if failed else "done", job_id))
+
+    # ---------- task bodies ----------
+    def _job(self, task: sqlite3.Row) -> sqlite3.Row:
+        return self.conn.execute("SELECT * FROM jobs WHERE id = ?", (task["job_id"],)).fetchone()
+
+    def _run_fetch(self, task: sqlite3.Row) -> None:
+        job = self._job(task)
+        params = json.loads(job["params"])
+        payload = json.loads(task["payload"])
+        spec = get_source(payload["source"])
+        if spec.missing_key():
+            raise RuntimeError(f"{spec.api_key_env} not set")
+        y1, y2 = _parse_years(params["years"])
+        search = spec.load()
+        if spec.paid:
+            covered = {r[0] for r in self.conn.execute("SELECT key FROM items WHERE job_id = ?", (job["id"],))}
+            search = quota.guard(spec, search, covered=lambda r: _dedup_key(r) in covered)
+        try:
+            results = search(job["topic"], params["per_source"], y1, y2)
+        except quota.QuotaExceeded as e:
+            print(f"[warn] {e}", file=sys.stderr)  # refused, not transient: no retry
+            results = []
+        ids = self._idmap()
+        keys = ids.dedup_keys(results) if ids is not None else [None] * len(results)
+        rows = []
+        for r, key in zip(results, keys):
+            r["authors"] = _normalize_authors(r.get("authors"))
+            rows.append((job["id"], key or _dedup_key(r), payload["rank"], json.dumps(r, ensure_ascii=False)))
+        # the earliest source in registry order wins a duplicate, whatever finished first
+        with _tx(self.conn) as c:
+            c.executemany(
+                "INSERT INTO items (job_id, key, rank, body) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (job_id, key) DO UPDATE SET rank = excluded.rank, body = excluded.body "
+                "WHERE excluded.rank < items.rank", rows)
+        if self.verbose:
+            print(f"[info] {spec.label} returned {len(rows)} items.", flush=True)
+
+    def _llm(self, model: str | None):
+        if not model:
+            return None
+        if model not in self._llms:
+            from .utils import OllamaClient
+            self._llms[model] = OllamaClient(model=model)
+        return self._llms[model]
+
+    def _run_score(self, task: sqlite3.Row) -> None:
+        job = self._job(task)
+        opts = json.loads(job["params"])["score"]
+        keys = json.loads(task["payload"])["keys"]
+        marks = ",".join("?" * len(keys))
+        rows = self.conn.execute(f"SELECT key, body FROM items WHERE job_id = ? AND key IN ({marks})",
+                                 [job["id"], *keys]).fetchall()
+        items = [json.loads(r["body"]) for r in rows]
+        band = opts.get("llm_band")
+        scored = score_items(job["topic"], items, self._llm(opts.get("ollama_model")),
+                             batch_size=opts.get("llm_batch", 1), context_tokens=opts.get("llm_context", 4096),
+                             abstract_tokens=opts.get("abstract_tokens"),
+                             band=tuple(band) if band else None, top_k=opts.get("llm_top_k"),
+                             budget=opts.get("llm_budget"))
+        updates = [(it["score"], job["id"], r["key"]) for r, it in zip(rows, scored)]
+        with _tx(self.conn) as c:
+            c.executemany("UPDATE items SET score = ? WHERE job_id = ? AND key = ?", updates)
+
+    def _run_finalize(self, task: sqlite3.Row) -> None:
+        job = self._job(task)
+        params = json.loads(job["params"])
+        opts = params["score"]
+        base, store, _ = _prepare_output(job["topic"], params["outdir"], False, opts.get("storage", "files"),
+                                         opts.get("compact_json", False), opts.get("compression"))
+        fin = _Finalizer(base, store, opts.get("min_score", 0.0), opts.get("max_papers"),
+                         opts.get("save_bibtex", True), opts.get("save_csl", True), release=True,
+                         compact_json=opts.get("compact_json", False), compression=opts.get("compression"))
+        for r in self.conn.execute("SELECT body, score FROM items WHERE job_id = ? ORDER BY rank, rowid", (job["id"],)):
+            it = json.loads(r["body"])
+            # a chunk whose scoring task failed for good keeps the keyword score
+            it["score"] = r["score"] if r["score"] is not None else base_score(job["topic"], it)
+            fin.add(it)
+        with store:
+            n = fin.finish(opts.get("save_colindex", True))
+        self.conn.execute("UPDATE jobs SET outbase = ? WHERE id = ?", (base, job["id"]))
+        print(f"[ok] Job {job['id']}: saved {n} item(s) -> {base}", flush=True)
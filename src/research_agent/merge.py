@@ -0,0 +1,167 @@
+# Merge many results/<topic>/ trees into one deduplicated library, in three streaming
+# phases so memory stays bounded whatever the number of papers:
+# 1. scan (process pool, one task per tree): every paper is routed by a hash of its
+#    normalized identity into one of `shards` temporary JSON-lines buckets
+# 2. reduce (process pool, one task per shard): duplicates meet in the same shard and
+#    are folded into one paper keeping the best score per topic (`topic_scores`); papers
+#    are written and a ranked run of index rows is emitted per shard
+# 3. the ranked runs are k-way merged into index.jsonl (+ index.col) and the exports
+# A merged library can itself be merged again (its topic_scores are folded in).
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+import hashlib, heapq, os, shutil, tempfile
+
+from .agent import _index_row, _paper_name, _release
+from .colindex import write_columnar_index
+from .paperstore import DirStore, open_store
+from .seen import identity_keys
+from .serialize import dumps, loads, open_out
+
+def merge_key(item: Dict) -> Optional[str]:
+    """Primary normalized identity (DOI first, see seen.identity_keys), or None."""
+    keys = identity_keys(item)
+    return keys[0] if keys else None
+
+def find_trees(paths: List[str]) -> List[str]:
+    """Results trees among `paths`: each path is a tree or a directory of trees
+    (entries starting with "_", like _pdfs or an earlier _library, are skipped)."""
+    def is_tree(p: str) -> bool:
+        return os.path.isdir(os.path.join(p, "papers")) or os.path.exists(os.path.join(p, "papers.pack"))
+    trees = []
+    for p in paths:
+        if is_tree(p):
+            trees.append(p)
+        elif os.path.isdir(p):
+            trees += [os.path.join(p, n) for n in sorted(os.listdir(p))
+                      if not n.startswith("_") and is_tree(os.path.join(p, n))]
+    return trees
+
+def _shard_of(key: str, shards: int) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") % shards
+
+def _scan(base: str, task: int, tmp: str, shards: int) -> int:
+    """Phase 1: route every paper of one tree into the shard buckets."""
+    topic = os.path.basename(os.path.normpath(base))
+    outs: Dict[int, object] = {}
+    n = 0
+    try:
+        with open_store(base) as store:
+            for pid in store:
+                it = store.get(pid)
+                key = it and merge_key(it)
+                if not key:
+                    continue
+                s = _shard_of(key, shards)
+                if s not in outs:
+                    outs[s] = open(os.path.join(tmp, f"{s:05d}", f"{task:06d}.jsonl"), "wb")
+                outs[s].write(dumps([key, topic, it], compact=True) + b"\n")
+                n += 1
+    finally:
+        for f in outs.values():
+            f.close()
+    return n
+
+def _fold(best: Dict, other: Dict) -> Dict:
+    """Fold two copies of a paper: the better-scored one wins, gaps are filled from the other."""
+    scores = dict(best["topic_scores"])
+    for t, s in other["topic_scores"].items():
+        scores[t] = max(s, scores.get(t, s))
+    if other["score"] > best["score"]:
+        best, other = other, best
+    for k, v in other.items():
+        if best.get(k) in (None, "", [], {}):
+            best[k] = v
+    best["topic_scores"] = scores
+    best["score"] = max(scores.values())
+    return best
+
+def _reduce(shard_dir: str, out_base: str, write_papers: bool, compact_json: bool,
+            compression: Optional[str]) -> Tuple[str, int, int]:
+    """Phase 2: dedup one shard; returns (ranked run path, papers in, papers out)."""
+    merged: Dict[str, Dict] = {}
+    seen = 0
+    for name in sorted(os.listdir(shard_dir)):
+        with open(os.path.join(shard_dir, name), "rb") as f:
+            for line in f:
+                key, topic, it = loads(line)
+                seen += 1
+                score = float(it.get("score") or 0.0)
+                it["topic_scores"] = it.get("topic_scores") or {topic: score}
+                it["score"] = max(it["topic_scores"].values())
+                merged[key] = _fold(merged[key], it) if key in merged else it
+    store = DirStore(out_base, compact_json, compression) if write_papers else None
+    run = shard_dir + ".run"
+    entries = []
+    for key, it in merged.items():
+        name = _paper_name(it)
+        if store is not None:
+            store.put(name, it)
+            _release(it)
+        row = _index_row(it, name)
+        row["topic_scores"] = it["topic_scores"]
+        entries.append(([it["score"], it.get("year") or 0, key], row, it))
+    entries.sort(key=lambda e: e[0], reverse=True)
+    with open(run, "wb") as f:
+        for e in entries:
+            f.write(dumps(e, compact=True) + b"\n")
+    shutil.rmtree(shard_dir)
+    return run, seen, len(merged)
+
+def _read_run(path: str) -> Iterator[list]:
+    with open(path, "rb") as f:
+        for line in f:
+            yield loads(line)
+
+def merge(paths: List[str], out_base: str, *, workers: int | None = None, shards: int = 64,
+          storage: str = "files", save_bibtex: bool = True, save_csl: bool = True,
+          save_colindex: bool = True, compact_json: bool = False,
+          compression: str | None = None, verbose: bool = False) -> int:
+    """
+    Merge the results trees under `paths` into `out_base` (papers, index.jsonl, index.col,
+    export.bib, export.csl.json); returns the number of unique papers. Index rows carry
+    `topic_scores` (topic -> best score); `score` is the best of them.
+    """
+    from .exporters import ExportStream
+    trees = [t for t in find_trees(paths)
+             if os.path.abspath(t) != os.path.abspath(out_base)]
+    if verbose: print(f"[info] Merging {len(trees)} results trees…", flush=True)
+    os.makedirs(out_base, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix="merge-", dir=out_base)
+    try:
+        for s in range(shards):
+            os.makedirs(os.path.join(tmp, f"{s:05d}"))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            scanned = sum(pool.map(_scan, trees, range(len(trees)), [tmp] * len(trees),
+                                   [shards] * len(trees)))
+            if verbose: print(f"[info] Scanned {scanned} papers.", flush=True)
+            dirs = [os.path.join(tmp, f"{s:05d}") for s in range(shards)]
+            reduced = list(pool.map(_reduce, dirs, [out_base] * shards, [storage == "files"] * shards,
+                                    [compact_json] * shards, [compression] * shards))
+        if verbose: print(f"[info] {sum(r[2] for r in reduced)} unique papers.", flush=True)
+
+        # phase 3: one ranked pass for the index files, exports and a pack store
+        store = open_store(out_base, "pack") if storage == "pack" else None
+        exports = ExportStream(os.path.join(out_base, "export.bib") if save_bibtex else None,
+                               os.path.join(out_base, "export.csl.json") if save_csl else None,
+                               compact=compact_json)
+        with exports, open_out(os.path.join(out_base, "index.jsonl"), compression) as idx:
+            def rows():
+                streams = [_read_run(r[0]) for r in reduced]
+                for _, row, it in heapq.merge(*streams, key=lambda e: e[0], reverse=True):
+                    if store is not None:
+                        store.put(row["id"], it)
+                        _release(it)
+                    exports.write(it)
+                    idx.write(dumps(row, compact=True) + b"\n")
+                    yield row
+            if save_colindex:
+                count = write_columnar_index(os.path.join(out_base, "index.col"), rows())
+            else:
+                count = sum(1 for _ in rows())
+        if store is not None:
+            store.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    if verbose: print(f"[info] Merged library: {count} papers in {out_base}", flush=True)
+    return count
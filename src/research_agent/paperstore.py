@@ -0,0 +1,183 @@
+# Paper storage backends for a topic's results directory:
+# - "files" (default): papers/<id>.json, one JSON file per paper (optionally compact
+#   and/or compressed to <id>.json.gz / .json.zst)
+# - "pack": papers.pack, append-only records "<id>\t<compact JSON>\n", plus papers.idx
+#   lines "<id>\t<offset>\t<length>\n" for random access; the latest record of an id
+#   wins, and the pack is compacted once more than half of it is superseded
+from __future__ import annotations
+from typing import Dict, Iterator, Optional, Tuple
+import os
+
+from .serialize import SUFFIXES, dumps, loads, read_json, resolve
+from .utils import ensure_dir, write_json
+
+STORAGES = ("files", "pack")
+
+class DirStore:
+    """papers/<id>.json files."""
+    kind = "files"
+
+    def __init__(self, base: str, compact_json: bool = False, compression: str | None = None):
+        self.dir = os.path.join(base, "papers")
+        self.compact_json, self.compression = compact_json, compression
+        ensure_dir(self.dir)
+
+    def put(self, pid: str, item: Dict) -> None:
+        write_json(os.path.join(self.dir, f"{pid}.json"), item, self.compact_json, self.compression)
+
+    def get(self, pid: str) -> Optional[Dict]:
+        path = resolve(os.path.join(self.dir, f"{pid}.json"))
+        return None if path is None else read_json(path)
+
+    def __contains__(self, pid: str) -> bool:
+        return resolve(os.path.join(self.dir, f"{pid}.json")) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        ends = tuple(".json" + s for s in ("", *SUFFIXES.values()))
+        return (n[:n.rindex(".json")] for n in sorted(os.listdir(self.dir)) if n.endswith(ends))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class PackStore(DirStore):
+    """papers.pack + papers.idx (see module comment); records are always compact."""
+    kind = "pack"
+
+    def __init__(self, base: str):
+        ensure_dir(base)
+        self.path = os.path.join(base, "papers.pack")
+        self.idx_path = os.path.join(base, "papers.idx")
+        self.offsets: Dict[str, Tuple[int, int]] = {}
+        self._load()
+        self._pack = open(self.path, "ab")
+        self._idx = open(self.idx_path, "a", encoding="utf-8")
+        self._reader = None
+
+    def _load(self) -> None:
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        end = 0
+        if os.path.exists(self.idx_path):
+            with open(self.idx_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 3:
+                        break  # torn last line
+                    off, length = int(parts[1]), int(parts[2])
+                    if off + length > size:
+                        break
+                    self.offsets[parts[0]] = (off, length)
+                    end = max(end, off + length)
+        if end < size or not os.path.exists(self.idx_path):
+            self._reindex()
+
+    def _reindex(self) -> None:
+        """Rebuild papers.idx by scanning the pack (index lost or behind after a crash)."""
+        self.offsets = {}
+        good = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                off = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn last record
+                    pid = line.split(b"\t", 1)[0].decode("utf-8")
+                    self.offsets[pid] = (off, len(line))
+                    off += len(line)
+                good = off
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+        self._write_index()
+
+    def _write_index(self) -> None:
+        tmp = self.idx_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for pid, (off, length) in self.offsets.items():
+                f.write(f"{pid}\t{off}\t{length}\n")
+        os.replace(tmp, self.idx_path)
+
+    def put(self, pid: str, item: Dict) -> None:
+        rec = pid.encode("utf-8") + b"\t" + dumps(item, compact=True) + b"\n"
+        off = self._pack.tell()
+        self._pack.write(rec)
+        self._idx.write(f"{pid}\t{off}\t{len(rec)}\n")
+        self.offsets[pid] = (off, len(rec))
+
+    def get(self, pid: str) -> Optional[Dict]:
+        loc = self.offsets.get(pid)
+        if loc is None:
+            return None
+        self._pack.flush()
+        if self._reader is None:
+            self._reader = open(self.path, "rb")
+        self._reader.seek(loc[0])
+        rec = self._reader.read(loc[1])
+        return loads(rec[rec.index(b"\t") + 1:])
+
+    def __contains__(self, pid: str) -> bool:
+        return pid in self.offsets
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.offsets))
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def live_bytes(self) -> int:
+        return sum(length for _, length in self.offsets.values())
+
+    def compact(self, threshold: float = 0.5) -> bool:
+        """Rewrite the pack without superseded records once they exceed `threshold` of it."""
+        self._pack.flush()
+        size = self._pack.tell()
+        if not size or self.live_bytes() >= (1 - threshold) * size:
+            return False
+        tmp = self.path + ".tmp"
+        src = open(self.path, "rb")
+        offsets: Dict[str, Tuple[int, int]] = {}
+        with src, open(tmp, "wb") as out:
+            for pid, (off, length) in sorted(self.offsets.items(), key=lambda kv: kv[1][0]):
+                src.seek(off)
+                offsets[pid] = (out.tell(), length)
+                out.write(src.read(length))
+        self._close_files()
+        os.replace(tmp, self.path)
+        self.offsets = offsets
+        self._write_index()
+        self._pack = open(self.path, "ab")
+        self._idx = open(self.idx_path, "a", encoding="utf-8")
+        return True
+
+    def _close_files(self) -> None:
+        for f in (self._pack, self._idx, self._reader):
+            if f is not None and not f.closed:
+                f.close()
+        self._reader = None
+
+    def close(self) -> None:
+        if not self._pack.closed:
+            self.compact()
+        self._close_files()
+
+def open_store(base: str, storage: str | None = None, compact_json: bool = False,
+               compression: str | None = None) -> DirStore:
+    """
+    Paper store of a results directory. storage "files" or "pack"; None picks "pack"
+    when papers.pack exists (reading an existing run), else "files". `compact_json` and
+    `compression` apply to newly written per-paper files.
+    """
+    if storage is None:
+        storage = "pack" if os.path.exists(os.path.join(base, "papers.pack")) else "files"
+    if storage == "pack":
+        return PackStore(base)
+    if storage == "files":
+        return DirStore(base, compact_json, compression)
+    raise ValueError(f"unknown paper storage: {storage} (expected one of {', '.join(STORAGES)})")
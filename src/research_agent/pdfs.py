@@ -0,0 +1,177 @@
+# Optional PDF stage after score_and_save(): download the top-ranked papers' url_pdf
+# concurrently (bounded per host), stream to resumable .part files, and store each PDF
+# once under its SHA-256 so topics share a single content-addressed cache.
+#
+# Store layout:
+#   <store>/ab/abcdef….pdf     content-addressed PDFs
+#   <store>/partial/<url-hash>.part   interrupted downloads (resumed with Range)
+#   <store>/urls.json           url -> sha256 of what it served last time
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import hashlib, json, os, sys, threading, time
+
+from .paperstore import open_store
+from .serialize import iter_jsonl
+from .utils import ensure_dir, http_session
+
+CHUNK = 1 << 16
+
+class PdfStore:
+    """Content-addressed PDF cache with an optional disk budget (LRU by mtime)."""
+    def __init__(self, root: str, budget_bytes: int | None = None):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        ensure_dir(os.path.join(root, "partial"))
+        self._lock = threading.Lock()
+        self._urls_path = os.path.join(root, "urls.json")
+        self.urls: Dict[str, str] = {}
+        if os.path.exists(self._urls_path):
+            with open(self._urls_path, "r", encoding="utf-8") as f:
+                self.urls = json.load(f)
+
+    def path_for(self, sha: str) -> str:
+        return os.path.join(self.root, sha[:2], f"{sha}.pdf")
+
+    def part_for(self, url: str) -> str:
+        return os.path.join(self.root, "partial", hashlib.sha256(url.encode("utf-8")).hexdigest()[:24] + ".part")
+
+    def lookup(self, url: str) -> Optional[str]:
+        """Stored path for a URL downloaded before (and still present), touching it for LRU."""
+        sha = self.urls.get(url)
+        if sha and os.path.exists(self.path_for(sha)):
+            os.utime(self.path_for(sha))
+            return self.path_for(sha)
+        return None
+
+    def commit(self, url: str, part: str, sha: str) -> str:
+        dest = self.path_for(sha)
+        ensure_dir(os.path.dirname(dest))
+        with self._lock:
+            if os.path.exists(dest):  # same content from another URL/topic
+                os.remove(part)
+                os.utime(dest)
+            else:
+                os.replace(part, dest)
+            self.urls[url] = sha
+        return dest
+
+    def save(self) -> None:
+        tmp = self._urls_path + ".tmp"
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.urls, f)
+            os.replace(tmp, self._urls_path)
+
+    def evict(self, keep: set) -> List[str]:
+        """Delete least recently used PDFs (never those in `keep`) until under budget."""
+        if self.budget_bytes is None:
+            return []
+        files: List[Tuple[float, int, str]] = []
+        total = 0
+        for d in os.listdir(self.root):
+            sub = os.path.join(self.root, d)
+            if d == "partial" or not os.path.isdir(sub):
+                continue
+            for name in os.listdir(sub):
+                p = os.path.join(sub, name)
+                st = os.stat(p)
+                files.append((st.st_mtime, st.st_size, p))
+                total += st.st_size
+        removed = []
+        for _, size, p in sorted(files):
+            if total <= self.budget_bytes:
+                break
+            if p in keep:
+                continue
+            os.remove(p)
+            total -= size
+            removed.append(p)
+        if removed:
+            gone = {os.path.basename(p)[:-4] for p in removed}
+            with self._lock:
+                self.urls = {u: s for u, s in self.urls.items() if s not in gone}
+        return removed
+
+def download_pdf(url: str, store: PdfStore, host_limits: Dict[str, threading.Semaphore],
+                 timeout: float = 60.0) -> str:
+    """
+    Download one PDF (resuming a previous .part with a Range request) and return its
+    stored path. Raises ValueError if the server does not return a PDF.
+    """
+    cached = store.lookup(url)
+    if cached:
+        return cached
+    part = store.part_for(url)
+    sem = host_limits[urlparse(url).netloc]
+    with sem:
+        have = os.path.getsize(part) if os.path.exists(part) else 0
+        headers = {"User-Agent": "research-agent/0.4 (pdf)"}
+        if have:
+            headers["Range"] = f"bytes={have}-"
+        with http_session().get(url, headers=headers, stream=True, timeout=timeout) as r:
+            if r.status_code == 416:  # nothing left to fetch: the part is complete
+                r.close()
+            else:
+                r.raise_for_status()
+                mode = "ab" if (have and r.status_code == 206) else "wb"
+                with open(part, mode) as f:
+                    for chunk in r.iter_content(CHUNK):
+                        if chunk:
+                            f.write(chunk)
+    h = hashlib.sha256()
+    with open(part, "rb") as f:
+        head = f.read(5)
+        h.update(head)
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    if head != b"%PDF-":
+        os.remove(part)
+        raise ValueError("response is not a PDF")
+    return store.commit(url, part, h.hexdigest())
+
+def fetch_pdfs(base: str, store_dir: str, top: int = 20, *, workers: int = 8,
+               per_host: int = 2, budget_bytes: int | None = None, timeout: float = 60.0,
+               verbose: bool = False) -> int:
+    """
+    Download PDFs for the `top` best-ranked papers in base/index.jsonl and annotate
+    each stored paper with "pdf_path" and "pdf_sha256". Returns the number of
+    papers with a local PDF. Evicted PDFs may leave stale paths in other topics.
+    """
+    todo: List[Tuple[str, str]] = []
+    for row in iter_jsonl(os.path.join(base, "index.jsonl")):
+        if row.get("url_pdf"):
+            todo.append((row["id"], row["url_pdf"]))
+        if len(todo) >= top:
+            break
+
+    store = PdfStore(store_dir, budget_bytes)
+    host_limits: Dict[str, threading.Semaphore] = {}
+    for _, url in todo:
+        host_limits.setdefault(urlparse(url).netloc, threading.BoundedSemaphore(max(1, per_host)))
+
+    done: Dict[str, str] = {}
+    t0 = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futs = {pool.submit(download_pdf, url, store, host_limits, timeout): (pid, url) for pid, url in todo}
+        for fut in as_completed(futs):
+            pid, url = futs[fut]
+            try:
+                done[pid] = fut.result()
+            except Exception as e:
+                print(f"[warn] PDF {url}: {e}", file=sys.stderr)
+    store.evict(keep=set(done.values()))
+    store.save()
+
+    with open_store(base) as papers:
+        for pid, path in done.items():
+            paper = papers.get(pid)
+            if paper is None:
+                continue
+            paper["pdf_path"] = os.path.abspath(path)
+            paper["pdf_sha256"] = os.path.basename(path)[:-4]
+            papers.put(pid, paper)
+    if verbose:
+        print(f"[info] PDFs: {len(done)}/{len(todo)} stored in {time.monotonic()-t0:.1f}s.", flush=True)
+    return len(done)
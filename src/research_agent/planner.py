@@ -0,0 +1,150 @@
+# Adaptive collection planner: instead of a flat --per-source for every source, spend a
+# global record budget page by page on the sources that keep returning new, relevant
+# papers. Count endpoints (OpenAlex meta.count, PubMed esearch count) cap requests,
+# and a source is dropped once its pages are mostly duplicates.
+from __future__ import annotations
+from typing import Dict, List, Mapping, Optional, Set
+import sys, time
+
+from . import quota
+from .agent import _dedup_key, _since_kwargs
+from .events import Callback, emit
+from .scoring import base_score
+from .sources.registry import SourceSpec
+
+class _SourceState:
+    def __init__(self, spec: SourceSpec, search):
+        self.spec = spec
+        self.search = search
+        self.fetched = 0          # upstream offset consumed so far
+        self.cap: Optional[int] = None  # total hits reported by the count endpoint
+        self.new = 0              # unique records contributed
+        self.relevant = 0         # unique records above the relevance threshold
+        self.active = True
+
+    def yield_rate(self) -> float:
+        # Laplace-smoothed relevant-unique records per record fetched
+        return (self.relevant + 1) / (self.fetched + 2)
+
+    def room(self) -> Optional[int]:
+        return None if self.cap is None else max(0, self.cap - self.fetched)
+
+def adaptive_fetch(topic: str, specs: List[SourceSpec], year_from: int | None,
+                   year_to: int | None, budget: int, *, page_size: int = 25,
+                   min_new_ratio: float = 0.2, relevance_threshold: float = 0.2,
+                   since: Mapping[str, str] | None = None,
+                   status: Dict[str, bool] | None = None,
+                   on_event: Callback | None = None,
+                   verbose: bool = False) -> List[Dict]:
+    """
+    Fetch up to `budget` records in total across `specs`, returning raw records
+    (not yet deduplicated) in fetch order.
+    - every source gets a first page, sized down to its hit count when known
+    - afterwards the next page always goes to the active source with the best
+      rate of relevant unique records per record fetched, free sources before paid ones
+    - a source stops after a short page, when its hit count is reached, or when the
+      share of new unique records on a page falls below `min_new_ratio`
+    """
+    states: List[_SourceState] = []
+    status = {} if status is None else status
+    for spec in specs:
+        status[spec.name] = False
+        if spec.missing_key():
+            print(f"[warn] {spec.label} skipped: {spec.api_key_env} not set", file=sys.stderr)
+            continue
+        try:
+            st = _SourceState(spec, quota.guard(spec, spec.load()))
+        except Exception as e:
+            print(f"[warn] {spec.label} unavailable: {e}", file=sys.stderr)
+            continue
+        try:
+            counter = spec.load_count()
+            if counter:
+                st.cap = int(counter(topic, year_from, year_to))
+                if verbose: print(f"[info] {spec.label} reports {st.cap} hits.", flush=True)
+                if st.cap == 0:
+                    st.active = False
+        except Exception as e:
+            print(f"[warn] {spec.label} count failed: {e}", file=sys.stderr)
+        states.append(st)
+
+    seen: Set[str] = set()
+    results: List[Dict] = []
+    remaining = budget
+
+    def fetch_page(st: _SourceState) -> None:
+        nonlocal remaining
+        size = min(page_size, remaining)
+        room = st.room()
+        if room is not None:
+            size = min(size, room)
+        if size <= 0 or (st.fetched and not st.spec.paging):
+            st.active = False
+            return
+        try:
+            if verbose: print(f"[info] Querying {st.spec.label} (offset {st.fetched}, {size})…", flush=True)
+            emit(on_event, "source_started", source=st.spec.name, label=st.spec.label, offset=st.fetched)
+            t0 = time.monotonic()
+            extra = _since_kwargs(st.spec, since)
+            if st.spec.paging:
+                # sources turn `start` into a page number (start // max_results), so every
+                # request is a full page, trimmed to what is left
+                page = st.search(topic, page_size, year_from, year_to, start=st.fetched, **extra)[:size]
+            else:
+                page = st.search(topic, size, year_from, year_to, **extra)
+        except Exception as e:
+            print(f"[warn] {st.spec.label} error: {e}", file=sys.stderr)
+            emit(on_event, "source_finished", source=st.spec.name, ok=False, count=0,
+                 latency=round(time.monotonic() - t0, 3), error=str(e))
+            st.active = False
+            status[st.spec.name] = False  # incomplete listing: do not advance its watch mark
+            return
+        emit(on_event, "source_finished", source=st.spec.name, ok=True, count=len(page),
+             latency=round(time.monotonic() - t0, 3))
+        # a source that filters years client-side may return fewer records than asked
+        # for; the page still consumed `size` slots of the upstream listing
+        st.fetched += size
+        remaining -= len(page)
+        new = 0
+        for r in page:
+            key = _dedup_key(r)
+            if key in seen:
+                continue
+            seen.add(key)
+            new += 1
+            if base_score(topic, r) >= relevance_threshold:
+                st.relevant += 1
+        st.new += new
+        results.extend(page)
+        if verbose:
+            print(f"[info] {st.spec.label} returned {len(page)} items ({new} new) "
+                  f"in {time.monotonic()-t0:.1f}s.", flush=True)
+        exhausted = not page or (st.spec.year_filter == "server" and len(page) < size)
+        # a delta listing only counts as complete once exhausted (see watch.py)
+        status[st.spec.name] = exhausted or not extra
+        if exhausted:
+            st.active = False  # listing exhausted
+        elif not st.spec.paging or st.room() == 0 or size < page_size:
+            st.active = False  # (after a trimmed page, the next start would be misaligned)
+        elif new < min_new_ratio * len(page):
+            if verbose: print(f"[info] {st.spec.label}: mostly duplicates, stopping.", flush=True)
+            st.active = False
+
+    # round 1: one page each, in registry order (earlier sources win dedup)
+    for st in states:
+        if remaining <= 0:
+            break
+        if st.active:
+            fetch_page(st)
+
+    # then follow the yield, spending paid quota only once the free sources are done
+    while remaining > 0:
+        live = [st for st in states if st.active]
+        if not live:
+            break
+        fetch_page(max(live, key=lambda st: (not st.spec.paid, st.yield_rate())))
+
+    if verbose:
+        for st in states:
+            print(f"[info] {st.spec.label}: fetched {st.fetched}, new {st.new}, relevant {st.relevant}.", flush=True)
+    return results
@@ -0,0 +1,191 @@
+# Quota accounting for paid sources (Scopus, IEEE Xplore). Every paid request is counted
+# in quota.sqlite under the cache dir, per source and API key, within the provider's
+# window (Scopus: 7 days from the first request, IEEE: calendar day UTC) and against a
+# budget that defaults to the provider's quota. Pages are cached, so repeating a query
+# costs nothing; once the budget is spent a request is cut short (downscaled) or, with
+# nothing left and nothing cached, refused with QuotaExceeded.
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Mapping, Optional
+import hashlib, json, os, sqlite3, sys, threading, time
+
+from .utils import cache_dir
+
+DAY = 86400.0
+
+# window: seconds; "daily" windows reset at 00:00 UTC, the others run from the first
+# request. limit: requests per window. page: records per request.
+PROVIDERS: Dict[str, Dict] = {
+    "scopus": {"window": 7 * DAY, "daily": False, "limit": 20000, "page": 25},
+    "ieee": {"window": DAY, "daily": True, "limit": 200, "page": 200},
+}
+_DEFAULT_PROVIDER = {"window": DAY, "daily": True, "limit": None, "page": None}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    source TEXT NOT NULL, key_id TEXT NOT NULL, window_start REAL NOT NULL,
+    used INTEGER NOT NULL, PRIMARY KEY (source, key_id)
+);
+CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, body TEXT NOT NULL, fetched REAL NOT NULL);
+"""
+
+class QuotaExceeded(RuntimeError):
+    """A paid source's budget for the current window is spent."""
+
+def parse_budgets(text: str | None) -> Dict[str, int]:
+    """'scopus=5000,ieee=100' -> {"scopus": 5000, "ieee": 100}."""
+    out: Dict[str, int] = {}
+    for part in (text or "").split(","):
+        if part.strip():
+            name, _, n = part.partition("=")
+            if not n.strip():
+                raise ValueError(f"bad quota '{part.strip()}' (expected SOURCE=REQUESTS)")
+            out[name.strip()] = int(n)
+    return out
+
+def _provider(source: str) -> Dict:
+    return PROVIDERS.get(source, _DEFAULT_PROVIDER)
+
+def _key_id(spec) -> str:
+    key = os.getenv(spec.api_key_env or "") if spec.api_key_env else ""
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12] if key else "-"
+
+class QuotaManager:
+    """
+    Usage counters and the page cache. `budgets` (requests per window, by source) override
+    the provider limits; unset, they come from $RESEARCH_AGENT_QUOTAS ("scopus=5000,...").
+    Safe to share between processes: reservations are taken in SQLite write transactions.
+    """
+    def __init__(self, path: str | None = None, budgets: Mapping[str, int] | None = None,
+                 ttl_days: float = 7.0):
+        self.path = path or cache_dir("quota.sqlite")
+        self.budgets = dict(parse_budgets(os.getenv("RESEARCH_AGENT_QUOTAS")) if budgets is None else budgets)
+        self.ttl = ttl_days * DAY
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _tx(self):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def budget(self, source: str) -> Optional[int]:
+        return self.budgets.get(source, _provider(source)["limit"])
+
+    def _window(self, source: str, start: float | None, now: float) -> float:
+        prov = _provider(source)
+        if prov["daily"]:
+            return now - now % DAY
+        return start if start is not None and now < start + prov["window"] else now
+
+    def _used(self, conn, source: str, key_id: str, now: float):
+        row = conn.execute("SELECT window_start, used FROM usage WHERE source = ? AND key_id = ?",
+                           (source, key_id)).fetchone()
+        start = self._window(source, row[0] if row else None, now)
+        return start, (row[1] if row and row[0] == start else 0)
+
+    def reserve(self, source: str, key_id: str = "-", calls: int = 1) -> int:
+        """Count up to `calls` requests against the budget; returns how many were granted."""
+        now = time.time()
+        with self._tx() as c:
+            start, used = self._used(c, source, key_id, now)
+            budget = self.budget(source)
+            granted = calls if budget is None else max(0, min(calls, budget - used))
+            c.execute("INSERT OR REPLACE INTO usage VALUES (?, ?, ?, ?)", (source, key_id, start, used + granted))
+        return granted
+
+    def usage(self) -> List[Dict]:
+        """Per source and key: requests used, budget and when the window resets."""
+        now = time.time()
+        out = []
+        for source, key_id, start, used in self.conn.execute("SELECT * FROM usage ORDER BY source, key_id"):
+            cur = self._window(source, start, now)
+            out.append({"source": source, "key": key_id, "used": used if cur == start else 0,
+                        "budget": self.budget(source), "resets": cur + _provider(source)["window"]})
+        return out
+
+    def get_page(self, key: str) -> Optional[List[Dict]]:
+        with self._lock:
+            row = self.conn.execute("SELECT body, fetched FROM pages WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def put_page(self, key: str, records: List[Dict]) -> None:
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+                              (key, json.dumps(records, ensure_ascii=False), time.time()))
+
+    def search(self, spec, search: Callable, query: str, max_results: int,
+               year_from: int | None = None, year_to: int | None = None, start: int = 0,
+               covered: Callable[[Dict], bool] | None = None, min_new_ratio: float = 0.2,
+               **kwargs) -> List[Dict]:
+        """
+        `search` for a paid source, page by page (the provider's page size): cached pages
+        first, then one reserved request per page. With `covered` (True for records the
+        free sources already returned), paging stops once a page is mostly covered.
+        """
+        kid = _key_id(spec)
+        page = (_provider(spec.name)["page"] if spec.paging else None) or max_results
+        out: List[Dict] = []
+        offset = start
+        while offset < start + max_results:
+            size = min(page, start + max_results - offset)
+            key = hashlib.sha1(json.dumps([spec.name, kid, query, size, year_from, year_to, offset,
+                                           sorted(kwargs.items())]).encode("utf-8")).hexdigest()
+            recs = self.get_page(key)
+            if recs is None:
+                if not self.reserve(spec.name, kid):
+                    msg = f"{spec.label} quota of {self.budget(spec.name)} requests spent for this window"
+                    if not out:
+                        raise QuotaExceeded(msg)
+                    print(f"[warn] {msg}; downscaled to {len(out)} of {max_results} records", file=sys.stderr)
+                    break
+                paging = {"start": offset} if spec.paging else {}
+                recs = search(query, size, year_from, year_to, **paging, **kwargs)
+                self.put_page(key, recs)
+            out += recs
+            offset += size
+            if len(recs) < size:
+                break  # listing exhausted
+            if covered is not None and sum(1 for r in recs if not covered(r)) < min_new_ratio * len(recs):
+                break  # the free sources already have these
+        return out
+
+    def close(self) -> None:
+        self.conn.close()
+
+_manager: Optional[QuotaManager] = None
+_init_lock = threading.Lock()
+
+def manager() -> QuotaManager:
+    global _manager
+    if _manager is None:
+        with _init_lock:
+            if _manager is None:
+                _manager = QuotaManager()
+    return _manager
+
+def configure(budgets: Mapping[str, int] | None = None, path: str | None = None) -> QuotaManager:
+    """Replace the process-wide manager (e.g. with CLI budgets)."""
+    global _manager
+    with _init_lock:
+        _manager = QuotaManager(path, budgets)
+    return _manager
+
+def guard(spec, search: Callable, covered: Callable[[Dict], bool] | None = None) -> Callable:
+    """`search` unchanged for free sources; for paid ones, the same call through manager()."""
+    if not spec.paid:
+        return search
+
+    def paid_search(query, max_results, year_from=None, year_to=None, start=0, **kwargs):
+        return manager().search(spec, search, query, max_results, year_from, year_to,
+                                start=start, covered=covered, **kwargs)
+    return paid_search
@@ -0,0 +1,83 @@
+# Bounded-memory ranking of scored papers, best first by (score, year), ties in input
+# order, i.e. the same order as a stable sort of the whole list:
+# - TopK keeps only the best k items in a heap (--max-papers)
+# - ExternalSorter keeps small index rows and spills sorted runs to disk past a
+#   threshold, then streams a k-way merge of the runs (uncapped runs)
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional, Tuple
+import heapq, json, os, tempfile
+
+Key = Tuple[float, int, int]
+
+def rank_key(it: Dict, seq: int) -> Key:
+    """Larger is better; -seq keeps earlier items first among equals."""
+    return (float(it.get("score") or 0.0), it.get("year") or 0, -seq)
+
+class TopK:
+    """The k best items seen so far (min-heap on rank_key)."""
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[Tuple[Key, Dict]] = []
+
+    def push(self, key: Key, item: Dict) -> Optional[Dict]:
+        """Offer an item; returns the item that dropped out (or None)."""
+        if self.k <= 0:
+            return item
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, (key, item))
+            return None
+        if key > self._heap[0][0]:
+            return heapq.heapreplace(self._heap, (key, item))[1]
+        return item
+
+    def ranked(self) -> List[Dict]:
+        return [it for _, it in sorted(self._heap, key=lambda e: e[0], reverse=True)]
+
+class ExternalSorter:
+    """Sort (key, row) pairs best first, holding at most `max_rows` rows in memory."""
+    def __init__(self, max_rows: int = 50_000, tmpdir: str | None = None):
+        self.max_rows = max(1, max_rows)
+        self.tmpdir = tmpdir
+        self._rows: List[Tuple[Key, Dict]] = []
+        self._runs: List[str] = []
+
+    def add(self, key: Key, row: Dict) -> None:
+        self._rows.append((key, row))
+        if len(self._rows) >= self.max_rows:
+            self._spill()
+
+    def _spill(self) -> None:
+        self._rows.sort(key=lambda e: e[0], reverse=True)
+        fd, path = tempfile.mkstemp(prefix="rank-", suffix=".jsonl", dir=self.tmpdir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for key, row in self._rows:
+                f.write(json.dumps([key, row], ensure_ascii=False) + "\n")
+        self._runs.append(path)
+        self._rows = []
+
+    @staticmethod
+    def _read(path: str) -> Iterator[Tuple[Key, Dict]]:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                key, row = json.loads(line)
+                yield tuple(key), row
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Rows best first; spilled runs are deleted once consumed."""
+        self._rows.sort(key=lambda e: e[0], reverse=True)
+        try:
+            if not self._runs:
+                yield from (row for _, row in self._rows)
+                return
+            streams = [self._read(p) for p in self._runs] + [iter(self._rows)]
+            for _, row in heapq.merge(*streams, key=lambda e: e[0], reverse=True):
+                yield row
+        finally:
+            for p in self._runs:
+                if os.path.exists(p):
+                    os.remove(p)
+            self._runs, self._rows = [], []
+
+    @property
+    def spilled(self) -> int:
+        return len(self._runs)
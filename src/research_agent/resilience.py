@@ -0,0 +1,185 @@
+# Per-source resilience for HTTP calls, persisted across runs in source_health.json
+# under the cache dir:
+# - timeouts follow the observed latency (2 x p99 of recent calls, within [5s, cap]);
+#   samples are kept per request class (one-record "count" calls vs result "page"s) and
+#   hedged requests are timed from the first attempt, so neither pulls p99 down
+# - a request still pending after the source's p95 gets a hedged duplicate; the first
+#   response wins
+# - a circuit breaker opens after consecutive failures and skips the source for a
+#   cool-down that doubles on every re-trip (then lets one trial request through);
+#   429 is backpressure, left to the sources' own backoff, and never counts
+# Breaker changes are written at once; latency samples at most every FLUSH_EVERY seconds
+# and at exit.
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Dict, List, Optional
+import atexit, json, os, threading, time
+
+from .utils import cache_dir, http_session
+
+DEFAULT_TIMEOUT = 40.0
+MIN_TIMEOUT = 5.0
+SAMPLES = 100          # latencies kept per source and request class
+MIN_SAMPLES = 10       # before adapting timeouts / hedging
+FAIL_THRESHOLD = 3     # consecutive failures that open the circuit
+COOLDOWN = 15 * 60.0   # first cool-down, doubled per re-trip
+MAX_COOLDOWN = 6 * 3600.0
+FLUSH_EVERY = 10.0     # seconds between saves of latency-only updates
+
+class CircuitOpen(RuntimeError):
+    """The source failed repeatedly and is skipped until its cool-down ends."""
+
+def _pct(sorted_vals: List[float], q: float) -> float:
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * (len(sorted_vals) - 1) + 0.5))]
+
+class SourceHealth:
+    """Latency samples and breaker state per source (see module comment for saving)."""
+    def __init__(self, path: str | None = None):
+        self.path = path or cache_dir("source_health.json")
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved = time.monotonic()
+        self.state: Dict[str, Dict] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.state = json.load(f)
+            except ValueError:
+                self.state = {}
+
+    def _get(self, source: str) -> Dict:
+        st = self.state.setdefault(source, {"lat": {}, "fails": 0, "trips": 0, "open_until": 0.0})
+        if isinstance(st["lat"], list):
+            st["lat"] = {}  # older files mixed all request classes: start over
+        return st
+
+    def percentile(self, source: str, q: float, kind: str = "page") -> Optional[float]:
+        lat = sorted(self._get(source)["lat"].get(kind, []))
+        return _pct(lat, q) if len(lat) >= MIN_SAMPLES else None
+
+    def timeout(self, source: str, cap: float = DEFAULT_TIMEOUT, kind: str = "page") -> float:
+        p99 = self.percentile(source, 0.99, kind)
+        return cap if p99 is None else min(cap, max(MIN_TIMEOUT, 2 * p99))
+
+    def hedge_after(self, source: str, kind: str = "page") -> Optional[float]:
+        return self.percentile(source, 0.95, kind)
+
+    def check(self, source: str) -> None:
+        until = self._get(source)["open_until"]
+        if until > time.time():
+            left = int(until - time.time())
+            raise CircuitOpen(f"{source} circuit open after repeated failures ({left}s cool-down left)")
+
+    def record(self, source: str, ok: bool, latency: float | None = None,
+               kind: str = "page") -> None:
+        with self._lock:
+            st = self._get(source)
+            if ok:
+                breaker = bool(st["fails"] or st["trips"] or st["open_until"])
+                st["fails"] = st["trips"] = 0
+                st["open_until"] = 0.0
+                if latency is not None:
+                    st["lat"][kind] = (st["lat"].get(kind, []) + [round(latency, 3)])[-SAMPLES:]
+            else:
+                breaker = True
+                st["fails"] += 1
+                if st["fails"] >= FAIL_THRESHOLD:
+                    st["open_until"] = time.time() + min(MAX_COOLDOWN, COOLDOWN * 2 ** st["trips"])
+                    st["trips"] += 1
+                    st["fails"] = FAIL_THRESHOLD - 1  # one failed trial re-opens it
+            self._dirty = True
+            if breaker or time.monotonic() - self._saved >= FLUSH_EVERY:
+                self.save()
+
+    def flush(self) -> None:
+        """Save pending latency samples (called at exit for the process-wide state)."""
+        with self._lock:
+            if self._dirty:
+                self.save()
+
+    def reset(self, source: str | None = None) -> None:
+        """Close the circuit of one source (or all), keeping latency history."""
+        with self._lock:
+            for name, st in self.state.items():
+                if source is None or name == source:
+                    st.update(fails=0, trips=0, open_until=0.0)
+            self.save()
+
+    def save(self) -> None:
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.path)
+        self._dirty = False
+        self._saved = time.monotonic()
+
+_health: Optional[SourceHealth] = None
+_pool: Optional[ThreadPoolExecutor] = None
+_init_lock = threading.Lock()
+
+def health() -> SourceHealth:
+    global _health
+    if _health is None:
+        with _init_lock:
+            if _health is None:
+                _health = SourceHealth()
+                atexit.register(_health.flush)
+    return _health
+
+def _hedge_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _init_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+    return _pool
+
+def _first_success(futs):
+    err = None
+    for fut in as_completed(futs):
+        try:
+            return fut.result()
+        except Exception as e:
+            err = e
+    raise err
+
+def _failed(r) -> bool:
+    return r.status_code >= 500
+
+def source_get(source: str, url: str, *, timeout: float = DEFAULT_TIMEOUT,
+               hedge: bool = True, kind: str = "page",
+               health_state: SourceHealth | None = None, **kwargs):
+    """
+    http_session().get() for a named source with adaptive timeout, hedging and the
+    circuit breaker. `timeout` is the upper bound; `kind` is the request class whose
+    latency samples set it ("count" for hit counts, "page" for result pages). Raises
+    CircuitOpen while open; 5xx responses are returned as usual but count as failures;
+    429 (rate limited) is returned without touching the breaker or the latency samples.
+    """
+    hs = health_state or health()
+    hs.check(source)
+    tmo = hs.timeout(source, timeout, kind)
+    after = hs.hedge_after(source, kind) if hedge else None
+
+    def call():
+        return http_session().get(url, timeout=tmo, **kwargs)
+
+    t0 = time.monotonic()
+    try:
+        if after is None or after >= tmo:
+            r = call()
+        else:
+            futs = [_hedge_pool().submit(call)]
+            if not wait(futs, timeout=after)[0]:
+                futs.append(_hedge_pool().submit(call))  # hedge: duplicate the slow request
+            r = _first_success(futs)
+    except Exception:
+        hs.record(source, ok=False)
+        raise
+    latency = time.monotonic() - t0  # from the first attempt, hedged or not
+    if r.status_code != 429:
+        hs.record(source, ok=not _failed(r), latency=None if _failed(r) else latency, kind=kind)
+    return r
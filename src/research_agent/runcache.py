@@ -0,0 +1,246 @@
+# Materialized run results: the deduplicated records of a run and their scores are kept
+# in runs.sqlite under the cache dir, keyed by topic, year range and selected sources.
+# A rerun with a larger --per-source only asks each paging source for the records past
+# the depth already fetched (non-paging sources are re-queried from the start) and only
+# scores the records that are new, so widening a search step by step costs the difference.
+# Scores are kept per scorer (LLM model, cascade options, call budget and batching), so switching
+# the model rescores. A run older than `ttl_days` is stale: it is dropped and fetched from scratch.
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+import hashlib, json, sqlite3, sys, threading, time
+
+from .agent import _dedup_key, _normalize_and_dedup, _parse_years
+from .events import Callback, emit
+from .sources.registry import resolve_sources
+from .utils import cache_dir
+from . import quota
+
+DAY = 86400.0
+MAX_PAGE = 100  # records per top-up request
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    key TEXT PRIMARY KEY, topic TEXT NOT NULL, years TEXT, sources TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS depth (
+    run TEXT NOT NULL, source TEXT NOT NULL, fetched INTEGER NOT NULL,
+    exhausted INTEGER NOT NULL, PRIMARY KEY (run, source)
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, run TEXT NOT NULL, rank INTEGER NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_run ON items (run);
+CREATE TABLE IF NOT EXISTS scores (
+    item INTEGER NOT NULL, scorer TEXT NOT NULL, score REAL NOT NULL,
+    PRIMARY KEY (item, scorer)
+);
+"""
+
+def run_key(topic: str, y1: int | None, y2: int | None, sources: Iterable[str]) -> str:
+    text = json.dumps([" ".join(topic.lower().split()), y1, y2, sorted(sources)])
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def scorer_id(ollama_model: str | None, band: Tuple[float, float] | None = None,
+              top_k: int | None = None, budget: int | None = None, batch: int = 1,
+              context: int = 4096, abstract_tokens: int | None = None) -> str:
+    """
+    What a cached score depends on besides the record: "keywords" or the LLM setup.
+    The call budget is part of it, since items past the budget keep keyword scores, and
+    so is batching: packed prompts (batch, context, abstract_tokens) see truncated
+    abstracts next to others, and a budget counts prompts rather than items.
+    """
+    if not ollama_model:
+        return "keywords"
+    return json.dumps([ollama_model, list(band) if band else None, top_k, budget,
+                       batch, context, abstract_tokens])
+
+def _top_up_pages(fetched: int, want: int) -> List[Tuple[int, int]]:
+    """(start, size) requests covering fetched..want; every start is a multiple of its
+    size, as paging sources require."""
+    pages, start = [], fetched
+    while start < want:
+        size = min(MAX_PAGE, want - start)
+        while start % size:
+            size -= 1
+        pages.append((start, size))
+        start += size
+    return pages
+
+class RunCache:
+    """Per-run records, fetch depth per source and scores (see module comment)."""
+    def __init__(self, path: str | None = None, ttl_days: float = 7.0):
+        self.path = path or cache_dir("runs.sqlite")
+        self.ttl = ttl_days * DAY
+        self._lock = threading.Lock()
+        self._rows: Dict[int, int] = {}  # id(item) -> items.id, for save_scores()
+        self._scorer = "keywords"
+        self.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _tx(self):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def _drop(self, c, key: str) -> None:
+        c.execute("DELETE FROM scores WHERE item IN (SELECT id FROM items WHERE run = ?)", (key,))
+        for table in ("items", "depth"):
+            c.execute(f"DELETE FROM {table} WHERE run = ?", (key,))
+        c.execute("DELETE FROM runs WHERE key = ?", (key,))
+
+    def runs(self) -> List[Dict]:
+        """Cached runs: topic, years, sources, records held and age (days)."""
+        now = time.time()
+        rows = self.conn.execute(
+            "SELECT r.topic, r.years, r.sources, r.created, "
+            "(SELECT COUNT(*) FROM items i WHERE i.run = r.key) FROM runs r ORDER BY r.created")
+        return [{"topic": t, "years": y, "sources": json.loads(s), "items": n,
+                 "age_days": round((now - created) / DAY, 2)} for t, y, s, created, n in rows]
+
+    def collect(self, topic: str, years: str | None, per_source: int,
+                *, sources: Iterable[str] | None = None, scorer: str = "keywords",
+                refresh: bool = False, status: Dict[str, bool] | None = None,
+                on_event: Callback | None = None, verbose: bool = False,
+                **toggles: bool) -> List[Dict]:
+        """
+        Like agent.collect(), through the cache: cached records come back with their
+        "score" for `scorer` (score the rest with score_and_save(keep_scores=True), then
+        call save_scores()). A smaller `per_source` than cached returns the whole cached
+        run. `refresh` ignores and replaces the cached run.
+        """
+        y1, y2 = _parse_years(years)
+        specs = resolve_sources(sources, toggles)
+        key = run_key(topic, y1, y2, [s.name for s in specs])
+        status = {} if status is None else status
+
+        with self._tx() as c:
+            row = c.execute("SELECT created FROM runs WHERE key = ?", (key,)).fetchone()
+            if row and (refresh or time.time() - row[0] > self.ttl):
+                if verbose: print("[info] Run cache: " + ("refresh requested." if refresh else "stale run dropped."), flush=True)
+                self._drop(c, key)
+                row = None
+            if row is None:
+                c.execute("INSERT INTO runs VALUES (?, ?, ?, ?, ?)",
+                          (key, topic, years, json.dumps([s.name for s in specs]), time.time()))
+            depth = {s: (n, bool(x)) for s, n, x in
+                     c.execute("SELECT source, fetched, exhausted FROM depth WHERE run = ?", (key,))}
+            cached = c.execute("SELECT id, rank, body FROM items WHERE run = ? ORDER BY rank, id",
+                               (key,)).fetchall()
+
+        # top up every source to per_source; new records go after the cached ones of their rank
+        records = [json.loads(b) for _, _, b in cached]
+        covered = {_dedup_key(r) for r in records}
+        fresh: List[Tuple[int, Dict]] = []
+        reached: Dict[str, Tuple[int, bool]] = {}
+        for rank, spec in enumerate(specs):
+            fetched, exhausted = depth.get(spec.name, (0, False))
+            status[spec.name] = True
+            if exhausted or fetched >= per_source:
+                continue
+            got, reached[spec.name] = self._fetch(spec, topic, y1, y2, fetched, per_source,
+                                                  status, on_event, verbose, covered)
+            fresh += [(rank, r) for r in got]
+            covered.update(_dedup_key(r) for r in got)
+        if verbose:
+            print(f"[info] Run cache: {len(cached)} cached record(s), {len(fresh)} fetched.", flush=True)
+
+        pool = sorted([(r, i, rec) for i, ((_, r, _), rec) in enumerate(zip(cached, records))]
+                      + [(r, len(cached) + i, rec) for i, (r, rec) in enumerate(fresh)],
+                      key=lambda e: (e[0], e[1]))
+        unique = _normalize_and_dedup([rec for _, _, rec in pool], on_event)
+        keep = {id(rec) for rec in unique}
+        rank_of = {id(rec): r for r, _, rec in pool}
+        row_of = {id(rec): cid for (cid, _, _), rec in zip(cached, records)}
+
+        with self._tx() as c:
+            gone = [(row_of[id(rec)],) for rec in records if id(rec) not in keep]
+            c.executemany("DELETE FROM scores WHERE item = ?", gone)
+            c.executemany("DELETE FROM items WHERE id = ?", gone)
+            for rec in unique:
+                if id(rec) not in row_of:
+                    cur = c.execute("INSERT INTO items (run, rank, body) VALUES (?, ?, ?)",
+                                    (key, rank_of[id(rec)], json.dumps(rec, ensure_ascii=False)))
+                    row_of[id(rec)] = cur.lastrowid
+            c.executemany("INSERT OR REPLACE INTO depth VALUES (?, ?, ?, ?)",
+                          [(key, name, n, int(x)) for name, (n, x) in reached.items()])
+            scores = dict(c.execute("SELECT s.item, s.score FROM scores s JOIN items i ON i.id = s.item "
+                                    "WHERE i.run = ? AND s.scorer = ?", (key, scorer)))
+
+        self._scorer = scorer
+        for rec in unique:
+            rid = row_of[id(rec)]
+            self._rows[id(rec)] = rid
+            rec.pop("score", None)
+            if rid in scores:
+                rec["score"] = scores[rid]
+        if verbose:
+            print(f"[info] Run cache: {sum(1 for r in unique if 'score' in r)} of {len(unique)} "
+                  "record(s) already scored.", flush=True)
+        return unique
+
+    def _fetch(self, spec, topic: str, y1: int | None, y2: int | None, fetched: int,
+               want: int, status: Dict[str, bool], on_event: Callback | None,
+               verbose: bool, covered: set) -> Tuple[List[Dict], Tuple[int, bool]]:
+        """Records of one source past `fetched`, and its new (depth, exhausted)."""
+        if spec.missing_key():
+            print(f"[warn] {spec.label} skipped: {spec.api_key_env} not set", file=sys.stderr)
+            status[spec.name] = False
+            return [], (fetched, False)
+        try:
+            search = spec.load()
+        except Exception as e:
+            print(f"[warn] {spec.label} unavailable: {e}", file=sys.stderr)
+            status[spec.name] = False
+            return [], (fetched, False)
+        if spec.paid:
+            # paid sources run last; stop paging once they only repeat what is known
+            search = quota.guard(spec, search, covered=lambda r: _dedup_key(r) in covered)
+        # without paging, a source can only be asked again for its first `want` records
+        pages = _top_up_pages(fetched, want) if (spec.paging and fetched) else [(0, want)]
+        out: List[Dict] = []
+        for start, size in pages:
+            emit(on_event, "source_started", source=spec.name, label=spec.label, offset=start)
+            t0 = time.monotonic()
+            try:
+                if verbose: print(f"[info] Querying {spec.label} (records {start + 1}-{start + size})…", flush=True)
+                got = search(topic, size, y1, y2, **({"start": start} if start else {}))
+            except Exception as e:
+                print(f"[warn] {spec.label} error: {e}", file=sys.stderr)
+                emit(on_event, "source_finished", source=spec.name, ok=False, count=0,
+                     latency=round(time.monotonic() - t0, 3), error=str(e))
+                status[spec.name] = False
+                return out, (max(start, fetched), False)
+            emit(on_event, "source_finished", source=spec.name, ok=True, count=len(got),
+                 latency=round(time.monotonic() - t0, 3))
+            out += got
+            # a short page means the source has nothing more (unless pages are thinned
+            # by a client-side year filter or cut short by a quota)
+            if len(got) < size and spec.year_filter != "client" and not spec.paid:
+                return out, (start + size, True)
+        return out, (want, False)
+
+    def save_scores(self, items: Iterable[Dict]) -> int:
+        """Store the scores of items returned by collect(); returns how many were written."""
+        rows = [(self._rows[id(it)], self._scorer, float(it["score"])) for it in items
+                if id(it) in self._rows and "score" in it]
+        with self._tx() as c:
+            c.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "RunCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,101 @@
+# Relevance scoring pipeline shared by score_and_save() and the async API:
+# deterministic keyword overlap for every item, optionally combined with LLM scores
+# requested one abstract at a time or in token-budgeted batches. In cascade mode only
+# the items the cheap scorer is unsure about (or its top-K) reach the LLM, under a
+# per-run call budget.
+from __future__ import annotations
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from .utils import CallBudget, OllamaClient, pack_batches, simple_content_score, truncate_to_tokens
+
+def base_score(topic: str, it: Dict) -> float:
+    return simple_content_score(topic, it.get("abstract") or it.get("title") or "")
+
+def select_for_llm(topic: str, items: List[Dict], band: Tuple[float, float] | None = None,
+                   top_k: int | None = None, max_items: int | None = None) -> List[int]:
+    """
+    Cascade selection over items with abstracts, by deterministic score:
+    the top_k highest first, then those inside `band` (lo, hi), most uncertain
+    (closest to the band midpoint) first; without band/top_k every item qualifies,
+    highest first. At most `max_items` positions are returned, in priority order.
+    """
+    base = {i: base_score(topic, it) for i, it in enumerate(items) if it.get("abstract")}
+    by_score = sorted(base, key=lambda i: base[i], reverse=True)
+    if band is None and top_k is None:
+        chosen = by_score
+    else:
+        chosen = by_score[:top_k] if top_k else []
+        if band is not None:
+            lo, hi = band
+            mid = (lo + hi) / 2
+            taken = set(chosen)
+            chosen += sorted((i for i in base if lo <= base[i] <= hi and i not in taken),
+                             key=lambda i: abs(base[i] - mid))
+    return chosen if max_items is None else chosen[:max_items]
+
+def plan_batches(topic: str, items: List[Dict], batch_size: int, context_tokens: int,
+                 abstract_tokens: int | None, only: Set[int] | None = None) -> List[List[int]]:
+    """Positions of items with abstracts (restricted to `only`), grouped into prompts that fit the budget."""
+    pos = [i for i, it in enumerate(items) if it.get("abstract") and (only is None or i in only)]
+    texts = [truncate_to_tokens(items[i]["abstract"], abstract_tokens) for i in pos]
+    return [[pos[j] for j in group]
+            for group in pack_batches(topic, texts, batch_size, context_tokens)]
+
+def _apply(topic: str, it: Dict, s_llm: float) -> Dict:
+    it["score"] = max(base_score(topic, it), s_llm)
+    return it
+
+def score_items(topic: str, items: Iterable[Dict], llm: Optional[OllamaClient] = None,
+                *, batch_size: int = 1, context_tokens: int = 4096,
+                abstract_tokens: int | None = None,
+                band: Tuple[float, float] | None = None, top_k: int | None = None,
+                budget: int | None = None) -> Iterator[Dict]:
+    """
+    Set it["score"] = max(deterministic, LLM) on each item and yield items in input order.
+    With batch_size > 1, abstracts (truncated to `abstract_tokens`) are packed into
+    prompts of up to `batch_size` abstracts that fit `context_tokens`.
+    band / top_k / budget enable cascade mode (see select_for_llm); `budget` is a hard
+    cap on LLM calls, so items past it keep their deterministic score.
+    """
+    if llm is not None and (band is not None or top_k is not None or budget is not None):
+        items = list(items)
+        per_call = max(1, batch_size)
+        max_items = budget * per_call if budget is not None else None
+        only: Optional[Set[int]] = set(select_for_llm(topic, items, band, top_k, max_items))
+    else:
+        only = None
+
+    calls = CallBudget(max(0, budget)) if budget is not None else None
+    yield from _score_stream(topic, items, llm, batch_size, context_tokens, abstract_tokens, only, calls)
+
+def _score_stream(topic: str, items: Iterable[Dict], llm: Optional[OllamaClient],
+                  batch_size: int, context_tokens: int, abstract_tokens: int | None,
+                  only: Optional[Set[int]], calls: Optional[CallBudget] = None) -> Iterator[Dict]:
+    def wanted(pos: int, it: Dict) -> bool:
+        return bool(it.get("abstract")) and (only is None or pos in only)
+
+    if llm is None or batch_size <= 1:
+        for pos, it in enumerate(items):
+            use = llm is not None and wanted(pos, it)
+            yield _apply(topic, it, llm.classify_relevance(topic, it["abstract"], calls) if use else 0.0)
+        return
+
+    def flush(start: int, window: List[Dict]) -> Iterator[Dict]:
+        local = {i for i, it in enumerate(window) if wanted(start + i, it)}
+        llm_scores: Dict[int, float] = {}
+        for group in plan_batches(topic, window, batch_size, context_tokens, abstract_tokens, local):
+            texts = [truncate_to_tokens(window[i]["abstract"], abstract_tokens) for i in group]
+            for i, v in zip(group, llm.classify_batch(topic, texts, context_tokens, calls)):
+                llm_scores[i] = v
+        for i, it in enumerate(window):
+            yield _apply(topic, it, llm_scores.get(i, 0.0))
+
+    window: List[Dict] = []
+    start = pending = 0
+    for pos, it in enumerate(items):
+        window.append(it)
+        pending += wanted(pos, it)
+        if pending >= batch_size:
+            yield from flush(start, window)
+            start, window, pending = pos + 1, [], 0
+    if window:
+        yield from flush(start, window)
@@ -0,0 +1,137 @@
+# Persistent "already seen" set for novelty-only runs. Paper identities are hashed to
+# 64 bits and kept as a sorted array on disk (8 bytes per paper: ~8 MB per million),
+# memory-mapped for lookups and rewritten by a merge on save.
+#
+# Layout (little-endian): b"RASEEN01", u64 count, then count sorted u64 hashes.
+from __future__ import annotations
+from typing import Dict, Iterable, List, Set
+import array, bisect, hashlib, heapq, mmap, os, re, struct, sys
+from .utils import slugify
+
+MAGIC = b"RASEEN01"
+_HEADER = struct.Struct("<8sQ")
+_ID_FIELDS = ("doi", "arxiv_id", "openalex_id", "pubmed_id", "hal_docid")
+
+def normalize_doi(value) -> str:
+    """Lowercased DOI without resolver prefix: OpenAlex's "https://doi.org/10.1/A" is "10.1/a"."""
+    return re.sub(r"^(https?://(dx\.)?doi\.org/|doi:)", "", str(value).strip(), flags=re.I).lower()
+
+def identity_keys(item: Dict) -> List[str]:
+    """
+    Normalized identities of a paper: every identifier it carries, or its
+    normalized title when it has none.
+    """
+    keys = [f"{k}:{normalize_doi(item[k]) if k == 'doi' else str(item[k]).strip().lower()}"
+            for k in _ID_FIELDS if item.get(k)]
+    if not keys:
+        title = re.sub(r"[^a-z0-9]+", " ", (item.get("title") or "").lower()).strip()
+        if title:
+            keys.append("title:" + title[:160])
+    return keys
+
+def _h64(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+class SeenSet:
+    """
+    Set of paper identities persisted at `path`. Lookups binary-search the mapped
+    file; additions stay in memory until save().
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._pending: Set[int] = set()
+        self._f = None
+        self._mm = None
+        self._hashes = array.array("Q")
+        if os.path.exists(path) and os.path.getsize(path) > _HEADER.size:
+            self._open()
+
+    def _open(self) -> None:
+        self._f = open(self.path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path}: not a seen-set file")
+        view = memoryview(self._mm)[_HEADER.size:_HEADER.size + 8 * count]
+        if sys.byteorder == "little":
+            self._hashes = view.cast("Q")
+        else:
+            self._hashes = array.array("Q", view.tobytes())
+            self._hashes.byteswap()
+            view.release()
+
+    def close(self) -> None:
+        if isinstance(self._hashes, memoryview):
+            self._hashes.release()
+        self._hashes = array.array("Q")
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def __enter__(self) -> "SeenSet":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._hashes) + sum(1 for h in self._pending if not self._stored(h))
+
+    def _stored(self, h: int) -> bool:
+        i = bisect.bisect_left(self._hashes, h)
+        return i < len(self._hashes) and self._hashes[i] == h
+
+    def contains_key(self, key: str) -> bool:
+        h = _h64(key)
+        return h in self._pending or self._stored(h)
+
+    def seen(self, item: Dict) -> bool:
+        return any(self.contains_key(k) for k in identity_keys(item))
+
+    def add(self, item: Dict) -> None:
+        for k in identity_keys(item):
+            self._pending.add(_h64(k))
+
+    def save(self) -> None:
+        """Merge pending hashes into the sorted file (atomic replace)."""
+        if not self._pending:
+            return
+        merged = array.array("Q")
+        last = None
+        for h in heapq.merge(self._hashes, sorted(self._pending)):
+            if h != last:
+                merged.append(h)
+                last = h
+        if sys.byteorder != "little":
+            merged.byteswap()
+        self.close()
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(merged)))
+            merged.tofile(f)
+        os.replace(tmp, self.path)
+        self._pending.clear()
+        self._open()
+
+def default_seen_path(outdir: str, topic: str, scope: str = "topic") -> str:
+    """seen.bin inside the topic's results directory, or shared at the outdir root."""
+    if scope == "workspace":
+        return os.path.join(outdir, "seen.bin")
+    return os.path.join(outdir, slugify(topic), "seen.bin")
+
+def filter_new(items: Iterable[Dict], seen: SeenSet) -> List[Dict]:
+    """Drop items whose identity is already in `seen`."""
+    return [it for it in items if not seen.seen(it)]
+
+def remember(items: Iterable[Dict], seen: SeenSet) -> None:
+    """Add items to `seen` and persist it."""
+    for it in items:
+        seen.add(it)
+    seen.save()
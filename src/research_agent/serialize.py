@@ -0,0 +1,107 @@
+# Serialization layer for result files: the fastest installed JSON encoder (orjson, then
+# msgspec, then the stdlib), pretty (2-space indent) or compact output, and optional
+# gzip/zstd compression. Compressed files get a ".gz"/".zst" suffix; readers look for
+# every variant of a path, so callers never need to know how a run was written.
+from __future__ import annotations
+from typing import Any, IO, Iterator, Optional
+import gzip, io, json, os
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional
+    orjson = None
+try:
+    import msgspec  # type: ignore
+except ImportError:  # pragma: no cover - optional
+    msgspec = None
+
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+COMPRESSIONS = tuple(SUFFIXES)
+
+def backend() -> str:
+    return "orjson" if orjson else "msgspec" if msgspec else "json"
+
+def dumps(obj: Any, compact: bool = False) -> bytes:
+    """UTF-8 JSON (non-ASCII kept as is), 2-space indented unless `compact`."""
+    if orjson is not None:
+        opts = orjson.OPT_NON_STR_KEYS | (0 if compact else orjson.OPT_INDENT_2)
+        return orjson.dumps(obj, option=opts)
+    if msgspec is not None:
+        data = msgspec.json.encode(obj)
+        return data if compact else msgspec.json.format(data, indent=2)
+    if compact:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+def _zstd():
+    try:
+        import zstandard  # type: ignore
+    except ImportError:
+        raise RuntimeError("zstd compression needs the 'zstandard' package (pip install zstandard)")
+    return zstandard
+
+def output_path(path: str, compression: str | None = None) -> str:
+    if compression is None:
+        return path
+    if compression not in SUFFIXES:
+        raise ValueError(f"unknown compression: {compression} (expected one of {', '.join(COMPRESSIONS)})")
+    return path + SUFFIXES[compression]
+
+def open_out(path: str, compression: str | None = None) -> IO[bytes]:
+    """
+    Binary writer for `path` (suffix added for compression). Other variants of the
+    same file are removed so readers never pick up a stale one.
+    """
+    final = output_path(path, compression)
+    for variant in [path] + [path + s for s in SUFFIXES.values()]:
+        if variant != final and os.path.exists(variant):
+            os.remove(variant)
+    if compression == "gzip":
+        return gzip.open(final, "wb", compresslevel=6)
+    if compression == "zstd":
+        fh = open(final, "wb")
+        return _zstd().ZstdCompressor(level=3).stream_writer(fh, closefd=True)
+    return open(final, "wb")
+
+def resolve(path: str) -> Optional[str]:
+    """The existing variant of `path` (plain, .gz or .zst), or None."""
+    for variant in [path] + [path + s for s in SUFFIXES.values()]:
+        if os.path.exists(variant):
+            return variant
+    return None
+
+def open_in(path: str) -> IO[bytes]:
+    """Binary reader for whichever variant of `path` exists (decompressing as needed)."""
+    found = resolve(path)
+    if found is None:
+        raise FileNotFoundError(path)
+    if found.endswith(".gz"):
+        return gzip.open(found, "rb")
+    if found.endswith(".zst"):
+        fh = open(found, "rb")
+        return io.BufferedReader(_zstd().ZstdDecompressor().stream_reader(fh, closefd=True))
+    return open(found, "rb")
+
+def write_json(path: str, data: Any, compact: bool = False, compression: str | None = None) -> str:
+    """Write one JSON document; returns the path actually written."""
+    with open_out(path, compression) as f:
+        f.write(dumps(data, compact))
+    return output_path(path, compression)
+
+def read_json(path: str) -> Any:
+    with open_in(path) as f:
+        return loads(f.read())
+
+def iter_jsonl(path: str) -> Iterator[Any]:
+    """Records of a JSON-lines file such as index.jsonl (any variant)."""
+    with open_in(path) as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
@@ -0,0 +1,223 @@
+# Long-running daemon: JSON-RPC 2.0 over stdio, one JSON message per line.
+# Keeps imports, the pooled HTTP session, recent collect() results and warm Ollama
+# models (keep_alive) across requests, so editor-driven searches skip cold starts.
+#
+# Methods:
+#   ping                                   -> {"ok": true, "uptime": seconds}
+#   collect        {topic, years?, per_source?, sources?, toggles?, adaptive?, budget?}
+#                                          -> {"items": [...]}
+#   score_and_save {topic, items, outdir?, ollama_model?, min_score?, max_papers?, ...}
+#                                          -> {"outbase": path, "saved": n}
+#   search         collect + score_and_save params (+ only_new, seen_scope?, seen_file?)
+#                                          -> {"outbase", "saved", "collected"}
+#   clear_cache                            -> {"ok": true}
+#   shutdown                               -> {"ok": true} (then exits)
+#
+# collect / score_and_save / search with "progress": true also stream notifications
+#   {"jsonrpc": "2.0", "method": "progress", "params": {"request": <request id>, "event": ..., ...}}
+# for the events of events.py, so a front-end can render results while the run continues.
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, IO, List, Optional, Tuple
+import json, sys, threading, time
+
+from .agent import collect, score_and_save
+from .utils import OllamaClient, http_session
+
+_SCORE_KEYS = ("outdir", "ollama_model", "min_score", "max_papers", "save_bibtex", "save_csl",
+               "incremental", "save_colindex", "llm_batch", "llm_context", "abstract_tokens",
+               "llm_band", "llm_top_k", "llm_budget", "storage",
+               "compact_json", "compression")
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+class Daemon:
+    """
+    Request handler with warm state. Thread-safe: requests are served by a small pool
+    so a `ping` is answered while a search is running.
+    """
+    def __init__(self, cache_ttl: float = 600.0, cache_size: int = 32,
+                 keep_alive: str | int | None = "30m", verbose: bool = False,
+                 notify: Optional[Callable[[Dict], None]] = None):
+        self.cache_ttl = cache_ttl
+        self.notify = notify
+        self.cache_size = cache_size
+        self.keep_alive = keep_alive
+        self.verbose = verbose
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Tuple[float, List[Dict]]] = {}
+        self._llms: Dict[str, OllamaClient] = {}
+
+    # ---------- warm state ----------
+    def llm(self, model: str | None) -> Optional[OllamaClient]:
+        if not model:
+            return None
+        with self._lock:
+            client = self._llms.get(model)
+            if client is None:
+                client = OllamaClient(model=model, keep_alive=self.keep_alive)
+                self._llms[model] = client
+                new = True
+            else:
+                new = False
+        if new:
+            client.warm()
+        return client
+
+    def _collect(self, p: Dict) -> List[Dict]:
+        topic = p.get("topic")
+        if not topic:
+            raise RpcError(-32602, "missing 'topic'")
+        years = p.get("years")
+        per_source = int(p.get("per_source", 50))
+        sources = p.get("sources")
+        toggles = {k: bool(v) for k, v in (p.get("toggles") or {}).items()}
+        plan = {k: p[k] for k in ("adaptive", "budget", "page_size", "min_new_ratio") if k in p}
+        key = json.dumps([topic, years, per_source, sources, sorted(toggles.items()), sorted(plan.items())])
+        now = time.time()
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit and now - hit[0] < self.cache_ttl and not p.get("refresh"):
+                return [dict(it) for it in hit[1]]
+        items = collect(topic=topic, years=years, per_source=per_source, sources=sources,
+                        on_event=p.get("_on_event"), verbose=self.verbose, **plan, **toggles)
+        with self._lock:
+            self._cache[key] = (now, items)
+            while len(self._cache) > self.cache_size:
+                oldest = min(self._cache, key=lambda k: self._cache[k][0])
+                del self._cache[oldest]
+        return [dict(it) for it in items]
+
+    def _score_and_save(self, p: Dict, items: List[Dict]) -> Dict:
+        kwargs = {k: p[k] for k in _SCORE_KEYS if k in p}
+        kwargs.setdefault("outdir", "results")
+        if kwargs.get("llm_band") is not None:
+            kwargs["llm_band"] = tuple(kwargs["llm_band"])
+        model = kwargs.pop("ollama_model", None)
+        outbase, saved = score_and_save(topic=p["topic"], items=items, ollama_model=model,
+                                        verbose=self.verbose, llm=self.llm(model),
+                                        on_event=p.get("_on_event"), **kwargs)
+        return {"outbase": outbase, "saved": saved}
+
+    # ---------- methods ----------
+    def rpc_ping(self, p: Dict) -> Dict:
+        return {"ok": True, "uptime": round(time.time() - self.started, 3)}
+
+    def rpc_collect(self, p: Dict) -> Dict:
+        return {"items": self._collect(p)}
+
+    def rpc_score_and_save(self, p: Dict) -> Dict:
+        if not p.get("topic") or not isinstance(p.get("items"), list):
+            raise RpcError(-32602, "'topic' and 'items' are required")
+        return self._score_and_save(p, p["items"])
+
+    def rpc_search(self, p: Dict) -> Dict:
+        items = self._collect(p)
+        seen = None
+        if p.get("only_new"):
+            from .seen import SeenSet, default_seen_path, filter_new
+            seen = SeenSet(p.get("seen_file") or default_seen_path(
+                p.get("outdir", "results"), p["topic"], p.get("seen_scope", "topic")))
+            items = filter_new(items, seen)
+        out = self._score_and_save(p, items) if items else {"outbase": None, "saved": 0}
+        if seen is not None:
+            from .seen import remember
+            remember(items, seen)
+            seen.close()
+        out["collected"] = len(items)
+        return out
+
+    def rpc_clear_cache(self, p: Dict) -> Dict:
+        with self._lock:
+            self._cache.clear()
+        return {"ok": True}
+
+    def handle(self, msg: Dict) -> Optional[Dict]:
+        """Dispatch one JSON-RPC request; returns the response (None for notifications)."""
+        mid = msg.get("id")
+        try:
+            if msg.get("jsonrpc") != "2.0" or not isinstance(msg.get("method"), str):
+                raise RpcError(-32600, "invalid request")
+            fn = getattr(self, "rpc_" + msg["method"], None)
+            if fn is None:
+                raise RpcError(-32601, f"method not found: {msg['method']}")
+            params = msg.get("params") or {}
+            if not isinstance(params, dict):
+                raise RpcError(-32602, "params must be an object")
+            if params.get("progress") and self.notify is not None:
+                params = {**params, "_on_event": lambda ev: self.notify(
+                    {"jsonrpc": "2.0", "method": "progress", "params": {"request": mid, **ev}})}
+            result = fn(params)
+            return None if mid is None else {"jsonrpc": "2.0", "id": mid, "result": result}
+        except RpcError as e:
+            err = {"code": e.code, "message": str(e)}
+        except Exception as e:
+            err = {"code": -32000, "message": f"{type(e).__name__}: {e}"}
+        return None if mid is None else {"jsonrpc": "2.0", "id": mid, "error": err}
+
+def serve_stdio(daemon: Daemon | None = None, stdin: IO[str] | None = None,
+                stdout: IO[str] | None = None, workers: int = 4) -> int:
+    """
+    Serve JSON-RPC requests from stdin until EOF or `shutdown`. Library output that
+    would normally go to stdout is redirected to stderr so it cannot corrupt the stream.
+    """
+    daemon = daemon or Daemon()
+    stdin = stdin or sys.stdin
+    out = stdout or sys.stdout
+    if stdout is None:
+        sys.stdout = sys.stderr
+    write_lock = threading.Lock()
+
+    def reply(resp: Optional[Dict]) -> None:
+        if resp is None:
+            return
+        with write_lock:
+            out.write(json.dumps(resp, ensure_ascii=False) + "\n")
+            out.flush()
+
+    if daemon.notify is None:
+        daemon.notify = reply
+    http_session()  # open the connection pool once, up front
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        for line in stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                reply({"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "parse error"}})
+                continue
+            if not isinstance(msg, dict):
+                reply({"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "invalid request"}})
+                continue
+            if msg.get("method") == "shutdown":
+                if msg.get("id") is not None:
+                    reply({"jsonrpc": "2.0", "id": msg["id"], "result": {"ok": True}})
+                break
+            pool.submit(lambda m=msg: reply(daemon.handle(m)))
+    finally:
+        pool.shutdown(wait=True)
+        if stdout is None:
+            sys.stdout = out
+    return 0
+
+def main(argv: List[str] | None = None) -> int:
+    import argparse
+    p = argparse.ArgumentParser(description="Research agent daemon (JSON-RPC 2.0 over stdio).")
+    p.add_argument("--cache-ttl", type=float, default=600.0, help="Seconds to reuse collect() results")
+    p.add_argument("--keep-alive", default="30m", help="Ollama keep_alive for loaded models")
+    p.add_argument("--workers", type=int, default=4, help="Concurrent requests")
+    p.add_argument("--verbose", action="store_true", help="Verbose logging (stderr)")
+    args = p.parse_args(argv)
+    keep_alive = int(args.keep_alive) if args.keep_alive.lstrip("-").isdigit() else args.keep_alive
+    return serve_stdio(Daemon(cache_ttl=args.cache_ttl, keep_alive=keep_alive,
+                              verbose=args.verbose), workers=args.workers)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,196 @@
+# Citation-graph snowballing: starting from the best seed papers, follow references
+# (OpenAlex `referenced_works`, already in source_payload) and citations (`cites:`)
+# for a few hops. Lookups are batched, many ids per /works request, and the works and
+# citation queries are cached on disk so repeated expansions barely touch the API.
+from __future__ import annotations
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Set
+import json, sqlite3, sys, time
+
+from .seen import identity_keys, normalize_doi
+from .utils import cache_dir
+
+BATCH = 50  # ids per OR-filter (OpenAlex accepts up to 100 values)
+
+def _short(oid) -> str:
+    """'https://openalex.org/W123' -> 'W123'."""
+    return str(oid or "").rsplit("/", 1)[-1]
+
+class WorkCache:
+    """
+    SQLite cache of raw OpenAlex works (by id) and of citation queries (filter -> ids).
+    Works do not expire; citation lists do after `ttl_days` since new papers keep citing.
+    """
+    def __init__(self, path: str | None = None, ttl_days: float = 30.0):
+        self.path = path or cache_dir("openalex_works.sqlite")
+        self.ttl = ttl_days * 86400
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS works (id TEXT PRIMARY KEY, body TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS queries (key TEXT PRIMARY KEY, ids TEXT, fetched REAL)")
+
+    def get_works(self, ids: List[str]) -> Dict[str, dict]:
+        found: Dict[str, dict] = {}
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            q = f"SELECT id, body FROM works WHERE id IN ({','.join('?' * len(chunk))})"
+            for wid, body in self.conn.execute(q, chunk):
+                found[wid] = json.loads(body)
+        return found
+
+    def put_works(self, works: Iterable[dict]) -> None:
+        self.conn.executemany("INSERT OR REPLACE INTO works VALUES (?, ?)",
+                              [(_short(w.get("id")), json.dumps(w)) for w in works if w.get("id")])
+        self.conn.commit()
+
+    def get_query(self, key: str) -> Optional[List[str]]:
+        row = self.conn.execute("SELECT ids, fetched FROM queries WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def put_query(self, key: str, ids: List[str]) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO queries VALUES (?, ?, ?)", (key, json.dumps(ids), time.time()))
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "WorkCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def _default_fetch():
+    from .sources.openalex_source import fetch_openalex_works
+    return fetch_openalex_works
+
+def _records(payloads: Iterable[dict]) -> List[Dict]:
+    from .sources.openalex_source import _to_record
+    return [_to_record(w) for w in payloads]
+
+def lookup_ids(ids: List[str], cache: WorkCache | None, fetch: Callable) -> List[Dict]:
+    """Records for OpenAlex ids: cached ones first, the rest in batched OR lookups."""
+    ids = [_short(i) for i in ids]
+    cached = cache.get_works(ids) if cache else {}
+    out = _records(cached[i] for i in ids if i in cached)
+    missing = [i for i in ids if i not in cached]
+    for b in range(0, len(missing), BATCH):
+        batch = missing[b:b + BATCH]
+        recs = fetch("openalex_id:" + "|".join(batch), per_page=len(batch))
+        if cache:
+            cache.put_works(r["source_payload"] for r in recs)
+        out += recs
+    return out
+
+def _citing(ids: List[str], limit: int, y1: int | None, y2: int | None,
+            cache: WorkCache | None, fetch: Callable) -> List[Dict]:
+    """Most-cited works citing any of `ids` (one batched request, cached)."""
+    expr = "cites:" + "|".join(sorted(ids))
+    key = f"{expr};{y1}-{y2};{limit}"
+    hit = cache.get_query(key) if cache else None
+    if hit is not None:
+        return lookup_ids(hit, cache, fetch)
+    recs = fetch(expr, per_page=limit, year_from=y1, year_to=y2, sort="cited_by_count:desc")
+    if cache:
+        cache.put_works(r["source_payload"] for r in recs)
+        cache.put_query(key, [_short(r.get("openalex_id")) for r in recs])
+    return recs
+
+def _resolve_seeds(seeds: List[Dict], cache: WorkCache | None, fetch: Callable) -> List[Dict]:
+    """Seeds as OpenAlex records with a payload: reuse theirs, else look them up by id or DOI."""
+    layer, by_id, by_doi = [], [], []
+    for s in seeds:
+        payload = s.get("source_payload")
+        if s.get("source") == "openalex" and isinstance(payload, dict) and "referenced_works" in payload:
+            layer.append(s)
+        elif s.get("openalex_id"):
+            by_id.append(_short(s["openalex_id"]))
+        elif s.get("doi") and not any(c in s["doi"] for c in ",|"):
+            by_doi.append(normalize_doi(s["doi"]))
+    layer += lookup_ids(by_id, cache, fetch)
+    for b in range(0, len(by_doi), BATCH):
+        batch = by_doi[b:b + BATCH]
+        recs = fetch("doi:" + "|".join(batch), per_page=len(batch))
+        if cache:
+            cache.put_works(r["source_payload"] for r in recs)
+        layer += recs
+    return layer
+
+def snowball(seeds: List[Dict], *, hops: int = 1, per_hop: int = 200, direction: str = "both",
+             year_from: int | None = None, year_to: int | None = None,
+             known: Iterable[Dict] = (), cache: WorkCache | None = None,
+             fetch: Callable | None = None, verbose: bool = False) -> List[Dict]:
+    """
+    Expand `seeds` along the citation graph for `hops` hops and return the new records
+    (not in `known` nor in the seeds), each tagged with "snowball": {"hop", "via"}.
+    - references: ids cited by the current frontier, most frequently cited first
+    - citations: works citing the frontier, most cited first
+    At most `per_hop` new records are added per hop; they form the next frontier.
+    """
+    fetch = fetch or _default_fetch()
+    keys: Set[str] = set()
+    for it in list(known) + list(seeds):
+        keys.update(identity_keys(it))
+    layer = _resolve_seeds(seeds, cache, fetch)
+    visited = {_short(r.get("openalex_id")) for r in layer}
+    out: List[Dict] = []
+
+    for hop in range(1, hops + 1):
+        new: List[Dict] = []
+
+        def take(recs: List[Dict], via: str) -> None:
+            for r in recs:
+                if len(new) >= per_hop:
+                    return
+                visited.add(_short(r.get("openalex_id")))
+                y = r.get("year")
+                if y and ((year_from and y < year_from) or (year_to and y > year_to)):
+                    continue
+                ks = identity_keys(r)
+                if any(k in keys for k in ks):
+                    continue
+                keys.update(ks)
+                r["snowball"] = {"hop": hop, "via": via}
+                new.append(r)
+
+        if direction in ("both", "references"):
+            counts = Counter(_short(ref) for r in layer
+                             for ref in (r.get("source_payload") or {}).get("referenced_works") or [])
+            ids = [i for i, _ in counts.most_common() if i not in visited][:per_hop]
+            try:
+                take(lookup_ids(ids, cache, fetch), "references")
+            except Exception as e:
+                print(f"[warn] Snowball references (hop {hop}) failed: {e}", file=sys.stderr)
+
+        if direction in ("both", "citations"):
+            frontier = sorted({_short(r.get("openalex_id")) for r in layer} - {""})
+            for b in range(0, len(frontier), BATCH):
+                room = per_hop - len(new)
+                if room <= 0:
+                    break
+                try:
+                    take(_citing(frontier[b:b + BATCH], min(room, 200), year_from, year_to, cache, fetch), "citations")
+                except Exception as e:
+                    print(f"[warn] Snowball citations (hop {hop}) failed: {e}", file=sys.stderr)
+                    break
+
+        if verbose:
+            print(f"[info] Snowball hop {hop}: {len(new)} new paper(s).", flush=True)
+        out += new
+        layer = new
+        if not layer:
+            break
+    return out
+
+def expand(topic: str, items: List[Dict], *, seeds: int = 20, **kwargs) -> List[Dict]:
+    """
+    Snowball from the `seeds` best items by keyword score and return `items` plus the
+    new papers, deduplicated like collect() (the collected record wins, and the id map
+    catches duplicates known under another identifier). kwargs go to snowball().
+    """
+    from .agent import _normalize_and_dedup
+    from .scoring import base_score
+    top = sorted(items, key=lambda it: base_score(topic, it), reverse=True)[:seeds]
+    new = snowball(top, known=items, **kwargs)
+    return _normalize_and_dedup(items + new) if new else items
@@ -1,7 +1,9 @@
 # arXiv source (Atom feed). We parse with the stdlib XML parser.
 from __future__ import annotations
 from typing import List, Dict
-import requests, xml.etree.ElementTree as ET
+import datetime
+import xml.etree.ElementTree as ET
+from ..resilience import source_get
 
 ARXIV_API = "https://export.arxiv.org/api/query"
 
@@ -9,17 +11,26 @@ def _text(elem, tag, ns):
     node = elem.find(tag, ns)
     return (node.text or "").strip() if node is not None and node.text else ""
 
-def search_arxiv(query: str, max_results: int = 50, year_from: int | None = None, year_to: int | None = None) -> List[Dict]:
+def search_arxiv(query: str, max_results: int = 50, year_from: int | None = None, year_to: int | None = None,
+                 start: int = 0, since: str | None = None) -> List[Dict]:
     # Conservative AND between terms; you can improve this if needed.
     terms = " AND ".join([t for t in query.split() if t.strip()])
+    search = f"all:{terms}"
+    if year_from or year_to:
+        # year range pushed down as a submission-date window
+        last = year_to or datetime.date.today().year
+        search += f" AND submittedDate:[{year_from or 1991}01010000 TO {last}12312359]"
     params = {
-        "search_query": f"all:{terms}",
-        "start": 0,
+        "search_query": search,
+        "start": start,
         "max_results": max_results,
         "sortBy": "relevance",
         "sortOrder": "descending",
     }
-    r = requests.get(ARXIV_API, params=params, timeout=40, headers={"User-Agent":"research-agent/0.3"})
+    if since:
+        # delta fetch: newest submissions first, stop at the first one older than `since`
+        params["sortBy"] = "submittedDate"
+    r = source_get("arxiv", ARXIV_API, params=params, headers={"User-Agent":"research-agent/0.3"})
     r.raise_for_status()
 
     root = ET.fromstring(r.text)
@@ -30,6 +41,8 @@ def search_arxiv(query: str, max_results: int = 50, year_from: int | None = None
         summary = _text(entry, "a:summary", ns)
         page = _text(entry, "a:id", ns)
         published = _text(entry, "a:published", ns)
+        if since and published and published[:10] < since:
+            break
         year = None
         if published:
             try:
@@ -46,11 +59,6 @@ def search_arxiv(query: str, max_results: int = 50, year_from: int | None = None
 
         arxiv_id = page.rsplit("/",1)[-1] if page else ""
 
-        if year_from and year and year < year_from: 
-            continue
-        if year_to and year and year > year_to: 
-            continue
-
         authors = []
         for a in entry.findall("a:author", ns):
             nm = _text(a, "a:name", ns)
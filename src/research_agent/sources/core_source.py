@@ -1,18 +1,25 @@
 from __future__ import annotations
 from typing import List, Dict
-import requests
+from ..resilience import source_get
 
 CORE_API = "https://core.ac.uk:443/api-v3/search/works"
 
 def search_core(query: str, max_results: int = 50,
                 year_from: int | None = None,
-                year_to: int | None = None) -> List[Dict]:
+                year_to: int | None = None,
+                start: int = 0) -> List[Dict]:
     """
     Search CORE (global open access aggregator).
     API docs: https://core.ac.uk/services#api
     """
-    params = {"q": query, "limit": max_results}
-    r = requests.get(CORE_API, params=params, timeout=40)
+    clauses = [f"({query})"]
+    if year_from:
+        clauses.append(f"yearPublished>={year_from}")
+    if year_to:
+        clauses.append(f"yearPublished<={year_to}")
+    q = " AND ".join(clauses) if len(clauses) > 1 else query
+    params = {"q": q, "limit": max_results, "offset": start}
+    r = source_get("core", CORE_API, params=params)
     r.raise_for_status()
     data = r.json()
 
@@ -20,10 +27,6 @@ def search_core(query: str, max_results: int = 50,
     for it in data.get("results", []):
         meta = it.get("metadata", {})
         year = int(meta.get("publishedDate", "")[:4]) if meta.get("publishedDate") else None
-        if year_from and year and year < year_from:
-            continue
-        if year_to and year and year > year_to:
-            continue
         authors = [{"name": a} for a in (meta.get("authors") or [])]
         out.append({
             "title": meta.get("title", ""),
@@ -1,15 +1,17 @@
 # Crossref (optional) — useful for finding DOIs and publisher landing pages.
 from __future__ import annotations
 from typing import List, Dict
-import requests
+from ..resilience import source_get
 
 CROSSREF_API = "https://api.crossref.org/works"
 
 def search_crossref(query: str, max_results: int = 50,
-                    year_from: int | None = None, year_to: int | None = None) -> List[Dict]:
+                    year_from: int | None = None, year_to: int | None = None,
+                    start: int = 0, since: str | None = None) -> List[Dict]:
     params = {
         "query": query,
         "rows": max_results,
+        "offset": start,
         "select": ",".join(["title","author","issued","DOI","URL","type"]),
         "sort": "relevance",
         "filter": "type:journal-article",
@@ -19,9 +21,12 @@ def search_crossref(query: str, max_results: int = 50,
         filters.append(f"from-pub-date:{year_from}-01-01")
     if year_to:
         filters.append(f"until-pub-date:{year_to}-12-31")
+    if since:
+        # delta fetch: records indexed (created or updated) since the last run
+        filters.append(f"from-index-date:{since}")
     params["filter"] = ",".join(filters)
 
-    r = requests.get(CROSSREF_API, params=params, timeout=40, headers={"User-Agent":"research-agent/0.3"})
+    r = source_get("crossref", CROSSREF_API, params=params, headers={"User-Agent":"research-agent/0.3"})
     r.raise_for_status()
     data = r.json()
     out: List[Dict] = []
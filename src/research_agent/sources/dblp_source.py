@@ -1,6 +1,7 @@
 from __future__ import annotations
 from typing import List, Dict, Union
-import requests
+import datetime
+from ..resilience import source_get
 
 DBLP_API = "https://dblp.org/search/publ/api"
 
@@ -26,15 +27,31 @@ def _authors_from_info(info: Dict) -> List[Dict[str, str]]:
             authors.append({"name": name})
     return authors
 
+MAX_YEAR_TERMS = 25
+
+def _year_terms(year_from: int | None, year_to: int | None) -> str:
+    """
+    DBLP has no range syntax, only exact `year:YYYY:` facets OR-ed with `|`; open or
+    very wide ranges are left to the client-side filter.
+    """
+    if not year_from:
+        return ""
+    last = year_to or datetime.date.today().year
+    if last < year_from or last - year_from + 1 > MAX_YEAR_TERMS:
+        return ""
+    return "|".join(f"year:{y}:" for y in range(year_from, last + 1))
+
 def search_dblp(query: str, max_results: int = 50,
                 year_from: int | None = None,
-                year_to: int | None = None) -> List[Dict]:
+                year_to: int | None = None,
+                start: int = 0) -> List[Dict]:
     """
     Search DBLP (computer science) publications.
     API: https://dblp.org/faq/13501473.html
     """
-    params = {"q": query, "h": max_results, "format": "json"}
-    r = requests.get(DBLP_API, params=params, timeout=40, headers={"User-Agent": "research-agent/0.4"})
+    years = _year_terms(year_from, year_to)
+    params = {"q": f"{query} {years}" if years else query, "h": max_results, "f": start, "format": "json"}
+    r = source_get("dblp", DBLP_API, params=params, headers={"User-Agent": "research-agent/0.4"})
     r.raise_for_status()
     data = r.json()
 
@@ -43,6 +60,7 @@ def search_dblp(query: str, max_results: int = 50,
     for h in hits:
         info = h.get("info", {})
         year = int(info.get("year")) if info.get("year") else None
+        # client-side fallback (no-op when the range went into the query)
         if year_from and year and year < year_from:
             continue
         if year_to and year and year > year_to:
@@ -1,18 +1,23 @@
 from __future__ import annotations
 from typing import List, Dict
-import requests
+from ..resilience import source_get
 
 DOAJ_API = "https://doaj.org/api/v2/search/articles/"
 
 def search_doaj(query: str, max_results: int = 50,
                 year_from: int | None = None,
-                year_to: int | None = None) -> List[Dict]:
+                year_to: int | None = None,
+                start: int = 0) -> List[Dict]:
     """
     Search DOAJ (Directory of Open Access Journals).
     API docs: https://doaj.org/api/v2/docs
     """
-    params = {"q": query, "pageSize": max_results}
-    r = requests.get(DOAJ_API, params=params, timeout=40)
+    # DOAJ pages are 1-based; `start` is expected to be a multiple of max_results
+    q = query
+    if year_from or year_to:
+        q = f"({query}) AND bibjson.year:[{year_from or '*'} TO {year_to or '*'}]"
+    params = {"q": q, "pageSize": max_results, "page": start // max(1, max_results) + 1}
+    r = source_get("doaj", DOAJ_API, params=params)
     r.raise_for_status()
     data = r.json()
 
@@ -20,10 +25,6 @@ def search_doaj(query: str, max_results: int = 50,
     for it in data.get("results", []):
         bib = it.get("bibjson", {})
         year = int(bib.get("year")) if bib.get("year") else None
-        if year_from and year and year < year_from:
-            continue
-        if year_to and year and year > year_to:
-            continue
         authors = [{"name": a.get("name")} for a in bib.get("author", [])]
         out.append({
             "title": bib.get("title", ""),
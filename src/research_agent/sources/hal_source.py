@@ -1,14 +1,15 @@
 # HAL (France open archive) search.
 from __future__ import annotations
 from typing import List, Dict
-import requests
+from ..resilience import source_get
 
 HAL_API = "https://api.archives-ouvertes.fr/search/halshs/"
 
 def search_hal(query: str, max_results: int = 50,
-               year_from: int | None = None, year_to: int | None = None) -> List[Dict]:
+               year_from: int | None = None, year_to: int | None = None,
+               start: int = 0) -> List[Dict]:
     # HAL query: q= and fl= (fields)
-    # We'll query title + abstract for relevance; filter by years via fq= if provided.
+    # We'll query title + abstract for relevance; years are filtered server-side via fq=.
     fields = ",".join([
         "title_s", "abstract_s", "authFullName_s", "docid", "doiId_s", "producedDateY_i",
         "uri_s", "fileMain_s"
@@ -16,20 +17,14 @@ def search_hal(query: str, max_results: int = 50,
     params = {
         "q": f"(title_t:({query})) OR (abstract_s:({query}))",
         "rows": max_results,
+        "start": start,
         "fl": fields,
         "sort": "score desc",
         "wt": "json"
     }
-    fqs = []
-    if year_from is not None:
-        fqs.append(f"producedDateY_i:[{year_from} TO *]")
-    if year_to is not None:
-        fqs.append(f"producedDateY_i:[* TO {year_to}]")
-    if fqs:
-        # HAL accepts fq multiple times; we can join
-        # requests will encode lists to repeated params if we pass a list
-        pass
-    r = requests.get(HAL_API, params=params, timeout=40, headers={"User-Agent":"research-agent/0.4"})
+    if year_from is not None or year_to is not None:
+        params["fq"] = f"producedDateY_i:[{year_from or '*'} TO {year_to or '*'}]"
+    r = source_get("hal", HAL_API, params=params, headers={"User-Agent":"research-agent/0.4"})
     r.raise_for_status()
     data = r.json()
 
@@ -37,10 +32,6 @@ def search_hal(query: str, max_results: int = 50,
     out: List[Dict] = []
     for d in docs:
         year = d.get("producedDateY_i")
-        if year_from and year and year < year_from:
-            continue
-        if year_to and year and year > year_to:
-            continue
         authors = [{"name": a} for a in (d.get("authFullName_s") or [])]
         out.append({
             "title": (d.get("title_s") or [""])[0],
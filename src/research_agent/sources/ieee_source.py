@@ -1,12 +1,14 @@
 from __future__ import annotations
 from typing import List, Dict
-import os, requests
+import os
+from ..resilience import source_get
 
 IEEE_API = "https://ieeexploreapi.ieee.org/api/v1/search/articles"
 
 def search_ieee(query: str, max_results: int = 50,
                 year_from: int | None = None,
-                year_to: int | None = None) -> List[Dict]:
+                year_to: int | None = None,
+                start: int = 0) -> List[Dict]:
     """
     IEEE Xplore search.
     Requires: export IEEE_API_KEY=your_key
@@ -16,8 +18,13 @@ def search_ieee(query: str, max_results: int = 50,
     if not key:
         raise RuntimeError("IEEE_API_KEY not set")
 
-    params = {"apikey": key, "querytext": query, "max_records": max_results, "format": "json"}
-    r = requests.get(IEEE_API, params=params, timeout=40)
+    params = {"apikey": key, "querytext": query, "max_records": max_results,
+              "start_record": start + 1, "format": "json"}
+    if year_from:
+        params["start_year"] = year_from
+    if year_to:
+        params["end_year"] = year_to
+    r = source_get("ieee", IEEE_API, params=params, hedge=False)  # billed per request
     r.raise_for_status()
     data = r.json()
 
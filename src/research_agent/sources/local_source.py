@@ -0,0 +1,232 @@
+# Offline source: full-text search over a local SQLite FTS5 index built from bulk
+# metadata dumps, with no network at query time.
+# - OpenAlex works snapshot: JSON lines of works (data/works/**/part_*.gz)
+# - arXiv: OAI-PMH XML (arXiv or oai_dc metadata) or the JSON-lines metadata snapshot
+# Dumps are streamed record by record (gzip is fine), so ingestion memory stays flat.
+# The index lives in $RESEARCH_AGENT_LOCAL_INDEX (default: local_index.sqlite in the
+# cache dir); records keep the usual dict shape, so they dedup against online results.
+from __future__ import annotations
+from typing import Dict, Iterable, Iterator, List, Optional
+import gzip, json, os, re, sqlite3
+import xml.etree.ElementTree as ET
+
+from ..utils import cache_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS works (
+    id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, year INTEGER, venue TEXT,
+    title TEXT NOT NULL, abstract TEXT NOT NULL, record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS works_year ON works (year);
+CREATE INDEX IF NOT EXISTS works_venue ON works (venue COLLATE NOCASE);
+CREATE VIRTUAL TABLE IF NOT EXISTS works_fts USING fts5(
+    title, abstract, content='works', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS works_ai AFTER INSERT ON works BEGIN
+    INSERT INTO works_fts (rowid, title, abstract) VALUES (new.id, new.title, new.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS works_ad AFTER DELETE ON works BEGIN
+    INSERT INTO works_fts (works_fts, rowid, title, abstract) VALUES ('delete', old.id, old.title, old.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS works_au AFTER UPDATE ON works BEGIN
+    INSERT INTO works_fts (works_fts, rowid, title, abstract) VALUES ('delete', old.id, old.title, old.abstract);
+    INSERT INTO works_fts (rowid, title, abstract) VALUES (new.id, new.title, new.abstract);
+END;
+"""
+
+FORMATS = ("openalex", "arxiv-oai", "arxiv-json")
+
+def index_path() -> str:
+    return os.getenv("RESEARCH_AGENT_LOCAL_INDEX") or cache_dir("local_index.sqlite")
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+# ---------- Ingestion ----------
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+def _files(paths: Iterable[str]) -> Iterator[str]:
+    for p in paths:
+        if os.path.isdir(p):
+            for root, dirs, names in os.walk(p):
+                dirs.sort()
+                for n in sorted(names):
+                    if re.search(r"\.(jsonl?|xml)(\.gz)?$|^part_\d+\.gz$", n):
+                        yield os.path.join(root, n)
+        else:
+            yield p
+
+def _detect(path: str) -> str:
+    with _open(path) as f:
+        head = f.read(4096).lstrip()
+    if head.startswith(b"<"):
+        return "arxiv-oai"
+    return "arxiv-json" if b'"journal-ref"' in head or b'"versions"' in head else "openalex"
+
+def _openalex_records(f) -> Iterator[Dict]:
+    from .openalex_source import _to_record
+    for line in f:
+        if not line.strip():
+            continue
+        w = json.loads(line)
+        rec = _to_record(w)
+        rec["venue"] = rec["venue"] or (((w.get("primary_location") or {}).get("source")) or {}).get("display_name")
+        rec["source_payload"] = {"dump": "openalex"}
+        yield rec
+
+def _arxiv_record(arxiv_id: str, title: str, abstract: str, authors: List[str], year,
+                  doi: Optional[str], venue: Optional[str]) -> Dict:
+    arxiv_id = re.sub(r"^(oai:arXiv\.org:|https?://arxiv\.org/abs/)", "", arxiv_id or "")
+    return {
+        "title": " ".join((title or "").split()),
+        "abstract": " ".join((abstract or "").split()),
+        "year": year,
+        "url_pdf": f"https://arxiv.org/pdf/{arxiv_id}" if arxiv_id else "",
+        "url_page": f"https://arxiv.org/abs/{arxiv_id}" if arxiv_id else "",
+        "arxiv_id": arxiv_id,
+        "doi": doi or None,
+        "venue": venue or "arXiv",
+        "authors": [{"name": a} for a in authors if a],
+        "source": "local",
+        "source_payload": {"dump": "arxiv"},
+    }
+
+def _year(date: str | None):
+    """First plausible year in a date string ("2007-04-02", "Mon, 2 Apr 2007 ...")."""
+    m = re.search(r"\b(1[89]|20)\d\d\b", date or "")
+    return int(m.group(0)) if m else None
+
+def _arxiv_json_records(f) -> Iterator[Dict]:
+    for line in f:
+        if not line.strip():
+            continue
+        m = json.loads(line)
+        created = (m.get("versions") or [{}])[0].get("created")  # first version
+        year = _year(created) or _year(m.get("update_date"))
+        authors = [" ".join(p for p in (a[1], a[0]) if p) for a in (m.get("authors_parsed") or [])]
+        if not authors:
+            authors = [a.strip() for a in re.split(r",| and ", m.get("authors") or "")]
+        yield _arxiv_record(m.get("id"), m.get("title"), m.get("abstract"), authors, year,
+                            m.get("doi"), m.get("journal-ref"))
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def _arxiv_oai_records(f) -> Iterator[Dict]:
+    for _, elem in ET.iterparse(f, events=("end",)):
+        if _local(elem.tag) != "record":
+            continue
+        fields: Dict[str, List[str]] = {}
+        for node in elem.iter():
+            name = _local(node.tag)
+            if name == "author" and len(node):
+                parts = {_local(c.tag): (c.text or "").strip() for c in node}
+                fields.setdefault("creator", []).append(
+                    " ".join(p for p in (parts.get("forenames"), parts.get("keyname")) if p))
+            elif node.text and node.text.strip() and not len(node):
+                fields.setdefault(name, []).append(node.text.strip())
+        elem.clear()
+        if "title" not in fields:
+            continue  # deleted record
+        one = lambda k: (fields.get(k) or [None])[0]
+        idents = fields.get("identifier", [])
+        # arXiv format has <id>; oai_dc lists the abs URL (and "doi:...") as identifiers
+        ident = one("id") or next((i for i in idents if "arxiv.org/abs/" in i), one("identifier"))
+        doi = one("doi") or next((i[4:] for i in idents if i.startswith("doi:")), None)
+        yield _arxiv_record(ident, one("title"), one("abstract") or one("description"),
+                            fields.get("creator", []), _year(one("created") or one("date")),
+                            doi, one("journal-ref"))
+
+def _records(path: str, fmt: str) -> Iterator[Dict]:
+    parse = {"openalex": _openalex_records, "arxiv-oai": _arxiv_oai_records,
+             "arxiv-json": _arxiv_json_records}[fmt]
+    with _open(path) as f:
+        yield from parse(f)
+
+def _key(rec: Dict) -> str:
+    for k in ("doi", "arxiv_id", "openalex_id"):
+        if rec.get(k):
+            return k + ":" + str(rec[k]).lower()
+    return "title:" + rec["title"].lower()[:160]
+
+def ingest(paths: Iterable[str], path: str | None = None, fmt: str | None = None,
+           batch: int = 5000, verbose: bool = False) -> int:
+    """
+    Stream dump files (or directories of them) into the index; returns the number of
+    records written. A record already in the index (same DOI / arXiv id / OpenAlex id)
+    is replaced. `fmt` is one of FORMATS, or detected per file.
+    """
+    conn = _connect(path or index_path())
+    conn.execute("PRAGMA synchronous=OFF")
+    sql = ("INSERT INTO works (key, year, venue, title, abstract, record) VALUES (?, ?, ?, ?, ?, ?) "
+           "ON CONFLICT (key) DO UPDATE SET year = excluded.year, venue = excluded.venue, "
+           "title = excluded.title, abstract = excluded.abstract, record = excluded.record")
+    total = 0
+    try:
+        for fpath in _files(paths):
+            kind = fmt or _detect(fpath)
+            if verbose: print(f"[info] Ingesting {fpath} ({kind})…", flush=True)
+            rows = []
+            for rec in _records(fpath, kind):
+                if not rec.get("title"):
+                    continue
+                rec["source"] = "local"
+                rows.append((_key(rec), rec.get("year"), rec.get("venue"), rec["title"],
+                             rec.get("abstract") or "", json.dumps(rec, ensure_ascii=False)))
+                if len(rows) >= batch:
+                    with conn:
+                        conn.executemany(sql, rows)
+                    total += len(rows)
+                    rows = []
+            with conn:
+                conn.executemany(sql, rows)
+            total += len(rows)
+            if verbose: print(f"[info] {total} records indexed so far.", flush=True)
+        conn.execute("INSERT INTO works_fts (works_fts) VALUES ('optimize')")
+        conn.commit()
+    finally:
+        conn.close()
+    return total
+
+# ---------- Search ----------
+_conns: Dict[str, sqlite3.Connection] = {}
+
+def _reader() -> sqlite3.Connection:
+    path = index_path()
+    if path not in _conns:
+        if not os.path.exists(path):
+            raise RuntimeError(f"local index {path} not found (build it with --ingest DUMP...)")
+        _conns[path] = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    return _conns[path]
+
+def _where(query: str, year_from: int | None, year_to: int | None, venue: str | None):
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        raise ValueError("empty query")
+    clauses, args = ["works_fts MATCH ?"], [" ".join('"' + t + '"' for t in terms)]
+    if year_from:
+        clauses.append("w.year >= ?"); args.append(year_from)
+    if year_to:
+        clauses.append("w.year <= ?"); args.append(year_to)
+    if venue:
+        clauses.append("w.venue LIKE ?"); args.append(venue + "%")
+    return " AND ".join(clauses), args
+
+def search_local(query: str, max_results: int = 50, year_from: int | None = None,
+                 year_to: int | None = None, start: int = 0, venue: str | None = None) -> List[Dict]:
+    """BM25-ranked matches (title weighted over abstract); `venue` is a case-insensitive prefix."""
+    where, args = _where(query, year_from, year_to, venue)
+    rows = _reader().execute(
+        "SELECT w.record FROM works_fts JOIN works w ON w.id = works_fts.rowid "
+        f"WHERE {where} ORDER BY bm25(works_fts, 3.0, 1.0) LIMIT ? OFFSET ?",
+        args + [max_results, start])
+    return [json.loads(r[0]) for r in rows]
+
+def count_local(query: str, year_from: int | None = None, year_to: int | None = None) -> int:
+    where, args = _where(query, year_from, year_to, None)
+    return _reader().execute(
+        f"SELECT COUNT(*) FROM works_fts JOIN works w ON w.id = works_fts.rowid WHERE {where}", args).fetchone()[0]
@@ -2,6 +2,7 @@
 from __future__ import annotations
 from typing import List, Dict, Optional
 import os, time, requests
+from ..resilience import source_get
 
 OPENALEX = "https://api.openalex.org/works"
 
@@ -17,13 +18,14 @@ def _reconstruct_abstract(inv_idx: Optional[dict]) -> str:
     positions.sort(key=lambda x: x[0])
     return " ".join(w for _, w in positions)
 
-def _request_with_retries(params: dict, headers: dict, retries: int = 5) -> requests.Response:
+def _request_with_retries(params: dict, headers: dict, retries: int = 5,
+                          kind: str = "page") -> requests.Response:
     """
     Friendly backoff for 403/429/5xx. OpenAlex appreciates: mailto + good UA + not bursting.
     """
     delay = 1.0
     for attempt in range(1, retries + 1):
-        r = requests.get(OPENALEX, params=params, headers=headers, timeout=40)
+        r = source_get("openalex", OPENALEX, params=params, headers=headers, kind=kind)
         if r.status_code < 400:
             return r
         if r.status_code in (403, 429) or 500 <= r.status_code < 600:
@@ -37,12 +39,8 @@ def _request_with_retries(params: dict, headers: dict, retries: int = 5) -> requ
     r.raise_for_status()
     return r  # to satisfy type checker
 
-def search_openalex(
-    query: str,
-    max_results: int = 50,
-    year_from: int | None = None,
-    year_to: int | None = None,
-) -> List[Dict]:
+def _base_params(query: str, year_from: int | None, year_to: int | None,
+                 since: str | None = None) -> tuple[dict, dict]:
     # Email helps OpenAlex contact if needed. Recommended.
     mailto = os.getenv("OPENALEX_MAILTO", "").strip()
 
@@ -52,15 +50,14 @@ def search_openalex(
         filters.append(f"from_publication_date:{year_from}-01-01")
     if year_to:
         filters.append(f"to_publication_date:{year_to}-12-31")
+    if since:
+        # delta fetch: only works added to OpenAlex since the last run
+        filters.append(f"from_created_date:{since}")
 
-    params = {
+    params = {}
+    if query:
         # Full-text search across metadata
-        "search": query,
-        # Try modest page size while testing. You can raise later.
-        "per_page": max(1, min(max_results, 200)),
-        # Strongly relevant first
-        "sort": "relevance_score:desc",
-    }
+        params["search"] = query
     if filters:
         params["filter"] = ",".join(filters)
     if mailto:
@@ -71,32 +68,72 @@ def search_openalex(
         "User-Agent": f"research-agent/0.4 (+https://example.org; mailto:{mailto or 'contact@example.org'})",
         "Accept": "application/json",
     }
+    return params, headers
+
+def count_openalex(query: str, year_from: int | None = None, year_to: int | None = None) -> int:
+    """Total hits for the query (meta.count of a one-record page)."""
+    params, headers = _base_params(query, year_from, year_to)
+    params.update({"per_page": 1, "select": "id"})
+    r = _request_with_retries(params, headers, retries=3, kind="count")
+    return int((r.json().get("meta") or {}).get("count") or 0)
+
+def search_openalex(
+    query: str,
+    max_results: int = 50,
+    year_from: int | None = None,
+    year_to: int | None = None,
+    start: int = 0,
+    since: str | None = None,
+) -> List[Dict]:
+    params, headers = _base_params(query, year_from, year_to, since)
+    per_page = max(1, min(max_results, 200))
+    # Try modest page size while testing. You can raise later.
+    params["per_page"] = per_page
+    # Strongly relevant first
+    params["sort"] = "relevance_score:desc"
+    if start:
+        # OpenAlex pages are 1-based; `start` is expected to be a multiple of max_results
+        params["page"] = start // per_page + 1
 
     r = _request_with_retries(params, headers, retries=5)
     data = r.json()
 
-    out: List[Dict] = []
-    for w in data.get("results", []):
-        title = w.get("title") or ""
-        year = w.get("publication_year")
-        doi = (w.get("ids") or {}).get("doi")
-        url_page = (w.get("primary_location") or {}).get("landing_page_url") or (w.get("host_venue") or {}).get("url") or ""
-        url_pdf = (w.get("primary_location") or {}).get("pdf_url") or ""
-        authors = [{"name": a.get("author", {}).get("display_name","")} for a in (w.get("authorships") or [])]
-        abstract = _reconstruct_abstract(w.get("abstract_inverted_index"))
-        venue = (w.get("host_venue") or {}).get("display_name")
+    return [_to_record(w) for w in data.get("results", [])]
+
+def fetch_openalex_works(filter_expr: str, per_page: int = 200, year_from: int | None = None,
+                         year_to: int | None = None, sort: str | None = None) -> List[Dict]:
+    """
+    One filtered /works request, e.g. filter_expr="openalex_id:W1|W2" (batched id lookup)
+    or "cites:W1|W2" (works citing any of them). Returns records like search_openalex.
+    """
+    params, headers = _base_params("", year_from, year_to)
+    params["filter"] = ",".join(f for f in (params.get("filter"), filter_expr) if f)
+    params["per_page"] = max(1, min(per_page, 200))
+    if sort:
+        params["sort"] = sort
+    r = _request_with_retries(params, headers, retries=5)
+    return [_to_record(w) for w in r.json().get("results", [])]
 
-        out.append({
-            "title": title,
-            "abstract": abstract,
-            "year": year,
-            "venue": venue,
-            "doi": doi,
-            "openalex_id": w.get("id"),
-            "url_pdf": url_pdf,
-            "url_page": url_page,
-            "authors": authors,
-            "source": "openalex",
-            "source_payload": w,
-        })
-    return out
+def _to_record(w: dict) -> Dict:
+    title = w.get("title") or ""
+    year = w.get("publication_year")
+    doi = (w.get("ids") or {}).get("doi")
+    url_page = (w.get("primary_location") or {}).get("landing_page_url") or (w.get("host_venue") or {}).get("url") or ""
+    url_pdf = (w.get("primary_location") or {}).get("pdf_url") or ""
+    authors = [{"name": a.get("author", {}).get("display_name","")} for a in (w.get("authorships") or [])]
+    abstract = _reconstruct_abstract(w.get("abstract_inverted_index"))
+    venue = (w.get("host_venue") or {}).get("display_name")
+
+    return {
+        "title": title,
+        "abstract": abstract,
+        "year": year,
+        "venue": venue,
+        "doi": doi,
+        "openalex_id": w.get("id"),
+        "url_pdf": url_pdf,
+        "url_page": url_page,
+        "authors": authors,
+        "source": "openalex",
+        "source_payload": w,
+    }
@@ -2,17 +2,18 @@
 # Optional: set PUBMED_EMAIL to identify yourself politely.
 from __future__ import annotations
 from typing import List, Dict
-import os, time, requests
+import datetime, os, time, requests
+from ..resilience import source_get
 
 ESEARCH = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
 ESUMMARY = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
 
-def _req(url: str, params: dict, retries: int = 4) -> requests.Response:
+def _req(url: str, params: dict, retries: int = 4, kind: str = "page") -> requests.Response:
     ua = "research-agent/0.4 (PubMed)"
     headers = {"User-Agent": ua}
     delay = 0.8
     for _ in range(retries):
-        r = requests.get(url, params=params, headers=headers, timeout=40)
+        r = source_get("pubmed", url, params=params, headers=headers, kind=kind)
         if r.status_code < 400:
             return r
         time.sleep(delay)
@@ -29,23 +30,41 @@ def _year_from(pubdate: str | None) -> int | None:
     except Exception:
         return None
 
-def search_pubmed(query: str, max_results: int = 50,
-                  year_from: int | None = None, year_to: int | None = None) -> List[Dict]:
-    email = os.getenv("PUBMED_EMAIL", "").strip()
-
-    # 1) esearch: get list of PMIDs
-    term = query
+def _term(query: str, year_from: int | None, year_to: int | None) -> str:
     if year_from or year_to:
         # PubMed date range with [dp] (date of publication)
         y1 = year_from or "1900"
         y2 = year_to or "3000"
-        term = f"({query}) AND ({y1}[dp] : {y2}[dp])"
+        return f"({query}) AND ({y1}[dp] : {y2}[dp])"
+    return query
+
+def count_pubmed(query: str, year_from: int | None = None, year_to: int | None = None) -> int:
+    """Total hits for the query (esearch `count` with retmax=0)."""
+    params = {"db": "pubmed", "retmode": "json", "retmax": 0, "term": _term(query, year_from, year_to)}
+    email = os.getenv("PUBMED_EMAIL", "").strip()
+    if email:
+        params["email"] = email
+    data = _req(ESEARCH, params, kind="count").json()
+    return int((data.get("esearchresult") or {}).get("count") or 0)
+
+def search_pubmed(query: str, max_results: int = 50,
+                  year_from: int | None = None, year_to: int | None = None,
+                  start: int = 0, since: str | None = None) -> List[Dict]:
+    email = os.getenv("PUBMED_EMAIL", "").strip()
+
+    # 1) esearch: get list of PMIDs
+    term = _term(query, year_from, year_to)
     params = {
         "db": "pubmed",
         "retmode": "json",
         "retmax": max_results,
+        "retstart": start,
         "term": term,
     }
+    if since:
+        # delta fetch: records entered into PubMed (Entrez date) since the last run
+        params.update({"datetype": "edat", "mindate": since.replace("-", "/"),
+                       "maxdate": datetime.date.today().strftime("%Y/%m/%d")})
     if email:
         params["email"] = email
 
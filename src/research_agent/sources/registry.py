@@ -0,0 +1,172 @@
+# Source registry: every source declares its capabilities up front, and its module
+# (plus `requests`) is only imported once the source is actually selected.
+# Third-party sources plug in through the "research_agent.sources" entry point group.
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Mapping, Optional
+import importlib, os, sys
+
+ENTRY_POINT_GROUP = "research_agent.sources"
+
+@dataclass(frozen=True)
+class SourceSpec:
+    """
+    Declarative description of a search source.
+    - target: "module:function"; modules starting with "." are relative to this package.
+      The function signature is fn(query, max_results, year_from, year_to) -> List[Dict];
+      sources with `paging` also accept a `start=` offset (a multiple of max_results).
+    - year_filter: "server" (pushed into the API query, so pages are not thinned out),
+      "client" (filtered after download) or "none" (not filtered at all). Built-in sources
+      push years down natively; DBLP, which only knows exact years, falls back to the
+      client filter for open-ended or wider-than-25-year ranges, so it is declared
+      "client": a short page does not mean its listing is exhausted
+    - paging: the function can fetch beyond the first page
+    - abstracts: records usually carry an abstract (matters for LLM scoring)
+    - api_key_env: environment variable that must be set for the source to work
+    - count: optional "module:function" returning the total hit count,
+      fn(query, year_from, year_to) -> int, used to size paged requests
+    - since: the function accepts `since="YYYY-MM-DD"` and then only returns records
+      added upstream on or after that date (delta fetch for watch mode)
+    - paid: requests spend a metered API quota; the source is queried after the free
+      ones, through the quota manager (see quota.py)
+    """
+    name: str
+    label: str
+    target: str
+    default: bool = False
+    year_filter: str = "client"
+    paging: bool = False
+    abstracts: bool = False
+    api_key_env: Optional[str] = None
+    count: Optional[str] = None
+    since: bool = False
+    paid: bool = False
+    func: Optional[Callable] = None  # already-loaded callable (entry point plugins)
+
+    @staticmethod
+    def _resolve(target: str) -> Callable:
+        mod_name, _, attr = target.partition(":")
+        mod = importlib.import_module(mod_name, package=__package__ if mod_name.startswith(".") else None)
+        return getattr(mod, attr)
+
+    def load(self) -> Callable:
+        if self.func is not None:
+            return self.func
+        return self._resolve(self.target)
+
+    def load_count(self) -> Optional[Callable]:
+        return self._resolve(self.count) if self.count else None
+
+    def missing_key(self) -> bool:
+        return bool(self.api_key_env) and not os.getenv(self.api_key_env or "")
+
+# Order matters: when two sources return the same paper, the earlier one wins dedup.
+BUILTIN_SOURCES: List[SourceSpec] = [
+    SourceSpec("openalex", "OpenAlex", ".openalex_source:search_openalex", default=True,
+               year_filter="server", paging=True, abstracts=True,
+               count=".openalex_source:count_openalex", since=True),
+    SourceSpec("arxiv", "arXiv", ".arxiv_source:search_arxiv", default=True,
+               year_filter="server", paging=True, abstracts=True, since=True),
+    SourceSpec("pubmed", "PubMed", ".pubmed_source:search_pubmed", default=True,
+               year_filter="server", paging=True, count=".pubmed_source:count_pubmed", since=True),
+    SourceSpec("hal", "HAL", ".hal_source:search_hal", default=True,
+               year_filter="server", paging=True, abstracts=True),
+    SourceSpec("dblp", "DBLP", ".dblp_source:search_dblp", default=True,
+               year_filter="client", paging=True),
+    SourceSpec("doaj", "DOAJ", ".doaj_source:search_doaj",
+               year_filter="server", paging=True, abstracts=True),
+    SourceSpec("core", "CORE", ".core_source:search_core",
+               year_filter="server", paging=True, abstracts=True),
+    SourceSpec("scopus", "Scopus", ".scopus_source:search_scopus",
+               year_filter="server", paging=True, abstracts=True, api_key_env="SCOPUS_API_KEY",
+               paid=True),
+    SourceSpec("ieee", "IEEE Xplore", ".ieee_source:search_ieee",
+               year_filter="server", paging=True, abstracts=True, api_key_env="IEEE_API_KEY",
+               paid=True),
+    SourceSpec("crossref", "Crossref", ".crossref_source:search_crossref",
+               year_filter="server", paging=True, since=True),
+    SourceSpec("local", "Local index", ".local_source:search_local",
+               year_filter="server", paging=True, abstracts=True, count=".local_source:count_local"),
+]
+
+_plugins: Optional[Dict[str, SourceSpec]] = None
+
+def _entry_points():
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # pragma: no cover
+        return []
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=ENTRY_POINT_GROUP))
+    return list(eps.get(ENTRY_POINT_GROUP, []))  # Python 3.9
+
+def plugin_sources() -> Dict[str, SourceSpec]:
+    """
+    Discover third-party sources. An entry point may reference either a SourceSpec
+    (to declare capabilities) or a plain search function.
+    """
+    global _plugins
+    if _plugins is None:
+        _plugins = {}
+        for ep in _entry_points():
+            try:
+                obj = ep.load()
+            except Exception as e:
+                print(f"[warn] Source plugin '{ep.name}' failed to load: {e}", file=sys.stderr)
+                continue
+            if isinstance(obj, SourceSpec):
+                spec = obj
+            elif callable(obj):
+                spec = SourceSpec(ep.name, ep.name, ep.value, func=obj)
+            else:
+                print(f"[warn] Source plugin '{ep.name}' is not a SourceSpec or callable", file=sys.stderr)
+                continue
+            if spec.name in {s.name for s in BUILTIN_SOURCES}:
+                print(f"[warn] Source plugin '{spec.name}' shadows a built-in source; ignored", file=sys.stderr)
+                continue
+            _plugins[spec.name] = spec
+    return _plugins
+
+def all_sources(include_plugins: bool = True) -> List[SourceSpec]:
+    specs = list(BUILTIN_SOURCES)
+    if include_plugins:
+        specs += list(plugin_sources().values())
+    return specs
+
+def get_source(name: str) -> SourceSpec:
+    for spec in BUILTIN_SOURCES:
+        if spec.name == name:
+            return spec
+    spec = plugin_sources().get(name)
+    if spec is None:
+        raise KeyError(f"unknown source: {name}")
+    return spec
+
+def default_source_names() -> List[str]:
+    return [s.name for s in BUILTIN_SOURCES if s.default]
+
+def resolve_sources(names: Iterable[str] | None = None,
+                    toggles: Mapping[str, bool] | None = None) -> List[SourceSpec]:
+    """
+    Turn a selection into specs, in registry order with paid sources last.
+    `names` replaces the default selection; `toggles` like {"use_hal": False} then
+    add or remove single sources (kept for the historical use_* keyword arguments).
+    """
+    selected = list(names) if names is not None else default_source_names()
+    for key, on in (toggles or {}).items():
+        name = key[4:] if key.startswith("use_") else key
+        if on and name not in selected:
+            selected.append(name)
+        elif not on and name in selected:
+            selected.remove(name)
+
+    specs: List[SourceSpec] = []
+    for name in selected:
+        try:
+            specs.append(get_source(name))
+        except KeyError as e:
+            print(f"[warn] {e.args[0]}", file=sys.stderr)
+    order = {s.name: i for i, s in enumerate(all_sources(include_plugins=False))}
+    specs.sort(key=lambda s: (s.paid, order.get(s.name, len(order))))
+    return specs
@@ -1,12 +1,14 @@
 from __future__ import annotations
 from typing import List, Dict
-import os, requests
+import os
+from ..resilience import source_get
 
 SCOPUS_API = "https://api.elsevier.com/content/search/scopus"
 
 def search_scopus(query: str, max_results: int = 50,
                   year_from: int | None = None,
-                  year_to: int | None = None) -> List[Dict]:
+                  year_to: int | None = None,
+                  start: int = 0) -> List[Dict]:
     """
     Scopus search.
     Requires: export SCOPUS_API_KEY=your_key
@@ -17,8 +19,14 @@ def search_scopus(query: str, max_results: int = 50,
         raise RuntimeError("SCOPUS_API_KEY not set")
 
     headers = {"X-ELS-APIKey": key, "Accept": "application/json"}
-    params = {"query": query, "count": max_results}
-    r = requests.get(SCOPUS_API, params=params, headers=headers, timeout=40)
+    clauses = [f"({query})"]
+    if year_from:
+        clauses.append(f"PUBYEAR > {year_from - 1}")
+    if year_to:
+        clauses.append(f"PUBYEAR < {year_to + 1}")
+    q = " AND ".join(clauses) if len(clauses) > 1 else query
+    params = {"query": q, "count": max_results, "start": start}
+    r = source_get("scopus", SCOPUS_API, params=params, headers=headers, hedge=False)  # billed per request
     r.raise_for_status()
     data = r.json()
 
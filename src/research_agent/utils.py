@@ -1,6 +1,28 @@
 # Utilities: slugify, hashing, JSON writing, simple keyword scoring, and a tiny Ollama client.
 from __future__ import annotations
-import re, hashlib, os, json
+import re, hashlib, os, json, threading
+from typing import List
+
+_session = None
+_session_lock = threading.Lock()
+
+def http_session():
+    """
+    Process-wide `requests.Session` so sources reuse pooled keep-alive connections
+    (imported lazily: library import does not pay for `requests`).
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                sess = requests.Session()
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+                sess.mount("https://", adapter)
+                sess.mount("http://", adapter)
+                _session = sess
+    return _session
 
 def slugify(text: str) -> str:
     """
@@ -22,10 +44,22 @@ def ensure_dir(path: str) -> None:
     """Create directory if missing."""
     os.makedirs(path, exist_ok=True)
 
-def write_json(path: str, data: dict) -> None:
-    """Write JSON with UTF-8 and indentation."""
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def cache_dir(*parts: str) -> str:
+    """
+    Per-user cache directory shared by all runs ($RESEARCH_AGENT_CACHE, default
+    ~/.cache/research-agent), created on demand; `parts` name a subdirectory or file.
+    """
+    root = os.getenv("RESEARCH_AGENT_CACHE") or os.path.join(os.path.expanduser("~"), ".cache", "research-agent")
+    ensure_dir(root)
+    return os.path.join(root, *parts)
+
+def write_json(path: str, data: dict, compact: bool = False, compression: str | None = None) -> str:
+    """
+    Write JSON (UTF-8, indented unless `compact`) through the serialization layer,
+    optionally gzip/zstd-compressed; returns the path written (see serialize.py).
+    """
+    from .serialize import write_json as _write
+    return _write(path, data, compact, compression)
 
 def simple_content_score(query: str, text: str) -> float:
     """
@@ -43,17 +77,63 @@ def simple_content_score(query: str, text: str) -> float:
     inter = len(qtoks & ttoks)
     return inter / len(qtoks)
 
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English prose)."""
+    return len(text) // 4 + 1
+
+def truncate_to_tokens(text: str, max_tokens: int | None) -> str:
+    """Cut text to roughly `max_tokens`, on a word boundary, marking the cut with "…"."""
+    if not max_tokens or estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max_tokens * 4]
+    sp = cut.rfind(" ")
+    if sp > len(cut) // 2:
+        cut = cut[:sp]
+    return cut.rstrip() + " …"
+
+class LLMBudgetExceeded(RuntimeError):
+    """Raised when a run's CallBudget is spent."""
+
+class CallBudget:
+    """
+    Cap on the LLM calls of one scoring run. It is passed along with each classify
+    call rather than stored on the client, so concurrent runs sharing a warm client
+    (the daemon's pool) each spend their own budget.
+    """
+    def __init__(self, limit: int | None):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def spend(self) -> None:
+        with self._lock:
+            if self.limit is not None and self.used >= self.limit:
+                raise LLMBudgetExceeded(f"LLM call budget of {self.limit} reached")
+            self.used += 1
+
 class OllamaClient:
     """
     Lightweight wrapper:
     - uses python `ollama` package if present
     - otherwise falls back to HTTP on localhost:11434
     - classification prompt must produce JSON: {"score": float in [0,1]}
+    - batch prompts (classify_batch) must produce a JSON array of such floats
+    - keep_alive (e.g. "30m", -1) asks Ollama to keep the model loaded between calls
+    - classify calls accept a CallBudget; once it is spent, scores fall back to keyword overlap
+    - the client only holds the connection and keep-alive settings, so one instance can
+      serve concurrent runs (`calls` is a process-wide statistic)
     """
-    def __init__(self, model: str = "llama3.1:8b", host: str = "http://localhost:11434"):
+    BASE_OPTIONS = {"temperature": 0.0, "num_predict": 64}
+
+    def __init__(self, model: str = "llama3.1:8b", host: str = "http://localhost:11434",
+                 keep_alive: str | int | None = None):
         self.model = model
         self.host = host.rstrip("/")
+        self.keep_alive = keep_alive
+        self.calls = 0  # generate requests issued (for run statistics)
+        self._calls_lock = threading.Lock()
         self._use_pkg = False
+        self._aclient = None
         try:
             import ollama  # type: ignore
             self._ollama = ollama
@@ -61,38 +141,193 @@ class OllamaClient:
         except Exception:
             self._ollama = None
 
-    def classify_relevance(self, query: str, abstract: str) -> float:
+    @staticmethod
+    def _prompt(query: str, abstract: str) -> str:
+        return (
+            "Rate from 0.0 to 1.0 how relevant the following paper abstract is "
+            "to the user's query. Return ONLY a JSON object like {\"score\": 0.0}.\n\n"
+            f"Query: {query}\n\nAbstract:\n{abstract}\n"
+        )
+
+    @staticmethod
+    def _batch_prompt(query: str, abstracts: List[str]) -> str:
+        body = "\n\n".join(f"[{i}] {a}" for i, a in enumerate(abstracts, 1))
+        return (
+            "Rate from 0.0 to 1.0 how relevant each numbered paper abstract is to the "
+            f"user's query. Return ONLY a JSON array of exactly {len(abstracts)} numbers, "
+            "one per abstract in the same order, like [0.0, 0.0].\n\n"
+            f"Query: {query}\n\nAbstracts:\n{body}\n"
+        )
+
+    @staticmethod
+    def _parse_score(txt: str) -> float | None:
+        s = txt.find("{"); e = txt.rfind("}")
+        if s!=-1 and e!=-1:
+            data = json.loads(txt[s:e+1])
+            val = float(data.get("score", 0.0))
+            return max(0.0, min(1.0, val))
+        return None
+
+    @staticmethod
+    def _parse_batch(txt: str, n: int) -> List[float | None]:
+        """
+        Strictly validate a batch reply: one JSON array of exactly n numbers in [0, 1].
+        A malformed array yields all None; single bad entries yield None in their slot.
+        """
+        s = txt.find("["); e = txt.rfind("]")
+        if s == -1 or e == -1:
+            return [None] * n
+        try:
+            data = json.loads(txt[s:e+1])
+        except ValueError:
+            return [None] * n
+        if not isinstance(data, list) or len(data) != n:
+            return [None] * n
+        out: List[float | None] = []
+        for v in data:
+            ok = isinstance(v, (int, float)) and not isinstance(v, bool) and 0.0 <= v <= 1.0
+            out.append(float(v) if ok else None)
+        return out
+
+    @staticmethod
+    def batch_options(n: int, context_tokens: int | None) -> dict:
+        opts = dict(OllamaClient.BASE_OPTIONS, num_predict=8 * n + 16)
+        if context_tokens:
+            opts["num_ctx"] = context_tokens
+        return opts
+
+    def _count(self) -> None:
+        with self._calls_lock:
+            self.calls += 1
+
+    def _generate(self, prompt: str, options: dict | None = None) -> str:
+        options = options or self.BASE_OPTIONS
+        self._count()
+        if self._use_pkg:
+            resp = self._ollama.generate(model=self.model, prompt=prompt, options=options,
+                                         keep_alive=self.keep_alive)
+            return resp.get("response","")
+        url = f"{self.host}/api/generate"
+        payload = {"model": self.model, "prompt": prompt, "options": options, "stream": False}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        r = http_session().post(url, json=payload, timeout=60)
+        r.raise_for_status()
+        return r.json().get("response","")
+
+    async def _agenerate(self, prompt: str, options: dict | None = None) -> str:
+        options = options or self.BASE_OPTIONS
+        if not self._use_pkg:
+            import asyncio
+            return await asyncio.to_thread(self._generate, prompt, options)
+        self._count()
+        if self._aclient is None:
+            self._aclient = self._ollama.AsyncClient(host=self.host)
+        resp = await self._aclient.generate(model=self.model, prompt=prompt, options=options,
+                                            keep_alive=self.keep_alive)
+        return resp.get("response","")
+
+    def warm(self) -> bool:
+        """Load the model now (an empty prompt only loads it); True on success."""
+        try:
+            self._generate("")
+            return True
+        except Exception:
+            return False
+
+    def classify_relevance(self, query: str, abstract: str, budget: CallBudget | None = None) -> float:
         """
         Ask a local LLM to rate abstract relevance [0..1].
-        If anything fails, we fall back to simple_content_score.
+        If anything fails (or `budget` is spent), we fall back to simple_content_score.
+        """
+        if not query or not abstract:
+            return 0.0
+        try:
+            if budget is not None:
+                budget.spend()
+            val = self._parse_score(self._generate(self._prompt(query, abstract)))
+            if val is not None:
+                return val
+        except Exception:
+            pass
+        return simple_content_score(query, abstract)
+
+    async def aclassify_relevance(self, query: str, abstract: str,
+                                  budget: CallBudget | None = None) -> float:
+        """
+        Async variant of classify_relevance. Uses ollama.AsyncClient when the package
+        is installed, otherwise runs the HTTP fallback in a worker thread.
+        Cancellation propagates; other failures fall back to simple_content_score.
         """
         if not query or not abstract:
             return 0.0
-        prompt = (
-            "Rate from 0.0 to 1.0 how relevant the following paper abstract is "
-            "to the user's query. Return ONLY a JSON object like {\"score\": 0.0}.\n\n"
-            f"Query: {query}\n\nAbstract:\n{abstract}\n"
-        )
         try:
-            if self._use_pkg:
-                resp = self._ollama.generate(
-                    model=self.model, prompt=prompt, options={"temperature": 0.0, "num_predict": 64}
-                )
-                txt = resp.get("response","")
-            else:
-                import requests, json as _json
-                url = f"{self.host}/api/generate"
-                payload = {"model": self.model, "prompt": prompt,
-                           "options":{"temperature":0.0,"num_predict":64}, "stream": False}
-                r = requests.post(url, json=payload, timeout=60)
-                r.raise_for_status()
-                txt = r.json().get("response","")
-            s = txt.find("{"); e = txt.rfind("}")
-            if s!=-1 and e!=-1:
-                import json as _json
-                data = _json.loads(txt[s:e+1])
-                val = float(data.get("score", 0.0))
-                return max(0.0, min(1.0, val))
+            if budget is not None:
+                budget.spend()
+            val = self._parse_score(await self._agenerate(self._prompt(query, abstract)))
+            if val is not None:
+                return val
         except Exception:
             pass
         return simple_content_score(query, abstract)
+
+    def classify_batch(self, query: str, abstracts: List[str],
+                       context_tokens: int | None = None,
+                       budget: CallBudget | None = None) -> List[float]:
+        """
+        Rate several abstracts with one prompt. Entries the model got wrong (or the
+        whole batch, if the array is malformed) are retried one by one.
+        """
+        if len(abstracts) == 1:
+            return [self.classify_relevance(query, abstracts[0], budget)]
+        try:
+            if budget is not None:
+                budget.spend()
+            txt = self._generate(self._batch_prompt(query, abstracts),
+                                 self.batch_options(len(abstracts), context_tokens))
+            vals = self._parse_batch(txt, len(abstracts))
+        except Exception:
+            vals = [None] * len(abstracts)
+        return [v if v is not None else self.classify_relevance(query, a, budget)
+                for v, a in zip(vals, abstracts)]
+
+    async def aclassify_batch(self, query: str, abstracts: List[str],
+                              context_tokens: int | None = None,
+                              budget: CallBudget | None = None) -> List[float]:
+        """Async variant of classify_batch."""
+        if len(abstracts) == 1:
+            return [await self.aclassify_relevance(query, abstracts[0], budget)]
+        try:
+            if budget is not None:
+                budget.spend()
+            txt = await self._agenerate(self._batch_prompt(query, abstracts),
+                                        self.batch_options(len(abstracts), context_tokens))
+            vals = self._parse_batch(txt, len(abstracts))
+        except Exception:
+            vals = [None] * len(abstracts)
+        out: List[float] = []
+        for v, a in zip(vals, abstracts):
+            out.append(v if v is not None else await self.aclassify_relevance(query, a, budget))
+        return out
+
+def pack_batches(query: str, abstracts: List[str], max_batch: int,
+                 context_tokens: int = 4096) -> List[List[int]]:
+    """
+    Group abstract positions into batches of at most `max_batch` whose prompt plus
+    expected output fits `context_tokens`. An abstract that does not fit on its own
+    still gets a batch of one (truncate beforehand to avoid that).
+    """
+    preamble = estimate_tokens(OllamaClient._batch_prompt(query, []))
+    batches: List[List[int]] = []
+    cur: List[int] = []
+    used = preamble
+    for i, a in enumerate(abstracts):
+        cost = estimate_tokens(a) + 4 + 8  # "[n] " label + its share of the output
+        if cur and (len(cur) >= max_batch or used + cost > context_tokens):
+            batches.append(cur)
+            cur, used = [], preamble
+        cur.append(i)
+        used += cost
+    if cur:
+        batches.append(cur)
+    return batches
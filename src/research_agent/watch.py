@@ -0,0 +1,50 @@
+# Watch mode state: a per-topic, per-source high-water mark ("YYYY-MM-DD") so scheduled
+# runs only ask each API for records added since the previous successful run.
+from __future__ import annotations
+from typing import Dict, Mapping
+import datetime, json, os
+
+from .utils import slugify
+
+def default_watch_path(outdir: str, topic: str) -> str:
+    return os.path.join(outdir, slugify(topic), "watch.json")
+
+def today() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+
+class WatchState:
+    """
+    JSON file {"sources": {name: {"since": "YYYY-MM-DD", "updated": iso-timestamp}}}.
+    Marks are the UTC date a run started, so the boundary day is fetched twice rather
+    than missed; dedup (and --only-new) absorb the overlap.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.sources: Dict[str, Dict[str, str]] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.sources = (json.load(f) or {}).get("sources", {})
+
+    def since(self) -> Dict[str, str]:
+        """Current marks, suitable for collect(since=...)."""
+        return {name: st["since"] for name, st in self.sources.items() if st.get("since")}
+
+    def advance(self, status: Mapping[str, bool], mark: str) -> None:
+        """
+        Move the mark of every source whose `status` is True: it succeeded and, for a
+        delta fetch, read the whole delta listing (collect() reports a listing cut at
+        per_source as False, so the records past the cap are fetched next time).
+        """
+        stamp = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+        for name, ok in status.items():
+            if ok:
+                self.sources[name] = {"since": mark, "updated": stamp}
+
+    def save(self) -> None:
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"sources": self.sources}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
@@ -0,0 +1,9 @@
+# Keep per-user state (cache dir, id map) out of the home directory and apart per test.
+import pytest
+
+from src.research_agent import idmap
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("RESEARCH_AGENT_CACHE", str(tmp_path / "_cache"))
+    monkeypatch.setattr(idmap, "_idmap", None)
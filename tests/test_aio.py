@@ -0,0 +1,76 @@
+# Async API parity with the blocking pipeline (run: pytest -q)
+import asyncio, json, os
+from src.research_agent import aio
+from src.research_agent.paperstore import PackStore
+from src.research_agent.sources import registry
+from src.research_agent.sources.registry import SourceSpec
+from src.research_agent.utils import OllamaClient
+
+def test_acollect_and_ascore_and_save(monkeypatch, tmp_path):
+    def fake(query, n, y1, y2):
+        return [{"title": "diffusion mri", "abstract": "diffusion models for mri", "doi": "10.1/a"},
+                {"title": "other", "abstract": "unrelated", "doi": "10.1/b"}]
+    def slow(query, n, y1, y2):
+        import time; time.sleep(0.3)
+        return [{"title": "late", "doi": "10.1/c"}]
+    monkeypatch.setattr(registry, "_plugins", {
+        "fake": SourceSpec("fake", "Fake", "", func=fake),
+        "slow": SourceSpec("slow", "Slow", "", func=slow),
+    })
+
+    async def run():
+        items = await aio.acollect("diffusion mri", None, 5, sources=["fake", "slow"], source_timeout=0.1)
+        assert [it["doi"] for it in items] == ["10.1/a", "10.1/b"]
+        return await aio.ascore_and_save("diffusion mri", items, str(tmp_path), None, min_score=0.5)
+
+    base, n = asyncio.run(run())
+    assert n == 1
+    with open(os.path.join(base, "index.jsonl"), encoding="utf-8") as f:
+        assert json.loads(f.readline())["doi"] == "10.1/a"
+
+class SlowLLM(OllamaClient):
+    """Replies 0.8 after a delay picked by the abstract ("slow" or not)."""
+    def __init__(self):
+        super().__init__(model="fake")
+        self.cancelled = 0
+
+    async def _agenerate(self, prompt, options=None):
+        self.calls += 1
+        try:
+            await asyncio.sleep(0.5 if "slow" in prompt else 0.01)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return '{"score": 0.8}'
+
+ITEMS = [{"title": "a", "abstract": "slow one"}, {"title": "b", "abstract": "fast one"},
+         {"title": "c"}]
+
+def test_ascore_iter_completion_order_and_item_timeout():
+    async def run(timeout):
+        items = [dict(it) for it in ITEMS]
+        return [(pos, it["score"]) async for pos, it in
+                aio.ascore_iter("query", items, llm=SlowLLM(), item_timeout=timeout)]
+    # no abstract: yielded at once; then the LLM results as they finish
+    assert asyncio.run(run(None)) == [(2, 0.0), (1, 0.8), (0, 0.8)]
+    assert asyncio.run(run(0.1)) == [(2, 0.0), (1, 0.8), (0, 0.0)]  # slow one keeps its base score
+
+def test_closing_ascore_iter_cancels_outstanding_requests():
+    llm = SlowLLM()
+    async def run():
+        it = aio.ascore_iter("query", [dict(x) for x in ITEMS], llm=llm)
+        assert (await it.__anext__())[0] == 2
+        assert (await it.__anext__())[0] == 1
+        await it.aclose()
+    asyncio.run(run())
+    assert llm.cancelled == 1
+
+def test_incremental_drafts_are_not_written_twice(monkeypatch, tmp_path):
+    puts = []
+    real = PackStore.put
+    monkeypatch.setattr(PackStore, "put", lambda self, pid, item: (puts.append(pid), real(self, pid, item)))
+    items = [{"title": "graph a", "abstract": "graph", "doi": "10.1/a"},
+             {"title": "b", "abstract": "other", "doi": "10.1/b"}]
+    base, n = asyncio.run(aio.ascore_and_save("graph", items, str(tmp_path), None,
+                                              incremental=True, storage="pack"))
+    assert n == 2 and sorted(puts) == sorted(set(puts))
@@ -0,0 +1,20 @@
+# Command-line runs end to end against a fake source (run: pytest -q)
+import sys
+
+import cli
+from src.research_agent.seen import SeenSet, default_seen_path
+from src.research_agent.sources import registry
+from src.research_agent.sources.registry import SourceSpec
+
+def test_only_new_remembers_saved_papers_only(monkeypatch, tmp_path):
+    def fake(query, n, y1, y2):
+        return [{"title": "graph networks", "doi": "10.1/best", "abstract": "graph networks"},
+                {"title": "unrelated", "doi": "10.1/cut", "abstract": "cooking recipes"}]
+    monkeypatch.setattr(registry, "_plugins", {"fake": SourceSpec("fake", "Fake", "", func=fake)})
+    out = str(tmp_path / "out")
+    monkeypatch.setattr(sys, "argv", ["cli.py", "graph networks", "--sources", "fake",
+                                      "--only-new", "--max-papers", "1", "--outdir", out])
+    assert cli.main() == 0
+    with SeenSet(default_seen_path(out, "graph networks", "topic")) as seen:
+        assert seen.seen({"doi": "10.1/best"})
+        assert not seen.seen({"doi": "10.1/cut"})  # cut by --max-papers, never shown
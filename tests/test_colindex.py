@@ -0,0 +1,38 @@
+# Round-trip checks for the columnar index (run: pytest -q)
+from src.research_agent.colindex import write_columnar_index, open_columnar_index
+
+def test_colindex_roundtrip(tmp_path):
+    rows = [
+        {"id": "a1", "title": "Diffusion für MRI", "year": 2023, "score": 0.9, "source": "arxiv"},
+        {"id": "b2", "title": "Graph nets", "year": None, "score": 0.4, "source": "openalex"},
+        {"id": "c3", "title": "", "year": 2019, "score": 0.7, "source": "arxiv"},
+    ]
+    path = str(tmp_path / "index.col")
+    assert write_columnar_index(path, rows) == 3
+    with open_columnar_index(path) as idx:
+        assert len(idx) == 3
+        assert idx.title(0) == "Diffusion für MRI" and idx.id(2) == "c3"
+        assert idx.year(1) is None and idx.source(1) == "openalex"
+        assert idx.filter(min_score=0.5) == [0, 2]
+        assert idx.filter(min_score=0.7) == [0, 2]  # float32 0.7 still meets a 0.7 threshold
+        assert idx.filter(year_from=2020) == [0]
+        assert idx.filter(sources=["arxiv"]) == [0, 2]
+        assert idx.top(2) == [0, 2]
+
+def test_colindex_empty(tmp_path):
+    path = str(tmp_path / "index.col")
+    write_columnar_index(path, [])
+    with open_columnar_index(path) as idx:
+        assert len(idx) == 0 and idx.filter() == []
+
+def test_colindex_truncated_header(tmp_path):
+    path = str(tmp_path / "index.col")
+    write_columnar_index(path, [])
+    with open(path, "r+b") as f:
+        f.truncate(10)
+    try:
+        open_columnar_index(path)
+    except ValueError as e:
+        assert "not a columnar index" in str(e)
+    else:
+        raise AssertionError("truncated index opened")
@@ -0,0 +1,39 @@
+# Progress event stream: callbacks, JSON lines and daemon notifications (run: pytest -q)
+import io, json
+
+from src.research_agent.agent import collect, score_and_save
+from src.research_agent.events import jsonl_writer
+from src.research_agent.server import Daemon
+from src.research_agent.sources import registry
+from src.research_agent.sources.registry import SourceSpec
+
+def _fake(monkeypatch):
+    def fake(query, n, y1, y2):
+        return [{"title": "Graph A", "doi": "10.1/a"}, {"title": "Graph A", "doi": "10.1/A"},
+                {"title": "Graph B", "doi": "10.1/b"}]
+    monkeypatch.setattr(registry, "_plugins", {"fake": SourceSpec("fake", "Fake", "", func=fake)})
+
+def test_collect_and_save_events(monkeypatch, tmp_path):
+    _fake(monkeypatch)
+    events = []
+    items = collect("graph", None, 5, sources=["fake"], on_event=events.append)
+    base, n = score_and_save("graph", items, str(tmp_path), None, on_event=events.append)
+    kinds = [e["event"] for e in events]
+    assert kinds[:3] == ["source_started", "source_finished", "item_deduped"]
+    assert events[1]["count"] == 3 and events[1]["ok"] and events[1]["latency"] >= 0
+    assert kinds.count("item_scored") == 2 and kinds.count("item_saved") == 2
+    assert events[-1]["event"] == "run_finished" and events[-1]["saved"] == n == 2
+    assert {e["id"] for e in events if e["event"] == "item_saved"} == \
+        {json.loads(l)["id"] for l in open(f"{base}/index.jsonl")}
+
+def test_jsonl_writer_and_daemon_progress(monkeypatch, tmp_path):
+    _fake(monkeypatch)
+    out = io.StringIO()
+    jsonl_writer(out)({"event": "run_finished", "saved": 1})
+    assert json.loads(out.getvalue()) == {"event": "run_finished", "saved": 1}
+    notes = []
+    resp = Daemon(notify=notes.append).handle({"jsonrpc": "2.0", "id": 7, "method": "search", "params": {
+        "topic": "graph", "sources": ["fake"], "outdir": str(tmp_path), "progress": True}})
+    assert resp["result"]["saved"] == 2
+    assert all(n["method"] == "progress" and n["params"]["request"] == 7 for n in notes)
+    assert notes[-1]["params"]["event"] == "run_finished"
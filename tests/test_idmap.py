@@ -0,0 +1,44 @@
+# Persistent cross-source identifier map and dedup across ids (run: pytest -q)
+from src.research_agent.agent import collect
+from src.research_agent.idmap import IdMap, id_keys
+from src.research_agent.sources import registry
+from src.research_agent.sources.registry import SourceSpec
+
+OPENALEX = {"title": "Graph nets", "openalex_id": "https://openalex.org/W7", "doi": "https://doi.org/10.1/GN",
+            "source_payload": {"ids": {"openalex": "https://openalex.org/W7", "doi": "https://doi.org/10.1/GN",
+                                       "pmid": "https://pubmed.ncbi.nlm.nih.gov/123"},
+                               "locations": [{"landing_page_url": "https://arxiv.org/abs/2101.00001v2"}]}}
+
+def test_id_keys_from_payloads():
+    assert set(id_keys(OPENALEX)) == {"openalex_id:W7", "doi:10.1/gn", "pubmed_id:123", "arxiv_id:2101.00001"}
+    pubmed = {"pubmed_id": "55", "source_payload": {"articleids": [{"idtype": "doi", "value": "10.2/X"}]}}
+    assert id_keys(pubmed) == ["pubmed_id:55", "doi:10.2/x"]
+    assert "arxiv_id:2203.1" in id_keys({"doi": "10.48550/arXiv.2203.1"})
+
+def test_clusters_merge_and_persist(tmp_path):
+    path = str(tmp_path / "ids.sqlite")
+    m = IdMap(path)
+    a = m.learn([["doi:10.1/a", "arxiv_id:1"]])
+    b = m.learn([["pubmed_id:9", "openalex_id:W9"]])
+    assert a["doi:10.1/a"] != b["pubmed_id:9"]
+    m.learn([["arxiv_id:1", "pubmed_id:9"]])  # bridges both clusters
+    m.close()
+    m = IdMap(path)
+    cids = m.learn([["doi:10.1/a"], ["openalex_id:W9"]])
+    assert cids["doi:10.1/a"] == cids["openalex_id:W9"]
+    m.close()
+
+def test_dedup_across_sources_and_runs(monkeypatch):
+    batches = {
+        "oa": [dict(OPENALEX)],
+        "ax": [{"title": "Graph nets (preprint)", "arxiv_id": "2101.00001v1", "doi": None}],
+        "pm": [{"title": "Graph nets.", "pubmed_id": "123"}],
+    }
+    monkeypatch.setattr(registry, "_plugins", {
+        name: SourceSpec(name, name, "", func=lambda q, n, y1, y2, name=name: [dict(r) for r in batches[name]])
+        for name in batches})
+    items = collect("graph", None, 5, sources=["oa", "ax", "pm"])
+    assert len(items) == 1 and items[0]["source_payload"]["ids"]
+    # a later run without the OpenAlex record still knows the links and fills the DOI
+    items = collect("graph", None, 5, sources=["ax", "pm"])
+    assert len(items) == 1 and items[0]["doi"] == "10.1/gn" and items[0]["pubmed_id"] == "123"
@@ -0,0 +1,70 @@
+# Durable job queue: stages, dedup across fetch tasks, leases, retries (run: pytest -q)
+import json, os, time
+
+from src.research_agent import jobqueue
+from src.research_agent.sources import registry
+from src.research_agent.sources.registry import SourceSpec
+
+def _sources(monkeypatch, flaky_failures=1):
+    state = {"flaky": flaky_failures}
+    def first(query, n, y1, y2):
+        return [{"title": "graph a", "doi": "10.1/a", "abstract": "graph"},
+                {"title": "graph b", "doi": "10.1/b"}]
+    def flaky(query, n, y1, y2):
+        if state["flaky"] > 0:
+            state["flaky"] -= 1
+            raise RuntimeError("upstream down")
+        return [{"title": "graph b (dup)", "doi": "10.1/b"}, {"title": "c", "doi": "10.1/c"}]
+    monkeypatch.setattr(registry, "_plugins", {
+        "first": SourceSpec("first", "First", "", func=first),
+        "flaky": SourceSpec("flaky", "Flaky", "", func=flaky),
+    })
+
+def test_job_runs_through_stages_with_two_workers(monkeypatch, tmp_path):
+    _sources(monkeypatch)
+    db = str(tmp_path / "q.sqlite")
+    job = jobqueue.submit(db, "graph", sources=["first", "flaky"], outdir=str(tmp_path / "out"), chunk=2)
+    a, b = jobqueue.Worker(db, "a", retry_delay=0), jobqueue.Worker(db, "b", retry_delay=0)
+    while a.run_one() | b.run_one():
+        pass
+    [st] = jobqueue.status(db)
+    assert st["state"] == "done" and st["tasks"] == {"fetch:done": 2, "score:done": 2, "finalize:done": 1}
+    rows = [json.loads(l) for l in open(os.path.join(st["outbase"], "index.jsonl"))]
+    assert sorted(r["doi"] for r in rows) == ["10.1/a", "10.1/b", "10.1/c"]
+    assert next(r for r in rows if r["doi"] == "10.1/b")["title"] == "graph b"  # earlier source wins
+    a.close(); b.close()
+
+def test_expired_lease_is_reclaimed_and_stale_owner_ignored(monkeypatch, tmp_path):
+    _sources(monkeypatch, flaky_failures=0)
+    db = str(tmp_path / "q.sqlite")
+    jobqueue.submit(db, "graph", sources=["first"], outdir=str(tmp_path / "out"))
+    a, b = jobqueue.Worker(db, "a", lease=0.01), jobqueue.Worker(db, "b")
+    task = a.claim()
+    time.sleep(0.05)
+    assert b.claim()["id"] == task["id"]  # a's lease ran out
+    a._finish(task, None)  # late completion from the old owner changes nothing
+    assert jobqueue.status(db)[0]["tasks"] == {"fetch:leased": 1}
+    a.close(); b.close()
+
+def test_lease_expired_on_last_attempt_moves_job_on(monkeypatch, tmp_path):
+    _sources(monkeypatch, flaky_failures=0)
+    db = str(tmp_path / "q.sqlite")
+    jobqueue.submit(db, "graph", sources=["first"], outdir=str(tmp_path / "out"), max_attempts=1)
+    a, b = jobqueue.Worker(db, "a", lease=0.01), jobqueue.Worker(db, "b")
+    a.claim()  # never finished
+    time.sleep(0.05)
+    b.run()
+    [st] = jobqueue.status(db)
+    assert st["state"] == "done" and st["tasks"] == {"fetch:failed": 1, "finalize:done": 1}
+    a.close(); b.close()
+
+def test_queue_uses_rollback_journal_and_its_own_idmap(monkeypatch, tmp_path):
+    _sources(monkeypatch, flaky_failures=0)
+    db = str(tmp_path / "q.sqlite")
+    jobqueue.submit(db, "graph", sources=["first"], outdir=str(tmp_path / "out"))
+    w = jobqueue.Worker(db, "a")
+    w.run()
+    assert w.conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert os.path.exists(db + ".idmap")
+    assert not os.path.exists(os.path.join(os.environ["RESEARCH_AGENT_CACHE"], "idmap.sqlite"))
+    w.close()
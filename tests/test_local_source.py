@@ -0,0 +1,48 @@
+# Offline source: streaming ingestion of bulk dumps and FTS5 search (run: pytest -q)
+import gzip, json
+
+from src.research_agent.agent import collect
+from src.research_agent.sources.local_source import count_local, ingest, search_local
+
+OAI = """<?xml version="1.0"?>
+<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/"><ListRecords>
+<record><header><identifier>oai:arXiv.org:2101.00001</identifier></header><metadata>
+<arXiv xmlns="http://arxiv.org/OAI/arXiv/"><id>2101.00001</id><created>2021-01-04</created>
+<authors><author><keyname>Smith</keyname><forenames>Alice</forenames></author></authors>
+<title>Graph neural networks for
+ molecules</title><abstract>We study message passing.</abstract></arXiv></metadata></record>
+<record><header status="deleted"><identifier>oai:arXiv.org:2101.00002</identifier></header></record>
+</ListRecords></OAI-PMH>"""
+
+def _dumps(tmp_path):
+    works = [
+        {"id": "https://openalex.org/W1", "title": "Graph networks in chemistry", "publication_year": 2019,
+         "ids": {"doi": "https://doi.org/10.1/a"}, "abstract_inverted_index": {"molecules": [0]},
+         "primary_location": {"source": {"display_name": "J. Chem. Inf."}}, "authorships": []},
+        {"id": "https://openalex.org/W2", "title": "Protein folding", "publication_year": 2022,
+         "authorships": [{"author": {"display_name": "Bob"}}]},
+    ]
+    with gzip.open(tmp_path / "part_000.gz", "wt") as f:
+        f.write("\n".join(json.dumps(w) for w in works) + "\n")
+    (tmp_path / "arxiv.xml").write_text(OAI)
+    (tmp_path / "arxiv.json").write_text(json.dumps({
+        "id": "2203.00003", "title": "Graph transformers", "abstract": "Attention on graphs.",
+        "authors": "Carol Diaz", "authors_parsed": [["Diaz", "Carol", ""]], "journal-ref": None,
+        "doi": None, "versions": [{"version": "v1", "created": "Tue, 1 Mar 2022 10:00:00 GMT"}]}) + "\n")
+
+def test_ingest_and_search(tmp_path, monkeypatch):
+    _dumps(tmp_path)
+    index = str(tmp_path / "idx.sqlite")
+    monkeypatch.setenv("RESEARCH_AGENT_LOCAL_INDEX", index)
+    assert ingest([str(tmp_path)], index) == 4
+    assert ingest([str(tmp_path / "part_000.gz")], index) == 2  # re-ingest replaces, no duplicates
+    hits = search_local("graph", 10)
+    assert len(hits) == 3 and count_local("graph") == 3
+    assert [h["year"] for h in search_local("graph", 10, 2020, 2021)] == [2021]
+    oai = search_local("molecules message", 5)[0]
+    assert oai["arxiv_id"] == "2101.00001" and oai["authors"] == [{"name": "Alice Smith"}]
+    assert oai["title"] == "Graph neural networks for molecules" and oai["source"] == "local"
+    chem = search_local("graph", 10, venue="j. chem")
+    assert [h["doi"] for h in chem] == ["https://doi.org/10.1/a"]
+    items = collect("graph", "2022", 10, sources=["local"])
+    assert [i["title"] for i in items] == ["Graph transformers"] and items[0]["authors"] == ["Carol Diaz"]
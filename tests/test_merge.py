@@ -0,0 +1,30 @@
+# Parallel merge of results trees into one deduplicated library (run: pytest -q)
+import json, os
+
+from src.research_agent.agent import score_and_save
+from src.research_agent.merge import merge
+from src.research_agent.paperstore import open_store
+
+def test_merge_dedups_and_keeps_topic_scores(tmp_path):
+    results = str(tmp_path / "results")
+    score_and_save("graph networks", [
+        {"title": "Graph networks", "doi": "10.1/A", "abstract": "graph networks"},
+        {"title": "Unrelated", "doi": "10.1/b"}], results, None)
+    score_and_save("protein folding", [
+        {"title": "Graph networks", "doi": "https://doi.org/10.1/a", "venue": "NeurIPS"},
+        {"title": "Protein folding", "arxiv_id": "2101.1"}], results, None, storage="pack")
+    out = str(tmp_path / "library")
+    n = merge([results], out, workers=2, shards=4)
+    assert n == 3
+    rows = [json.loads(l) for l in open(os.path.join(out, "index.jsonl"))]
+    assert [r["score"] for r in rows] == sorted((r["score"] for r in rows), reverse=True)
+    graph = next(r for r in rows if r["title"] == "Graph networks")
+    assert set(graph["topic_scores"]) == {"graph-networks", "protein-folding"}
+    assert graph["score"] == max(graph["topic_scores"].values())
+    with open_store(out) as st:
+        paper = st.get(graph["id"])
+        assert paper["venue"] == "NeurIPS" and paper["abstract"] == "graph networks"
+    assert len(json.load(open(os.path.join(out, "export.csl.json")))) == 3
+    assert not [n for n in os.listdir(out) if n.startswith("merge-")]
+    # merging the library again changes nothing
+    assert merge([out], str(tmp_path / "again"), workers=1, shards=2) == 3
@@ -0,0 +1,34 @@
+# Packed paper store: random access, overwrite, compaction, recovery (run: pytest -q)
+import json, os
+
+from src.research_agent.agent import score_and_save
+from src.research_agent.paperstore import PackStore, open_store
+
+def test_pack_roundtrip_and_compaction(tmp_path):
+    with PackStore(str(tmp_path)) as st:
+        st.put("a", {"title": "A"})
+        st.put("b", {"title": "B ü"})
+        assert st.get("b") == {"title": "B ü"}
+        for i in range(5):
+            st.put("a", {"title": "A", "v": i})  # superseded records pile up
+    assert os.path.getsize(tmp_path / "papers.pack") < 100  # compacted on close
+    with open_store(str(tmp_path)) as st:
+        assert st.kind == "pack" and sorted(st) == ["a", "b"]
+        assert st.get("a")["v"] == 4 and st.get("missing") is None
+
+def test_pack_recovers_lost_index(tmp_path):
+    with PackStore(str(tmp_path)) as st:
+        st.put("a", {"title": "A"})
+    os.remove(tmp_path / "papers.idx")
+    with open(tmp_path / "papers.pack", "ab") as f:
+        f.write(b'b\t{"tit')  # torn write
+    with PackStore(str(tmp_path)) as st:
+        assert list(st) == ["a"] and st.get("a") == {"title": "A"}
+
+def test_score_and_save_pack(tmp_path):
+    items = [{"title": f"graph {i}", "doi": f"10.1/{i}"} for i in range(3)]
+    base, n = score_and_save("graph", items, str(tmp_path), None, storage="pack")
+    assert n == 3 and not os.path.exists(os.path.join(base, "papers"))
+    rows = [json.loads(l) for l in open(os.path.join(base, "index.jsonl"))]
+    with open_store(base) as st:
+        assert [st.get(r["id"])["doi"] for r in rows] == ["10.1/0", "10.1/1", "10.1/2"]
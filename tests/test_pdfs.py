@@ -0,0 +1,73 @@
+# PDF stage against a local stub server: resume, dedup, eviction (run: pytest -q)
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json, os, threading
+
+from src.research_agent.pdfs import PdfStore, fetch_pdfs
+
+PDF = b"%PDF-1.4\n" + b"x" * 5000
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = PDF if self.path.startswith("/pdf") else b"<html>landing page</html>"
+        start = 0
+        rng = self.headers.get("Range")
+        if rng:
+            start = int(rng.split("=")[1].split("-")[0])
+        self.server.ranges.append(rng)
+        self.send_response(206 if rng else 200)
+        self.send_header("Content-Length", str(len(body) - start))
+        self.end_headers()
+        self.wfile.write(body[start:])
+
+    def log_message(self, *a):
+        pass
+
+def _serve():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.ranges = []
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}"
+
+def _topic(tmp_path, name, urls):
+    base = tmp_path / name
+    (base / "papers").mkdir(parents=True)
+    with open(base / "index.jsonl", "w") as idx:
+        for i, u in enumerate(urls):
+            (base / "papers" / f"p{i}.json").write_text(json.dumps({"title": f"p{i}"}))
+            idx.write(json.dumps({"id": f"p{i}", "url_pdf": u}) + "\n")
+    return str(base)
+
+def test_fetch_resume_and_dedup(tmp_path):
+    srv, root = _serve()
+    try:
+        store = str(tmp_path / "_pdfs")
+        # a previous run left half of /pdf/a behind
+        with open(PdfStore(store).part_for(root + "/pdf/a"), "wb") as f:
+            f.write(PDF[:1000])
+        base = _topic(tmp_path, "t1", [root + "/pdf/a", root + "/pdf/b", root + "/html"])
+        assert fetch_pdfs(base, store, top=3, workers=3) == 2
+        assert "bytes=1000-" in srv.ranges
+        p0 = json.load(open(os.path.join(base, "papers", "p0.json")))
+        p1 = json.load(open(os.path.join(base, "papers", "p1.json")))
+        assert p0["pdf_path"] == p1["pdf_path"]  # same bytes stored once
+        assert open(p0["pdf_path"], "rb").read() == PDF
+        assert "pdf_path" not in json.load(open(os.path.join(base, "papers", "p2.json")))
+
+        # another topic reuses the store without downloading again
+        n = len(srv.ranges)
+        other = _topic(tmp_path, "t2", [root + "/pdf/a"])
+        assert fetch_pdfs(other, store, top=1) == 1 and len(srv.ranges) == n
+    finally:
+        srv.shutdown()
+
+def test_evict_lru(tmp_path):
+    store = PdfStore(str(tmp_path), budget_bytes=10)
+    paths = []
+    for i, sha in enumerate(["aa11", "bb22"]):
+        part = store.part_for(sha)
+        with open(part, "wb") as f:
+            f.write(b"%PDF-" + b"0" * 5)
+        paths.append(store.commit(f"u{i}", part, sha))
+        os.utime(paths[-1], (i, i))
+    assert store.evict(keep=set()) == [paths[0]]
+    assert store.urls == {"u1": "bb22"}
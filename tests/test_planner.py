@@ -0,0 +1,34 @@
+# Adaptive planner against fake paged sources (run: pytest -q)
+from src.research_agent.planner import adaptive_fetch
+from src.research_agent.sources.registry import SourceSpec
+
+def _paged(records, calls):
+    def search(query, n, y1, y2, start=0):
+        calls.append((start, n))
+        return records[start:start + n]
+    return search
+
+def test_budget_shifts_away_from_duplicates():
+    good = [{"title": f"graph networks {i}", "doi": f"10.1/g{i}"} for i in range(100)]
+    dupes = [{"title": "graph networks 0", "doi": "10.1/g0"}] * 100
+    good_calls, dup_calls = [], []
+    specs = [
+        SourceSpec("good", "Good", "", paging=True, year_filter="server", func=_paged(good, good_calls)),
+        SourceSpec("dup", "Dup", "", paging=True, year_filter="server", func=_paged(dupes, dup_calls)),
+    ]
+    out = adaptive_fetch("graph networks", specs, None, None, budget=60, page_size=10)
+    assert len(out) == 60
+    assert len(dup_calls) == 1                      # dropped after one page of duplicates
+    assert [s for s, _ in good_calls] == [0, 10, 20, 30, 40]
+
+def test_last_page_stays_aligned():
+    records = [{"title": f"graph {i}", "doi": f"10.1/{i}"} for i in range(100)]
+    calls = []
+    def by_page(query, n, y1, y2, start=0):  # like OpenAlex: page = start // per_page + 1
+        calls.append((start, n))
+        page = start // n
+        return records[page * n:(page + 1) * n]
+    spec = SourceSpec("pg", "Pg", "", paging=True, year_filter="server", func=by_page)
+    out = adaptive_fetch("graph", [spec], None, None, budget=48, page_size=25)
+    assert calls == [(0, 25), (25, 25)]
+    assert [r["doi"] for r in out] == [f"10.1/{i}" for i in range(48)]
@@ -0,0 +1,42 @@
+# Year ranges reach each API's native query syntax (run: pytest -q)
+import importlib
+
+import pytest
+
+from src.research_agent.sources.registry import BUILTIN_SOURCES
+
+class _Resp:
+    status_code = 200
+    text = '<feed xmlns="http://www.w3.org/2005/Atom"></feed>'
+    def raise_for_status(self):
+        pass
+    def json(self):
+        return {}
+
+EXPECT = {
+    "arxiv": ("search_query", "submittedDate:[201901010000 TO 202112312359]"),
+    "hal": ("fq", "producedDateY_i:[2019 TO 2021]"),
+    "dblp": ("q", "year:2019:|year:2020:|year:2021:"),
+    "doaj": ("q", "bibjson.year:[2019 TO 2021]"),
+    "core": ("q", "yearPublished>=2019 AND yearPublished<=2021"),
+    "scopus": ("query", "PUBYEAR > 2018 AND PUBYEAR < 2022"),
+    "ieee": ("start_year", 2019),
+}
+
+@pytest.mark.parametrize("name", sorted(EXPECT))
+def test_year_range_pushed_down(name, monkeypatch):
+    monkeypatch.setenv("SCOPUS_API_KEY", "k")
+    monkeypatch.setenv("IEEE_API_KEY", "k")
+    mod = importlib.import_module(f"src.research_agent.sources.{name}_source")
+    sent = {}
+    monkeypatch.setattr(mod, "source_get", lambda src, url, params=None, **kw: sent.update(params) or _Resp())
+    getattr(mod, f"search_{name}")("graph networks", 10, 2019, 2021)
+    key, value = EXPECT[name]
+    if isinstance(value, str):
+        assert value in sent[key]
+    else:
+        assert sent[key] == value
+
+def test_builtin_sources_declare_server_year_filter():
+    # DBLP pushes narrow ranges down but filters wide or open ones client-side
+    assert {s.name for s in BUILTIN_SOURCES if s.year_filter != "server"} == {"dblp"}
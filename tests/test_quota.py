@@ -0,0 +1,60 @@
+# Paid-source quotas: cache-first repeats, budgets, paid sources last (run: pytest -q)
+import asyncio
+
+import pytest
+
+from src.research_agent import aio, quota
+from src.research_agent.agent import collect
+from src.research_agent.sources import registry
+from src.research_agent.sources.registry import SourceSpec, resolve_sources
+
+def _sources(monkeypatch, calls):
+    def free(query, n, y1, y2, start=0):
+        return [{"title": f"Free {i}", "doi": f"10.1/{i}"} for i in range(3)]
+    def paid(query, n, y1, y2, start=0):
+        calls.append(start)
+        return [{"title": f"Paid {i}", "doi": f"10.2/{i}"} for i in range(start, start + n)]
+    monkeypatch.setattr(registry, "_plugins", {
+        "paidx": SourceSpec("paidx", "PaidX", "", paging=True, paid=True, func=paid),
+        "freex": SourceSpec("freex", "FreeX", "", paging=True, func=free),
+    })
+
+def test_paid_sources_run_last(monkeypatch):
+    _sources(monkeypatch, [])
+    assert [s.name for s in resolve_sources(["paidx", "freex"])] == ["freex", "paidx"]
+    assert [s.name for s in resolve_sources(["scopus", "crossref", "ieee"])] == ["crossref", "scopus", "ieee"]
+
+def test_cache_first_and_budget(monkeypatch, tmp_path):
+    calls = []
+    _sources(monkeypatch, calls)
+    mgr = quota.QuotaManager(str(tmp_path / "q.sqlite"), {"paidx": 1})
+    monkeypatch.setattr(quota, "_manager", mgr)
+    items = collect("topic", None, 4, sources=["freex", "paidx"])
+    assert len(items) == 7 and calls == [0]
+    assert collect("topic", None, 4, sources=["paidx"]) and calls == [0]  # repeat: from cache
+    assert [u["used"] for u in mgr.usage()] == [1]
+    spec = registry.get_source("paidx")
+    with pytest.raises(quota.QuotaExceeded):
+        mgr.search(spec, spec.func, "other topic", 4)
+    mgr.close()
+
+def test_downscale_when_budget_runs_out(monkeypatch, tmp_path):
+    calls = []
+    _sources(monkeypatch, calls)
+    monkeypatch.setitem(quota.PROVIDERS, "paidx", {"window": quota.DAY, "daily": True, "limit": 2, "page": 2})
+    mgr = quota.QuotaManager(str(tmp_path / "q.sqlite"))
+    spec = registry.get_source("paidx")
+    recs = mgr.search(spec, spec.func, "topic", 10)
+    assert len(recs) == 4 and calls == [0, 2]
+    mgr.close()
+
+def test_acollect_counts_paid_requests(monkeypatch, tmp_path):
+    calls = []
+    _sources(monkeypatch, calls)
+    mgr = quota.QuotaManager(str(tmp_path / "q.sqlite"), {"paidx": 5})
+    monkeypatch.setattr(quota, "_manager", mgr)
+    items = asyncio.run(aio.acollect("topic", None, 4, sources=["freex", "paidx"]))
+    assert len(items) == 7 and calls == [0]
+    asyncio.run(aio.acollect("topic", None, 4, sources=["paidx"]))
+    assert calls == [0] and [u["used"] for u in mgr.usage()] == [1]  # repeat: from cache
+    mgr.close()
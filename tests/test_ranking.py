@@ -0,0 +1,36 @@
+# Bounded-memory ranking matches a full stable sort (run: pytest -q)
+import json, os, random
+
+from src.research_agent.agent import score_and_save
+from src.research_agent.ranking import ExternalSorter, TopK, rank_key
+
+def _items(n):
+    rnd = random.Random(7)
+    return [{"title": f"p{i}", "score": rnd.choice([0.1, 0.5, 0.9]), "year": rnd.choice([None, 2020, 2021])}
+            for i in range(n)]
+
+def test_topk_and_external_sort_match_stable_sort(tmp_path):
+    items = _items(200)
+    expect = sorted(items, key=lambda x: (x["score"], x["year"] or 0), reverse=True)
+    top = TopK(15)
+    sorter = ExternalSorter(max_rows=32, tmpdir=str(tmp_path))
+    for i, it in enumerate(items):
+        top.push(rank_key(it, i), it)
+        sorter.add(rank_key(it, i), {"title": it["title"]})
+    assert [it["title"] for it in top.ranked()] == [it["title"] for it in expect[:15]]
+    assert sorter.spilled == 6
+    assert [r["title"] for r in sorter] == [it["title"] for it in expect]
+    assert os.listdir(tmp_path) == []  # runs cleaned up
+
+def test_score_and_save_top_k_releases_payloads(tmp_path):
+    items = [{"title": f"graph {i}", "abstract": "graph networks" if i % 2 else "other",
+              "doi": f"10.1/{i}", "source_payload": {"big": "x" * 100}} for i in range(20)]
+    base, n = score_and_save("graph networks", items, str(tmp_path), None,
+                             max_papers=3, release=True)
+    assert n == 3
+    rows = [json.loads(l) for l in open(os.path.join(base, "index.jsonl"))]
+    assert [r["doi"] for r in rows] == ["10.1/1", "10.1/3", "10.1/5"]
+    saved = json.load(open(os.path.join(base, "papers", rows[0]["id"] + ".json")))
+    assert saved["abstract"] == "graph networks" and "source_payload" in saved
+    assert all("source_payload" not in it and "abstract" not in it for it in items)
+    assert len(os.listdir(os.path.join(base, "papers"))) == 3
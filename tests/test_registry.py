@@ -0,0 +1,25 @@
+# Source registry: lazy imports, selection and plugin dispatch (run: pytest -q)
+import subprocess, sys
+from src.research_agent.sources import registry
+from src.research_agent.sources.registry import SourceSpec, resolve_sources
+
+def test_library_import_is_lazy():
+    code = ("import sys; import src.research_agent.agent; "
+            "print(any(m == 'requests' or m.startswith('src.research_agent.sources.') and m.endswith('_source') "
+            "for m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+def test_resolve_sources_toggles():
+    names = [s.name for s in resolve_sources(None, {"use_hal": False, "use_crossref": True})]
+    assert "hal" not in names and names[-1] == "crossref"
+    assert [s.name for s in resolve_sources(["dblp", "openalex"])] == ["openalex", "dblp"]
+
+def test_collect_uses_plugin(monkeypatch):
+    from src.research_agent.agent import collect
+    def fake(query, n, y1, y2):
+        return [{"title": "A", "doi": "10.1/X", "authors": ["Ann"]},
+                {"title": "A again", "doi": "10.1/x", "authors": []}]
+    monkeypatch.setattr(registry, "_plugins", {"fake": SourceSpec("fake", "Fake", "", func=fake)})
+    items = collect("topic", None, 5, sources=["fake"])
+    assert len(items) == 1 and items[0]["authors"] == ["Ann"]
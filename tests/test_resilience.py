@@ -0,0 +1,89 @@
+# Adaptive timeouts, hedging and the persisted circuit breaker (run: pytest -q)
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading, time
+
+import pytest
+
+from src.research_agent.resilience import CircuitOpen, SourceHealth, source_get
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.hits += 1
+            first = srv.hits == 1
+        if self.path == "/slow-first" and first:
+            time.sleep(1.0)
+        code = {"/down": 500, "/busy": 429}.get(self.path, 200)
+        self.send_response(code)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *a):
+        pass
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.hits, srv.lock = 0, threading.Lock()
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv, f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+
+def test_hedged_request_beats_slow_primary(server, tmp_path):
+    srv, root = server
+    hs = SourceHealth(str(tmp_path / "h.json"))
+    hs.state["s"] = {"lat": {"page": [0.05] * 20}, "fails": 0, "trips": 0, "open_until": 0.0}
+    assert hs.timeout("s") == 5.0
+    t0 = time.monotonic()
+    r = source_get("s", root + "/slow-first", health_state=hs)
+    assert r.status_code == 200 and time.monotonic() - t0 < 0.8 and srv.hits == 2
+    assert hs.state["s"]["lat"]["page"][-1] >= 0.05  # timed from the first attempt
+
+def test_breaker_opens_and_persists(server, tmp_path):
+    _, root = server
+    path = str(tmp_path / "h.json")
+    hs = SourceHealth(path)
+    for _ in range(3):
+        assert source_get("s", root + "/down", health_state=hs).status_code == 500
+    with pytest.raises(CircuitOpen):
+        source_get("s", root + "/down", health_state=hs)
+    reloaded = SourceHealth(path)
+    with pytest.raises(CircuitOpen):
+        reloaded.check("s")
+    reloaded.reset()
+    assert source_get("s", root + "/ok", health_state=reloaded).status_code == 200
+
+def test_rate_limit_does_not_trip_breaker(server, tmp_path):
+    _, root = server
+    hs = SourceHealth(str(tmp_path / "h.json"))
+    for _ in range(5):
+        assert source_get("s", root + "/busy", health_state=hs).status_code == 429
+    hs.check("s")
+    assert hs.state.get("s", {}).get("fails", 0) == 0
+
+def test_latency_is_kept_per_request_class(server, tmp_path):
+    _, root = server
+    hs = SourceHealth(str(tmp_path / "h.json"))
+    hs.state["s"] = {"lat": {"page": [3.0] * 20}, "fails": 0, "trips": 0, "open_until": 0.0}
+    for _ in range(20):
+        source_get("s", root + "/ok", kind="count", health_state=hs)
+    assert hs.timeout("s") == 6.0 and hs.timeout("s", kind="count") == 5.0
+    assert len(hs.state["s"]["lat"]["page"]) == 20
+
+def test_latency_updates_are_saved_in_batches(server, tmp_path, monkeypatch):
+    _, root = server
+    path = str(tmp_path / "h.json")
+    hs = SourceHealth(path)
+    saves = []
+    real = hs.save
+    monkeypatch.setattr(hs, "save", lambda: (saves.append(1), real()))
+    for _ in range(10):
+        source_get("s", root + "/ok", health_state=hs)
+    assert saves == []
+    source_get("s", root + "/down", health_state=hs)  # breaker changes are written at once
+    assert len(saves) == 1
+    source_get("s", root + "/ok", health_state=hs)
+    hs.flush()
+    assert len(SourceHealth(path).state["s"]["lat"]["page"]) == 11
@@ -0,0 +1,76 @@
+# Run cache: widening --per-source fetches and scores only the difference (run: pytest -q)
+import json, os
+
+from src.research_agent import agent, runcache
+from src.research_agent.agent import score_and_save
+from src.research_agent.runcache import RunCache, _top_up_pages
+from src.research_agent.sources import registry
+from src.research_agent.sources.registry import SourceSpec
+
+def _sources(monkeypatch, calls):
+    def pager(query, n, y1, y2, start=0):
+        calls.append(("pager", start, n))
+        return [{"title": f"Paper {i}", "doi": f"10.1/{i}", "abstract": query}
+                for i in range(start, min(start + n, 30))]
+    def flat(query, n, y1, y2):
+        calls.append(("flat", 0, n))
+        return [{"title": f"Flat {i}", "doi": f"10.2/{i}"} for i in range(n)]
+    monkeypatch.setattr(registry, "_plugins", {
+        "pager": SourceSpec("pager", "Pager", "", year_filter="server", paging=True, func=pager),
+        "flat": SourceSpec("flat", "Flat", "", year_filter="server", func=flat),
+    })
+
+def test_top_up_pages_are_aligned():
+    assert _top_up_pages(50, 200) == [(50, 50), (100, 100)]
+    assert all(start % size == 0 for start, size in _top_up_pages(37, 150))
+
+def test_scorer_id_covers_llm_budget():
+    assert runcache.scorer_id(None, None, None, 10) == "keywords"
+    assert runcache.scorer_id("m", None, 5, 10) != runcache.scorer_id("m", None, 5, None)
+    assert runcache.scorer_id("m", None, 5, 10, batch=4) != runcache.scorer_id("m", None, 5, 10)
+    assert runcache.scorer_id("m", batch=4, context=8192) != runcache.scorer_id("m", batch=4)
+    assert runcache.scorer_id("m", abstract_tokens=200) != runcache.scorer_id("m")
+
+def test_widening_fetches_and_scores_only_new(monkeypatch, tmp_path):
+    calls, scored = [], []
+    _sources(monkeypatch, calls)
+    real = agent.score_items
+    def counting(topic, items, *a, **kw):
+        items = list(items)
+        scored.append(len(items))
+        return real(topic, items, *a, **kw)
+    monkeypatch.setattr(agent, "score_items", counting)
+
+    def run(per_source, **kw):
+        with RunCache(**kw) as runs:
+            items = runs.collect("topic", "2020-2024", per_source, sources=["pager", "flat"])
+            score_and_save("topic", items, str(tmp_path), None, keep_scores=True)
+            runs.save_scores(items)
+        return items
+
+    assert len(run(10)) == 20 and calls == [("pager", 0, 10), ("flat", 0, 10)]
+    calls.clear()
+    items = run(20)
+    assert calls == [("pager", 10, 10), ("flat", 0, 20)]  # flat cannot page: asked again
+    assert len(items) == 40 and scored == [20, 20]
+    calls.clear()
+    assert len(run(50)) == 80 and calls == [("pager", 20, 20), ("flat", 0, 50)]
+    calls.clear()
+    run(60)  # pager came back short (30 records): exhausted
+    assert calls == [("flat", 0, 60)]
+    with open(os.path.join(tmp_path, "topic", "index.jsonl")) as f:
+        assert len([json.loads(line) for line in f]) == 90
+
+def test_stale_or_refreshed_run_is_fetched_again(monkeypatch):
+    calls = []
+    _sources(monkeypatch, calls)
+    with RunCache() as runs:
+        runs.collect("topic", None, 5, sources=["pager"])
+        runs.collect("topic", None, 5, sources=["pager"])
+        assert len(calls) == 1 and runs.runs()[0]["items"] == 5
+        runs.collect("topic", None, 5, sources=["pager"], refresh=True)
+        assert len(calls) == 2
+    monkeypatch.setattr(runcache.time, "time", lambda: 1e12)
+    with RunCache(ttl_days=1) as runs:
+        runs.collect("topic", None, 5, sources=["pager"])
+    assert len(calls) == 3
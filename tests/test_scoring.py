@@ -0,0 +1,72 @@
+# Scoring pipeline: batch packing, strict batch parsing, per-item retry (run: pytest -q)
+import threading
+
+from src.research_agent.scoring import score_items
+from src.research_agent.utils import OllamaClient, pack_batches, truncate_to_tokens
+
+class FakeLLM(OllamaClient):
+    def __init__(self, replies):
+        super().__init__(model="fake")
+        self.replies = list(replies)
+        self.prompts = []
+
+    def _generate(self, prompt, options=None):
+        self.calls += 1
+        self.prompts.append(prompt)
+        return self.replies.pop(0)
+
+def test_parse_batch_is_strict():
+    assert OllamaClient._parse_batch("[0.5, 1]", 2) == [0.5, 1.0]
+    assert OllamaClient._parse_batch("[0.5]", 2) == [None, None]
+    assert OllamaClient._parse_batch("[0.5, 1.7]", 2) == [0.5, None]
+    assert OllamaClient._parse_batch('[true, "x"]', 2) == [None, None]
+
+def test_pack_batches_respects_budget():
+    abstracts = ["word " * 400, "short", "short", "word " * 400]
+    batches = pack_batches("q", abstracts, max_batch=3, context_tokens=700)
+    assert sorted(i for b in batches for i in b) == [0, 1, 2, 3]
+    assert all(len(b) <= 3 for b in batches) and len(batches) > 1
+    assert truncate_to_tokens("a " * 1000, 10).endswith("…")
+
+def test_score_items_batches_and_retries():
+    items = [{"title": "t", "abstract": f"abstract {i}"} for i in range(3)] + [{"title": "no abstract"}]
+    llm = FakeLLM(["[0.9, 2.0, 0.1]", '{"score": 0.4}'])
+    out = list(score_items("query", items, llm, batch_size=3))
+    assert [it["score"] for it in out] == [0.9, 0.4, 0.1, 0.0]
+    assert llm.calls == 2
+
+def test_cascade_respects_band_and_budget():
+    items = [{"title": "t", "abstract": a} for a in (
+        "query words here",        # base 1.0 -> clearly relevant
+        "nothing related",         # base 0.0 -> clearly irrelevant
+        "query alone",             # base 0.33 -> uncertain
+        "words only",              # base 0.33 -> uncertain
+    )]
+    llm = FakeLLM(['{"score": 0.9}'] * 4)
+    out = list(score_items("query words here", items, llm, band=(0.2, 0.8), budget=1))
+    assert llm.calls == 1
+    assert [round(it["score"], 2) for it in out] == [1.0, 0.0, 0.9, 0.33]
+
+def test_concurrent_budgets_on_one_client_are_independent():
+    # two runs share one warm client (as in the daemon); each may make exactly one call
+    gate = threading.Barrier(2, timeout=5)
+
+    class Gated(OllamaClient):
+        def _generate(self, prompt, options=None):
+            self._count()
+            gate.wait()  # both runs are inside their budgets at the same time
+            return "not json"  # malformed batch: per-item retries hit each run's budget
+
+    llm = Gated(model="fake")
+    results = {}
+
+    def run(name):
+        items = [{"title": "t", "abstract": f"{name} abstract {i}"} for i in range(2)]
+        results[name] = list(score_items("query", items, llm, batch_size=2, budget=1))
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in ("a", "b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert llm.calls == 2 and sorted(results) == ["a", "b"]
@@ -0,0 +1,19 @@
+# Persistent seen-set (run: pytest -q)
+from src.research_agent.seen import SeenSet, filter_new, identity_keys, remember
+
+def test_seen_set_persists_and_filters(tmp_path):
+    path = str(tmp_path / "seen.bin")
+    week1 = [{"doi": "10.1/A", "title": "A"}, {"title": "No  Ids, Here!"}]
+    with SeenSet(path) as seen:
+        assert filter_new(week1, seen) == week1
+        remember(week1, seen)
+    week2 = [{"doi": "10.1/a", "arxiv_id": "2401.1"}, {"title": "no ids here"}, {"doi": "10.1/b"}]
+    with SeenSet(path) as seen:
+        assert len(seen) == 2
+        assert filter_new(week2, seen) == [{"doi": "10.1/b"}]
+        remember(week2, seen)
+        assert len(seen) == 4  # 10.1/a already known; arXiv id and 10.1/b added
+
+def test_doi_resolver_prefix_is_ignored():
+    assert identity_keys({"doi": "https://doi.org/10.1/A"}) == identity_keys({"doi": "10.1/a"}) == ["doi:10.1/a"]
+    assert identity_keys({"doi": "doi:10.1/a"}) == ["doi:10.1/a"]
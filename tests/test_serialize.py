@@ -0,0 +1,41 @@
+# Serialization layer: encoders, compression, transparent readers (run: pytest -q)
+import json, os
+
+from src.research_agent.agent import score_and_save
+from src.research_agent.exporters import ExportStream
+from src.research_agent.paperstore import open_store
+from src.research_agent.serialize import dumps, iter_jsonl, loads, read_json, resolve, write_json
+
+def test_dumps_roundtrip():
+    doc = {"title": "Graphs ü", "year": 2023, "authors": ["A", "B"]}
+    for compact in (False, True):
+        assert loads(dumps(doc, compact)) == doc
+    assert b"\n" not in dumps(doc, compact=True) and b"\n  " in dumps(doc)
+
+def test_gzip_write_and_resolve(tmp_path):
+    path = str(tmp_path / "a.json")
+    write_json(path, {"x": 1})
+    assert write_json(path, {"x": 2}, compression="gzip") == path + ".gz"
+    assert not os.path.exists(path)  # stale plain variant removed
+    assert resolve(path) == path + ".gz" and read_json(path) == {"x": 2}
+
+def test_score_and_save_compressed(tmp_path):
+    items = [{"title": f"graph {i}", "doi": f"10.1/{i}"} for i in range(3)]
+    base, n = score_and_save("graph", items, str(tmp_path), None,
+                             compact_json=True, compression="gzip")
+    assert n == 3 and os.path.exists(os.path.join(base, "index.jsonl.gz"))
+    assert all(f.endswith(".json.gz") for f in os.listdir(os.path.join(base, "papers")))
+    rows = list(iter_jsonl(os.path.join(base, "index.jsonl")))
+    with open_store(base) as st:
+        assert sorted(st) == sorted(r["id"] for r in rows)
+        assert st.get(rows[0]["id"])["doi"].startswith("10.1/")
+    with open(os.path.join(base, "export.csl.json"), encoding="utf-8") as f:
+        assert len(json.load(f)) == 3
+
+def test_export_stream_compact(tmp_path):
+    path = str(tmp_path / "e.csl.json")
+    with ExportStream(csl_path=path, compact=True) as ex:
+        ex.write({"title": "A", "year": 2020})
+        ex.write({"title": "B"})
+    text = open(path, encoding="utf-8").read()
+    assert "\n" not in text and [e["title"] for e in json.loads(text)] == ["A", "B"]
@@ -0,0 +1,19 @@
+# JSON-RPC daemon over in-memory streams (run: pytest -q)
+import io, json
+from src.research_agent.server import Daemon, serve_stdio
+
+def test_stdio_roundtrip(tmp_path):
+    reqs = [
+        {"jsonrpc": "2.0", "id": 1, "method": "ping"},
+        {"jsonrpc": "2.0", "id": 2, "method": "missing"},
+        {"jsonrpc": "2.0", "id": 3, "method": "score_and_save",
+         "params": {"topic": "diffusion mri", "outdir": str(tmp_path),
+                    "items": [{"title": "diffusion mri", "doi": "10.1/a"}]}},
+    ]
+    stdin = io.StringIO("".join(json.dumps(r) + "\n" for r in reqs))
+    stdout = io.StringIO()
+    assert serve_stdio(Daemon(), stdin=stdin, stdout=stdout) == 0
+    resps = {r["id"]: r for r in map(json.loads, stdout.getvalue().splitlines())}
+    assert resps[1]["result"]["ok"] is True
+    assert resps[2]["error"]["code"] == -32601
+    assert resps[3]["result"]["saved"] == 1
@@ -0,0 +1,53 @@
+# Snowballing over a fake OpenAlex: batching, budget, dedup, cache (run: pytest -q)
+from src.research_agent.snowball import WorkCache, expand, snowball
+
+# W1 -> cites W2, W3 ; W4 cites W1 ; W2 cites W5
+GRAPH = {"W1": ["W2", "W3"], "W2": ["W5"], "W3": [], "W4": ["W1"], "W5": []}
+
+def _work(wid):
+    return {"id": "https://openalex.org/" + wid, "title": "paper " + wid, "publication_year": 2020,
+            "ids": {}, "referenced_works": ["https://openalex.org/" + r for r in GRAPH[wid]]}
+
+class FakeFetch:
+    def __init__(self):
+        self.calls = []
+    def __call__(self, expr, per_page=200, year_from=None, year_to=None, sort=None):
+        from src.research_agent.sources.openalex_source import _to_record
+        self.calls.append(expr)
+        kind, _, ids = expr.partition(":")
+        ids = ids.split("|")
+        if kind == "openalex_id":
+            hits = [w for w in GRAPH if w in ids]
+        else:  # cites:
+            hits = [w for w, refs in GRAPH.items() if set(refs) & set(ids)]
+        return [_to_record(_work(w)) for w in hits][:per_page]
+
+def test_snowball_hops_and_cache(tmp_path):
+    fetch = FakeFetch()
+    seed = {"title": "paper W1", "openalex_id": "https://openalex.org/W1"}
+    with WorkCache(str(tmp_path / "c.sqlite")) as cache:
+        new = snowball([seed], hops=2, per_hop=10, cache=cache, fetch=fetch)
+        got = {r["openalex_id"][-2:]: r["snowball"]["hop"] for r in new}
+        assert got == {"W2": 1, "W3": 1, "W4": 1, "W5": 2}
+        assert "openalex_id:W2|W3" in fetch.calls  # one batched lookup for both references
+
+        # a second run is served by the cache, and `known` papers are not returned again
+        n = len(fetch.calls)
+        again = snowball([seed], hops=1, per_hop=10, cache=cache, fetch=fetch,
+                         known=[{"openalex_id": "https://openalex.org/W4"}])
+        assert len(fetch.calls) == n
+        assert sorted(r["openalex_id"][-2:] for r in again) == ["W2", "W3"]
+
+def test_snowball_budget():
+    new = snowball([{"openalex_id": "W1"}], hops=1, per_hop=1, direction="references", fetch=FakeFetch())
+    assert len(new) == 1 and new[0]["snowball"]["via"] == "references"
+
+def test_expand_skips_papers_collected_under_a_bare_doi():
+    def fetch(expr, per_page=200, year_from=None, year_to=None, sort=None):
+        from src.research_agent.sources.openalex_source import _to_record
+        w2 = dict(_work("W2"), ids={"doi": "https://doi.org/10.1/W2"})
+        return [_to_record(w2), _to_record(_work("W3"))] if expr.startswith("openalex_id:") else []
+    collected = [{"title": "paper W1", "openalex_id": "https://openalex.org/W1", "abstract": "paper"},
+                 {"title": "paper W2 (Crossref)", "doi": "10.1/w2", "source": "crossref"}]
+    out = expand("paper", collected, seeds=1, hops=1, direction="references", fetch=fetch)
+    assert [r["title"] for r in out] == ["paper W1", "paper W2 (Crossref)", "paper W3"]
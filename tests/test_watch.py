@@ -0,0 +1,38 @@
+# Watch mode: since marks reach capable sources and advance on success (run: pytest -q)
+from src.research_agent.agent import collect
+from src.research_agent.sources import registry
+from src.research_agent.sources.registry import SourceSpec
+from src.research_agent.watch import WatchState
+
+def test_since_marks_roundtrip(monkeypatch, tmp_path):
+    calls = {}
+    def delta(query, n, y1, y2, since=None):
+        calls["delta"] = since
+        return [{"title": "new", "doi": "10.1/new"}]
+    def plain(query, n, y1, y2):
+        calls["plain"] = True
+        return []
+    monkeypatch.setattr(registry, "_plugins", {
+        "delta": SourceSpec("delta", "Delta", "", since=True, func=delta),
+        "plain": SourceSpec("plain", "Plain", "", func=plain),
+    })
+    state = WatchState(str(tmp_path / "watch.json"))
+    state.sources = {"delta": {"since": "2025-01-01"}, "plain": {"since": "2025-01-01"}}
+    status = {}
+    items = collect("t", None, 5, sources=["delta", "plain"], since=state.since(), status=status)
+    assert calls == {"delta": "2025-01-01", "plain": True} and len(items) == 1
+    state.advance({"delta": status["delta"]}, "2025-02-01")
+    state.save()
+    assert WatchState(state.path).since()["delta"] == "2025-02-01"
+
+def test_mark_kept_when_delta_listing_hits_cap(monkeypatch):
+    def delta(query, n, y1, y2, since=None):
+        return [{"title": f"new {i}", "doi": f"10.1/{i}"} for i in range(n)]
+    monkeypatch.setattr(registry, "_plugins", {
+        "delta": SourceSpec("delta", "Delta", "", since=True, func=delta),
+    })
+    status = {}
+    collect("t", None, 5, sources=["delta"], since={"delta": "2025-01-01"}, status=status)
+    assert status == {"delta": False}  # records past the cap would be skipped for good
+    collect("t", None, 5, sources=["delta"], since=None, status=status)
+    assert status == {"delta": True}